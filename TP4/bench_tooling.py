@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Throughput benchmark of the result tooling on synthetic gem5 trees
+(synth_stats.py), so that a change to the parsers or to the plotting code
+can be measured, and refused when it makes them slower.
+
+Stages, per layout:
+- tp4: parse_stats, compute_metrics and read_config_params per run (one
+  pass over the tree, as collect_results does it), then collect_results end
+  to end, write_csv and, with --plot, plot_from_csv;
+- tp5: parse_stats on the multi-core stats.txt, parse_blocks and
+  summarize_block on results.txt, extract_results end to end and, with
+  --plot, plot_results_from_csv.
+
+Every stage is timed --repeat times (the fastest pass is kept) and reports
+items/s, MB/s of input, p50/p95 latency per item and the peak Python heap
+(tracemalloc, in a separate untimed pass so it does not slow the timings;
+per-item stages on the first MEMORY_SAMPLE items, --no-memory skips it).
+--json saves the report; --baseline compares items/s with a saved report of
+the same dataset and exits with 1 when a stage lost more than --threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import synth_stats
+
+ROOT = Path(__file__).resolve().parent
+TP5_EXPERIMENTS = ROOT.parent / "TP5" / "Experiments"
+DATASET_FILE = ".synth.json"
+# Per-item peak memory is measured on the first items only (tracemalloc is slow)
+MEMORY_SAMPLE = 50
+# Stages faster than this in the baseline are too noisy to gate on
+MIN_COMPARE_SECONDS = 0.05
+
+# (name, fn(item, previous step output), bytes read for the item or None)
+Step = Tuple[str, Callable[[Any, Any], Any], Optional[Callable[[Any], int]]]
+# (name, unit, fn() -> number of items, bytes read)
+Batch = Tuple[str, str, Callable[[], int], int]
+
+
+# ---------------- Dataset ----------------
+
+def ensure_dataset(data: Path, layout: str, runs: int, dumps: int, seed: int) -> Tuple[List[Path], float]:
+    """Run directories of the synthetic tree (generated unless data already holds it) and the generation time."""
+    spec = {"layout": layout, "runs": runs, "dumps": dumps, "seed": seed}
+    marker = data / DATASET_FILE
+    if marker.exists() and json.loads(marker.read_text(encoding="utf-8")) == spec:
+        if layout == "tp4":
+            return sorted(p.parent for p in data.glob("*/*/*/stats.txt")), 0.0
+        return sorted(p.parent for p in (data / "results").glob("*/stats.txt")), 0.0
+
+    start = time.perf_counter()
+    if layout == "tp4":
+        run_dirs = synth_stats.generate_tp4(data, runs, dumps=dumps, seed=seed)
+    else:
+        run_dirs = synth_stats.generate_tp5(data, runs, dumps=dumps, seed=seed)
+    elapsed = time.perf_counter() - start
+    marker.write_text(json.dumps(spec), encoding="utf-8")
+    return run_dirs, elapsed
+
+
+def _size(path: Path) -> int:
+    return path.stat().st_size
+
+
+# ---------------- Measurement ----------------
+
+def _result(unit: str, items: int, nbytes: int, seconds: float, latencies: Sequence[float]) -> Dict[str, Any]:
+    res: Dict[str, Any] = {
+        "unit": unit,
+        "items": items,
+        "mb": nbytes / 1e6,
+        "seconds": seconds,
+        "items_per_s": items / seconds if seconds else None,
+        "mb_per_s": nbytes / 1e6 / seconds if seconds and nbytes else None,
+    }
+    if latencies:
+        ordered = sorted(latencies)
+        res["p50_ms"] = statistics.median(ordered) * 1e3
+        res["p95_ms"] = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1e3
+    return res
+
+
+def measure_steps(steps: Sequence[Step], items: Sequence[Any], unit: str, repeat: int,
+                  memory: bool = True) -> Dict[str, Dict[str, Any]]:
+    """Time a chain of per-item steps in one pass over items (no intermediate results kept)."""
+    best: Dict[str, List[float]] = {}
+    for _ in range(repeat):
+        latencies: Dict[str, List[float]] = {name: [] for name, _, _ in steps}
+        for item in items:
+            prev = None
+            for name, fn, _ in steps:
+                start = time.perf_counter()
+                prev = fn(item, prev)
+                latencies[name].append(time.perf_counter() - start)
+        for name, lat in latencies.items():
+            if name not in best or sum(lat) < sum(best[name]):
+                best[name] = lat
+
+    peaks: Dict[str, Optional[int]] = {name: None for name, _, _ in steps}
+    if memory:
+        peaks = _peak_steps(steps, items[:MEMORY_SAMPLE])
+
+    out = {}
+    for name, _, nbytes in steps:
+        total = sum(nbytes(item) for item in items) if nbytes else 0
+        out[name] = _result(unit, len(items), total, sum(best[name]), best[name])
+        out[name]["peak_mib"] = None if peaks[name] is None else peaks[name] / 2**20
+    return out
+
+
+def _peak_steps(steps: Sequence[Step], items: Sequence[Any]) -> Dict[str, Optional[int]]:
+    """Largest heap growth of each step over items."""
+    peaks: Dict[str, Optional[int]] = {name: 0 for name, _, _ in steps}
+    tracemalloc.start()
+    try:
+        for item in items:
+            prev = None
+            for name, fn, _ in steps:
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                prev = fn(item, prev)
+                peaks[name] = max(peaks[name] or 0, tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def measure_batch(batch: Batch, repeat: int, memory: bool = True) -> Dict[str, Any]:
+    """Time one call over the whole tree (items counted by the call itself)."""
+    name, unit, fn, nbytes = batch
+    times = []
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = fn()
+        times.append(time.perf_counter() - start)
+    res = _result(unit, items, nbytes, min(times), [])
+    res["peak_mib"] = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            res["peak_mib"] = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return res
+
+
+def _quiet(fn: Callable[[], Any]) -> Any:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn()
+
+
+# ---------------- Layouts ----------------
+
+def bench_tp4(data: Path, run_dirs: List[Path], repeat: int, plot: bool, plot_jobs: Optional[int],
+              memory: bool = True) -> Dict[str, Dict[str, Any]]:
+    from l1_sweep import collect_results, compute_metrics, parse_stats, plot_from_csv, read_config_params, write_csv
+
+    steps: List[Step] = [
+        ("parse_stats", lambda run, _: parse_stats(run / "stats.txt"), lambda run: _size(run / "stats.txt")),
+        ("compute_metrics", lambda run, stats: compute_metrics(stats), None),
+        ("read_config_params", lambda run, _: read_config_params(run), lambda run: _size(run / "config.ini")),
+    ]
+    results = measure_steps(steps, run_dirs, "files", repeat, memory)
+
+    cpu = run_dirs[0].parent.parent.name
+    total = sum(_size(r / "stats.txt") + _size(r / "config.ini") for r in run_dirs)
+    rows: List[Dict[str, Any]] = []
+
+    def collect() -> int:
+        rows[:] = collect_results(data, cpu)
+        return len(rows)
+
+    csv_path = data / "bench.csv"
+    batches: List[Batch] = [
+        ("collect_results", "runs", collect, total),
+        ("write_csv", "rows", lambda: write_csv(rows, csv_path) or len(rows), 0),
+    ]
+    if plot:
+        batches.append(("plot_from_csv", "figures",
+                        lambda: len(plot_from_csv(csv_path, data / "bench_figures", jobs=plot_jobs, force=True)), 0))
+    for batch in batches:
+        results[batch[0]] = measure_batch(batch, repeat, memory)
+    return results
+
+
+def bench_tp5(data: Path, run_dirs: List[Path], repeat: int, plot: bool, plot_jobs: Optional[int],
+              memory: bool = True) -> Dict[str, Dict[str, Any]]:
+    from l1_sweep import parse_stats
+
+    sys.path.insert(0, str(TP5_EXPERIMENTS))
+    from extract_results import extract_results, parse_blocks, plot_results_from_csv, summarize_block
+
+    results = measure_steps(
+        [("parse_stats", lambda run, _: parse_stats(run / "stats.txt"), lambda run: _size(run / "stats.txt"))],
+        run_dirs, "files", repeat, memory,
+    )
+
+    results_txt = data / "results.txt"
+    lines = results_txt.read_text(encoding="utf-8").splitlines(keepends=True)
+    blocks = parse_blocks(lines)
+    results.update(measure_steps([("summarize_block", lambda block, _: summarize_block(block), None)],
+                                 blocks, "runs", repeat, memory))
+    csv_path = data / "bench.csv"
+    batches: List[Batch] = [
+        ("parse_blocks", "runs", lambda: len(parse_blocks(lines)), _size(results_txt)),
+        ("extract_results", "runs", lambda: len(_quiet(lambda: extract_results(str(results_txt), str(csv_path)))),
+         _size(results_txt)),
+    ]
+    if plot:
+        batches.append(("plot_results_from_csv", "figures",
+                        lambda: len(_quiet(lambda: plot_results_from_csv(csv_path, data / "bench_plots",
+                                                                         jobs=plot_jobs, force=True))), 0))
+    for batch in batches:
+        results[batch[0]] = measure_batch(batch, repeat, memory)
+    return results
+
+
+# ---------------- Report ----------------
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    def fmt(value: Optional[float], spec: str) -> str:
+        return "-" if value is None else format(value, spec)
+
+    print(f"{'stage':<32}{'items':>8}{'MB':>9}{'time s':>9}{'items/s':>11}{'MB/s':>8}"
+          f"{'p50 ms':>8}{'p95 ms':>8}{'peak MiB':>9}" + ("  vs baseline" if baseline else ""))
+    for name, r in report["stages"].items():
+        line = (f"{name:<32}{r['items']:>8}{r['mb']:>9.1f}{r['seconds']:>9.3f}{fmt(r['items_per_s'], '.1f'):>11}"
+                f"{fmt(r['mb_per_s'], '.1f'):>8}{fmt(r.get('p50_ms'), '.3f'):>8}{fmt(r.get('p95_ms'), '.3f'):>8}"
+                f"{fmt(r['peak_mib'], '.1f'):>9}")
+        old = (baseline or {}).get("stages", {}).get(name)
+        if old and old.get("items_per_s") and r["items_per_s"]:
+            line += f"  {(r['items_per_s'] / old['items_per_s'] - 1) * 100:+6.1f}%"
+        print(line)
+    for layout, seconds in report["generate_seconds"].items():
+        if seconds:
+            print(f"(dados {layout} gerados em {seconds:.1f} s)")
+    print(f"max RSS do processo: {report['max_rss_mib']:.0f} MiB")
+
+
+def regressions(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Stages whose items/s fell below (1 - threshold) x the baseline (stages under MIN_COMPARE_SECONDS are skipped)."""
+    if baseline.get("dataset") != report["dataset"]:
+        raise SystemExit(f"baseline de outro conjunto de dados: {baseline.get('dataset')} != {report['dataset']}")
+    found = []
+    for name, r in report["stages"].items():
+        old = baseline.get("stages", {}).get(name)
+        if not old or not old.get("items_per_s") or not r["items_per_s"] or old["seconds"] < MIN_COMPARE_SECONDS:
+            continue
+        ratio = r["items_per_s"] / old["items_per_s"]
+        if ratio < 1 - threshold:
+            found.append(f"{name}: {r['items_per_s']:.1f} {r['unit']}/s vs {old['items_per_s']:.1f} ({(ratio - 1) * 100:+.1f}%)")
+    return found
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Mede a vazao do parsing/coleta/plot sobre arvores gem5 sinteticas")
+    p.add_argument("--layout", choices=["tp4", "tp5", "both"], default="both")
+    p.add_argument("--runs", type=int, default=100, help="simulacoes sinteticas por layout (ex: 10 a 100000)")
+    p.add_argument("--dumps", type=int, default=1, help="blocos de estatisticas por stats.txt")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--data", default=None,
+                   help="diretorio dos dados (reaproveitados se ja gerados com os mesmos parametros; default: temporario)")
+    p.add_argument("--repeat", type=int, default=3, help="passagens cronometradas por etapa (guarda a mais rapida)")
+    p.add_argument("--plot", action="store_true", help="inclui o desenho das figuras")
+    p.add_argument("--no-memory", action="store_true", help="nao mede o pico de memoria (tracemalloc)")
+    p.add_argument("--plot-jobs", type=int, default=None, help="processos de desenho (default: todos os cores)")
+    p.add_argument("--json", default=None, help="salva o relatorio em JSON")
+    p.add_argument("--baseline", default=None, help="relatorio JSON de referencia")
+    p.add_argument("--threshold", type=float, default=0.10,
+                   help="perda de vazao tolerada em relacao a --baseline (default: 0.10 = 10%%)")
+    args = p.parse_args(argv)
+    if args.runs < 1 or args.dumps < 1 or args.repeat < 1:
+        raise SystemExit("--runs, --dumps e --repeat devem ser >= 1")
+
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8")) if args.baseline else None
+    layouts = ["tp4", "tp5"] if args.layout == "both" else [args.layout]
+    report: Dict[str, Any] = {
+        "dataset": {"layouts": layouts, "runs": args.runs, "dumps": args.dumps, "seed": args.seed},
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "stages": {},
+        "generate_seconds": {},
+    }
+
+    with contextlib.ExitStack() as stack:
+        if args.data:
+            root = Path(args.data).expanduser().resolve()
+        else:
+            root = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="bench_tooling_")))
+        for layout in layouts:
+            data = root / layout
+            run_dirs, generated = ensure_dataset(data, layout, args.runs, args.dumps, args.seed)
+            report["generate_seconds"][layout] = generated
+            bench = bench_tp4 if layout == "tp4" else bench_tp5
+            for name, res in bench(data, run_dirs, args.repeat, args.plot, args.plot_jobs, not args.no_memory).items():
+                report["stages"][f"{layout}.{name}"] = res
+
+    report["max_rss_mib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print_report(report, baseline)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"relatorio salvo em {args.json}")
+    if baseline is not None:
+        slower = regressions(report, baseline, args.threshold)
+        if slower:
+            raise SystemExit("regressao de vazao (> {:.0f}%):\n  ".format(args.threshold * 100) + "\n  ".join(slower))
+        print(f"sem regressao acima de {args.threshold * 100:.0f}% em relacao a {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline branch predictor evaluation. gem5 runs once per benchmark with an
+Exec trace of the committed instructions; the conditional branches (PC,
+target, outcome) are kept in a memory-mapped .npy, and the predictors are
+replayed over it with NumPy: 2-bit counter tables are updated with a
+segmented scan over the counter transition functions, so a configuration
+costs a few vectorized passes over the trace instead of a gem5 O3 run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from l1_sweep import (
+    ROOT,
+    discover_binaries,
+    parse_bench_list,
+    run_gem5,
+    run_parallel,
+)
+from mrc import set_distance_histogram
+import profiling
+
+
+BRANCH_DTYPE = np.dtype([("pc", "<u8"), ("target", "<u8"), ("taken", "u1")])
+
+# RISC-V conditional branches as disassembled by gem5
+COND_BRANCHES = {"beq", "bne", "blt", "bge", "bltu", "bgeu", "c_beqz", "c_bnez"}
+
+EXEC_LINE = re.compile(r":\s+(0x[0-9a-fA-F]+)(?:\.\d+)?\s+:\s+([^:]*?)\s*(?::|$)")
+
+# gem5 indexes its tables with pc >> instShiftAmt (2)
+INST_SHIFT = 2
+
+COUNTER_INIT = 0  # gem5 SatCounter start value (strongly not taken)
+
+
+# ---------------- Trace capture ----------------
+
+def parse_exec_trace(path: Path) -> np.ndarray:
+    """Committed conditional branches of a gem5 Exec trace (ExecEnable,ExecUser)."""
+    opener = gzip.open if path.suffix == ".gz" else open
+    records: List[Tuple[int, int, int]] = []
+    pending: Optional[Tuple[int, int, int]] = None  # pc, fallthrough, target
+    with opener(path, "rt", encoding="utf-8", errors="ignore") as fh:  # type: ignore[operator]
+        for line in fh:
+            m = EXEC_LINE.search(line)
+            if m is None:
+                continue
+            pc = int(m.group(1), 16)
+            if pending is not None:
+                bpc, fallthrough, target = pending
+                taken = pc != fallthrough
+                records.append((bpc, target if target else (pc if taken else 0), int(taken)))
+                pending = None
+            disasm = m.group(2).split()
+            if not disasm or disasm[0] not in COND_BRANCHES:
+                continue
+            try:
+                target = pc + int(disasm[-1], 0)
+            except ValueError:
+                target = 0
+            pending = (pc, pc + (2 if disasm[0].startswith("c_") else 4), target)
+    return np.array(records, dtype=BRANCH_DTYPE)
+
+
+def load_branches(path: Path) -> np.ndarray:
+    return np.load(path, mmap_mode="r")
+
+
+# ---------------- Counter tables ----------------
+
+# A transition of a 2-bit counter is a map {0..3} -> {0..3}, packed in one
+# byte (2 bits per input state); composition and application are lookups.
+_STATES = np.arange(4)
+
+
+def _pack(outputs: Sequence[int]) -> int:
+    return sum(int(o) << (2 * s) for s, o in enumerate(outputs))
+
+
+INC = _pack([1, 2, 3, 3])
+DEC = _pack([0, 0, 1, 2])
+KEEP = _pack([0, 1, 2, 3])
+
+_CODES = np.arange(256)
+_APPLY = ((_CODES[:, None] >> (2 * _STATES[None, :])) & 3).astype(np.uint8)  # [f, s] -> f(s)
+# [g, f] -> g o f
+_COMPOSE = np.zeros((256, 256), dtype=np.uint8)
+for _s in range(4):
+    _COMPOSE |= (_APPLY[_CODES[:, None], _APPLY[None, :, _s]] << (2 * _s)).astype(np.uint8)
+
+
+def _group_order(index: np.ndarray) -> np.ndarray:
+    """Stable order grouping equal table indexes (radix sort for tables up to 64k entries)."""
+    if index.size and int(index.max()) < (1 << 16):
+        index = index.astype(np.uint16)
+    return np.argsort(index, kind="stable")
+
+
+def counter_states(index: np.ndarray, steps: np.ndarray, init: int = COUNTER_INIT) -> np.ndarray:
+    """Counter value seen by each event: table entry `index`, update `steps` (INC/DEC/KEEP)."""
+    n = index.size
+    states = np.full(n, init, dtype=np.uint8)
+    if n == 0:
+        return states
+    order = _group_order(index)
+    seg = index[order]
+    prefix = steps[order].astype(np.uint8)
+    # Hillis-Steele segmented scan: prefix[k] = steps of the entry up to event k
+    d = 1
+    while d < n:
+        same = seg[d:] == seg[:-d]
+        if not same.any():
+            break
+        head = prefix[d:]  # view: the right-hand side is gathered before the write
+        head[same] = _COMPOSE[head[same], prefix[:-d][same]]
+        d *= 2
+    before = np.full(n, init, dtype=np.uint8)
+    cont = seg[1:] == seg[:-1]
+    before[1:][cont] = _APPLY[prefix[:-1][cont], init]
+    states[order] = before
+    return states
+
+
+def history(taken: np.ndarray, bits: int, group: Optional[np.ndarray] = None) -> np.ndarray:
+    """Last `bits` outcomes (most recent in bit 0), globally or per `group` entry."""
+    n = taken.size
+    order = np.arange(n) if group is None else _group_order(group)
+    t = taken[order].astype(np.int64)
+    g = None if group is None else group[order]
+    h = np.zeros(n, dtype=np.int64)
+    for j in range(1, min(bits, n) + 1):
+        shifted = t[:-j] << (j - 1)
+        if g is not None:
+            shifted = np.where(g[j:] == g[:-j], shifted, 0)
+        h[j:] |= shifted
+    out = np.empty(n, dtype=np.int64)
+    out[order] = h
+    return out
+
+
+def _update(taken: np.ndarray) -> np.ndarray:
+    return np.where(taken, INC, DEC).astype(np.uint8)
+
+
+def _pc_index(pc: np.ndarray) -> np.ndarray:
+    return (pc >> INST_SHIFT).astype(np.int64)
+
+
+# ---------------- Predictors ----------------
+
+def predict_bimodal(br: np.ndarray, entries: int) -> np.ndarray:
+    idx = _pc_index(br["pc"]) & (entries - 1)
+    return counter_states(idx, _update(br["taken"])) >= 2
+
+
+def predict_gshare(br: np.ndarray, entries: int, hist_bits: int) -> np.ndarray:
+    idx = (_pc_index(br["pc"]) ^ history(br["taken"], hist_bits)) & (entries - 1)
+    return counter_states(idx, _update(br["taken"])) >= 2
+
+
+def predict_local(br: np.ndarray, lht: int, hist_bits: int, pht: int) -> np.ndarray:
+    """Two-level local: per-PC history table -> pattern table (PC bits above the history if pht is larger)."""
+    pc = _pc_index(br["pc"])
+    local = history(br["taken"], hist_bits, pc & (lht - 1))
+    idx = ((pc << hist_bits) | local) & (pht - 1)
+    return counter_states(idx, _update(br["taken"])) >= 2
+
+
+def predict_tournament(br: np.ndarray, lht: int, hist_bits: int, global_entries: int) -> np.ndarray:
+    """gem5/Alpha-style tournament: local 2-level vs global-history counters, global-history chooser."""
+    taken = br["taken"].astype(bool)
+    local = predict_local(br, lht, hist_bits, 1 << hist_bits)
+    ghist = history(br["taken"], int(global_entries).bit_length() - 1) & (global_entries - 1)
+    glob = counter_states(ghist, _update(br["taken"])) >= 2
+    # chooser moves towards the global side when only it was right, and back when only local was
+    steps = np.where(local == glob, KEEP, np.where(glob == taken, INC, DEC)).astype(np.uint8)
+    use_global = counter_states(ghist, steps) >= 2
+    return np.where(use_global, glob, local)
+
+
+def _log2(value: int) -> int:
+    if value < 1 or value & (value - 1):
+        raise ValueError(f"{value} is not a power of two")
+    return value.bit_length() - 1
+
+
+def storage_bits(kind: str, params: Sequence[int]) -> int:
+    """Predictor state in bits (2-bit counters + history registers)."""
+    if kind == "static":
+        return 0
+    if kind == "bimodal":
+        return 2 * params[0]
+    if kind == "gshare":
+        return 2 * params[0] + params[1]
+    if kind == "local":
+        lht, hist_bits, pht = params
+        return lht * hist_bits + 2 * pht
+    lht, hist_bits, global_entries = params
+    return lht * hist_bits + 2 * (1 << hist_bits) + 4 * global_entries + _log2(global_entries)
+
+
+PREDICTOR_ARGS = {
+    "static": "taken|nottaken",
+    "bimodal": "entries",
+    "gshare": "entries:hist_bits",
+    "local": "lht_entries:hist_bits:pht_entries",
+    "tournament": "lht_entries:hist_bits:global_entries",
+}
+
+
+def parse_config(spec: str) -> Tuple[str, Tuple[int, ...]]:
+    """'gshare:4096:12' -> ('gshare', (4096, 12)); 'static:taken' -> ('static', (1,))."""
+    kind, *fields = spec.split(":")
+    if kind not in PREDICTOR_ARGS:
+        raise ValueError(f"unknown predictor {kind!r} (choices: {', '.join(PREDICTOR_ARGS)})")
+    if kind == "static":
+        if fields not in (["taken"], ["nottaken"]):
+            raise ValueError("use static:taken or static:nottaken")
+        return kind, (int(fields[0] == "taken"),)
+    expected = PREDICTOR_ARGS[kind].split(":")
+    if len(fields) != len(expected):
+        raise ValueError(f"{kind} expects {kind}:{PREDICTOR_ARGS[kind]}, got {spec!r}")
+    params = tuple(int(f) for f in fields)
+    for name, value in zip(expected, params):
+        if name.endswith("entries"):
+            _log2(value)
+    return kind, params
+
+
+def predict(br: np.ndarray, kind: str, params: Sequence[int]) -> np.ndarray:
+    if kind == "static":
+        return np.full(br.size, bool(params[0]))
+    return {
+        "bimodal": predict_bimodal,
+        "gshare": predict_gshare,
+        "local": predict_local,
+        "tournament": predict_tournament,
+    }[kind](br, *params)
+
+
+def default_configs() -> List[str]:
+    configs = ["static:nottaken", "static:taken"]
+    configs += [f"bimodal:{1 << b}" for b in range(4, 17)]
+    configs += [f"gshare:{1 << b}:{h}" for b in range(8, 17) for h in range(4, b + 1, 2)]
+    configs += [f"local:{lht}:{h}:{1 << h}" for lht in (256, 1024, 4096) for h in (4, 6, 8, 10, 12)]
+    configs += [f"tournament:{lht}:{h}:{g}" for lht in (512, 2048) for h in (8, 11) for g in (1024, 4096, 8192)]
+    return configs
+
+
+def evaluate(br: np.ndarray, configs: Sequence[str]) -> List[Dict[str, object]]:
+    taken = br["taken"].astype(bool)
+    rows: List[Dict[str, object]] = []
+    for spec in configs:
+        kind, params = parse_config(spec)
+        wrong = int(np.count_nonzero(predict(br, kind, params) != taken))
+        rows.append({
+            "predictor": kind,
+            "config": spec,
+            "storage_bits": storage_bits(kind, params),
+            "branches": int(br.size),
+            "mispredictions": wrong,
+            "mispred_rate": wrong / br.size if br.size else None,
+        })
+    return rows
+
+
+def evaluate_btb(br: np.ndarray, entries: Sequence[int], assocs: Sequence[int]) -> List[Dict[str, object]]:
+    """Hit rate of LRU BTBs looked up / filled by the taken branches."""
+    taken = br[br["taken"].astype(bool)]
+    blocks = _pc_index(taken["pc"])
+    rows: List[Dict[str, object]] = []
+    for n in entries:
+        for assoc in assocs:
+            if n % assoc:
+                continue
+            if blocks.size == 0:
+                # nenhum desvio tomado: BTB nunca consultado
+                hits = 0
+            else:
+                cold, hist = set_distance_histogram(blocks, n // assoc, assoc)
+                hits = int(hist[:assoc].sum())
+            rows.append({
+                "entries": n,
+                "assoc": assoc,
+                "taken": int(blocks.size),
+                "hits": hits,
+                "hit_rate": hits / blocks.size if blocks.size else None,
+            })
+    return rows
+
+
+# ---------------- Commands ----------------
+
+def run_capture(args: argparse.Namespace) -> None:
+    gem5_bin = Path(args.gem5).expanduser().resolve()
+    cfg = Path(args.cfg).expanduser().resolve()
+    out_root = Path(args.out_root).expanduser().resolve()
+    benches = parse_bench_list(args.bench) if args.bench else discover_binaries(ROOT)
+    if not benches:
+        raise SystemExit("Nenhum binário encontrado (.riscv). Use --bench.")
+
+    def capture(outdir: Path, bench_path: Path, bench_opts: List[str]) -> None:
+        run_gem5(
+            gem5_bin=gem5_bin,
+            cfg=cfg,
+            outdir=outdir,
+            cmd=bench_path,
+            l1i=None,
+            l1d=None,
+            options=bench_opts,
+            extra_args=[f"--set={o}" for o in args.set],
+            gem5_args=["--debug-flags=ExecEnable,ExecUser", "--debug-file=exec.trace.gz"],
+        )
+        convert_run(outdir, keep=args.keep_exec)
+
+    tasks = []
+    for bench_name, bench_path, bench_opts in benches:
+        outdir = out_root / args.cpu / bench_name / "branches"
+        if (outdir / "branches.npy").exists() and not args.force:
+            continue
+        tasks.append((bench_name, lambda o=outdir, p=bench_path, a=bench_opts: capture(o, p, a)))
+    failed = run_parallel(tasks, args.jobs)
+    if failed:
+        raise SystemExit(f"{failed} capturas falharam")
+
+
+def convert_run(run_dir: Path, keep: bool = True) -> int:
+    exec_trace = run_dir / "exec.trace.gz"
+    if not exec_trace.exists():
+        exec_trace = run_dir / "exec.trace"
+    if not exec_trace.exists():
+        raise FileNotFoundError(f"{run_dir}: exec.trace(.gz) nao encontrado")
+    br = parse_exec_trace(exec_trace)
+    np.save(run_dir / "branches.npy", br)
+    if not keep:
+        exec_trace.unlink()
+    print(f"{run_dir}: {br.size} desvios condicionais")
+    return int(br.size)
+
+
+def write_rows(rows: List[Dict[str, object]], csv_path: Path) -> None:
+    if not rows:
+        return
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    with csv_path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def plot_replay(rows: List[Dict[str, object]], btb_rows: List[Dict[str, object]], out_dir: Path) -> None:
+    """Per benchmark: misprediction rate vs storage per predictor family, BTB hit rate vs entries."""
+    import matplotlib.pyplot as plt
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for bench in sorted({str(r["bench"]) for r in rows}):
+        fig, axes = plt.subplots(1, 2, figsize=(13, 5))
+        ax = axes[0]
+        sel = [r for r in rows if r["bench"] == bench]
+        for kind in PREDICTOR_ARGS:
+            pts = [r for r in sel if r["predictor"] == kind]
+            if kind == "static":
+                for r in pts:
+                    ax.axhline(float(r["mispred_rate"]), linestyle=":", color="gray")  # type: ignore[arg-type]
+                    ax.annotate(str(r["config"]), (1, float(r["mispred_rate"])), fontsize=8)  # type: ignore[arg-type]
+                continue
+            if not pts:
+                continue
+            # best configuration per storage budget (power-of-two buckets)
+            best: Dict[int, Tuple[float, int]] = {}
+            for r in pts:
+                bits = int(r["storage_bits"])  # type: ignore[call-overload]
+                rate = float(r["mispred_rate"])  # type: ignore[arg-type]
+                if bits.bit_length() not in best or rate < best[bits.bit_length()][0]:
+                    best[bits.bit_length()] = (rate, bits)
+            front = [best[b] for b in sorted(best)]
+            (line,) = ax.plot([b / 1024 for _, b in front], [r for r, _ in front], marker="o", label=kind)
+            ax.scatter(
+                [int(r["storage_bits"]) / 1024 for r in pts],  # type: ignore[call-overload]
+                [float(r["mispred_rate"]) for r in pts],  # type: ignore[arg-type]
+                s=10,
+                alpha=0.3,
+                color=line.get_color(),
+            )
+        ax.set_xscale("log")
+        ax.set_xlabel("Predictor storage (kbit)")
+        ax.set_ylabel("Misprediction rate")
+        ax.set_title("Conditional branches")
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+
+        ax = axes[1]
+        sel_btb = [r for r in btb_rows if r["bench"] == bench]
+        for assoc in sorted({int(r["assoc"]) for r in sel_btb}):  # type: ignore[call-overload]
+            pts = sorted(
+                (r for r in sel_btb if r["assoc"] == assoc and r["hit_rate"] is not None),
+                key=lambda r: int(r["entries"]),  # type: ignore[call-overload]
+            )
+            if not pts:
+                continue
+            ax.plot(
+                [int(r["entries"]) for r in pts],  # type: ignore[call-overload]
+                [float(r["hit_rate"]) for r in pts],  # type: ignore[arg-type]
+                marker="o",
+                label=f"{assoc}-way",
+            )
+        ax.set_xscale("log", base=2)
+        ax.set_xlabel("BTB entries")
+        ax.set_ylabel("Hit rate (taken branches)")
+        ax.set_title("BTB")
+        ax.grid(True, alpha=0.3)
+        if ax.get_lines():
+            ax.legend()
+
+        fig.suptitle(f"{bench} - branch trace replay")
+        fig.tight_layout()
+        fig.savefig(out_dir / f"{bench}_bp_replay.png", dpi=160)
+        plt.close(fig)
+
+
+# Etapas medidas com --profile
+PROFILE_STAGES = [
+    "run_capture", "convert_run", "parse_exec_trace", "load_branches", "evaluate",
+    "evaluate_btb", "write_rows", "plot_replay",
+]
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Capture committed branch traces once, replay predictors offline")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    capture = sub.add_parser("capture", help="simula uma vez com trace Exec e extrai os desvios")
+    capture.add_argument("--cpu", required=True, choices=["A7", "A15"])
+    capture.add_argument("--gem5", required=True, help="caminho do gem5.opt (ou gem5.debug)")
+    capture.add_argument("--cfg", required=True, help="script se_A7.py ou se_A15.py")
+    capture.add_argument("--out-root", default=str(ROOT / "results_bp_replay"))
+    capture.add_argument("--bench", action="append", default=[], help="nome:caminho ou caminho do binario")
+    capture.add_argument("--set", action="append", default=[], help="campo=valor do perfil")
+    capture.add_argument("--jobs", type=int, default=4, help="simulacoes gem5 em paralelo")
+    capture.add_argument("--keep-exec", action="store_true", help="mantem exec.trace.gz")
+    capture.add_argument("--force", action="store_true", help="refaz capturas existentes")
+
+    convert = sub.add_parser("convert", help="extrai branches.npy de um exec.trace(.gz) existente")
+    convert.add_argument("run_dir", nargs="+")
+
+    replay = sub.add_parser("replay", help="avalia os preditores sobre os traces")
+    replay.add_argument("--cpu", required=True, choices=["A7", "A15"])
+    replay.add_argument("--out-root", default=str(ROOT / "results_bp_replay"))
+    replay.add_argument("--config", nargs="+", default=None,
+                        help="ex: static:taken bimodal:2048 gshare:4096:12 local:1024:10:1024 "
+                             "tournament:2048:11:8192 (default: grade com ~100 configuracoes)")
+    replay.add_argument("--btb-entries", nargs="+", type=int, default=[1 << b for b in range(4, 13)])
+    replay.add_argument("--btb-assoc", nargs="+", type=int, default=[1, 2, 4])
+    replay.add_argument("--no-plot", action="store_true")
+
+    for sp in sub.choices.values():
+        profiling.add_arguments(sp)
+    return p
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    profiling.start(args, f"bp_replay {args.cmd}", globals(), PROFILE_STAGES)
+
+    if args.cmd == "capture":
+        run_capture(args)
+        return
+
+    if args.cmd == "convert":
+        for run_dir in args.run_dir:
+            convert_run(Path(run_dir))
+        return
+
+    out_root = Path(args.out_root).expanduser().resolve()
+    configs = args.config or default_configs()
+    try:
+        for spec in configs:
+            parse_config(spec)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    rows: List[Dict[str, object]] = []
+    btb_rows: List[Dict[str, object]] = []
+    for trace in sorted((out_root / args.cpu).glob("*/branches/branches.npy")):
+        bench = trace.parent.parent.name
+        br = load_branches(trace)
+        if not br.size:
+            print(f"{bench}: trace sem desvios, ignorado")
+            continue
+        rows.extend(dict(bench=bench, **r) for r in evaluate(br, configs))
+        btb_rows.extend(dict(bench=bench, **r) for r in evaluate_btb(br, args.btb_entries, args.btb_assoc))
+        best = min((r for r in rows if r["bench"] == bench), key=lambda r: float(r["mispred_rate"]))  # type: ignore[arg-type]
+        print(f"{bench}: {br.size} desvios, {len(configs)} configuracoes, "
+              f"melhor {best['config']} ({float(best['mispred_rate']):.4f})")  # type: ignore[arg-type]
+    if not rows:
+        raise SystemExit("Nenhum trace encontrado (rode bp_replay.py capture)")
+
+    write_rows(rows, out_root / f"bp_replay_{args.cpu}.csv")
+    write_rows(btb_rows, out_root / f"btb_replay_{args.cpu}.csv")
+    print(f"Wrote {out_root / f'bp_replay_{args.cpu}.csv'} and btb_replay_{args.cpu}.csv")
+    if not args.no_plot:
+        out_dir = out_root / f"figures_{args.cpu}"
+        plot_replay(rows, btb_rows, out_dir)
+        print(f"Plots saved to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
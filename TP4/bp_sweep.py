@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Branch predictor sweep (the Python version of SHA/exo1.sh): every predictor
+(static not-taken/taken, bimodal, 2-level, tournament, ...) x BTB size x
+benchmark x input runs in parallel through se_A7.py / se_A15.py, and the
+misprediction rate, BTB hit rate and CPI go to the standard l1_sweep table.
+"""
+
+from __future__ import annotations
+
+import argparse
+import shlex
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from design_space import parse_fixed
+from l1_sweep import (
+    ROOT,
+    compute_metrics,
+    discover_binaries,
+    parse_bench_list,
+    parse_stats,
+    read_config_params,
+    read_run_params,
+    run_gem5,
+    run_key,
+    run_mem_type,
+    run_parallel,
+    write_csv,
+    write_run_params,
+)
+import lean_m5out
+import profiling
+
+
+# Same list as SHA/exo1.sh (names understood by se_core.py --bpred)
+DEFAULT_PREDICTORS = ["nottaken", "taken", "bimod", "2lev", "tournament"]
+
+BP_FIELDS = ["bpred_name", "input"]
+
+Input = Tuple[str, List[str]]
+
+
+def parse_inputs(values: List[str]) -> Dict[str, List[Input]]:
+    """'bench:label::args' -> {bench: [(label, args), ...]}."""
+    inputs: Dict[str, List[Input]] = {}
+    for v in values:
+        spec, sep, args_str = v.partition("::")
+        bench, colon, label = spec.partition(":")
+        if not sep or not colon or not label:
+            raise SystemExit(f"Entrada invalida: {v} (use bench:rotulo::args)")
+        inputs.setdefault(bench, []).append((label, shlex.split(args_str)))
+    return inputs
+
+
+def run_bp_sweep(args: argparse.Namespace) -> None:
+    gem5_bin = Path(args.gem5).expanduser().resolve()
+    cfg = Path(args.cfg).expanduser().resolve()
+    out_root = Path(args.out_root).expanduser().resolve()
+
+    benches = parse_bench_list(args.bench) if args.bench else discover_binaries(ROOT)
+    if not benches:
+        raise SystemExit("Nenhum binário encontrado (.riscv). Use --bench.")
+    inputs = parse_inputs(args.input)
+    unknown = set(inputs) - {b[0] for b in benches}
+    if unknown:
+        raise SystemExit(f"--input para benchmark desconhecido: {', '.join(sorted(unknown))}")
+    try:
+        fixed = parse_fixed(args.set)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    btbs: List[Optional[int]] = list(args.btb_entries) if args.btb_entries else [None]
+
+    scratch = lean_m5out.scratch_dir(args)
+    tasks = []
+    for bench_name, bench_path, bench_opts in benches:
+        # Sem --input, os argumentos do --bench formam a unica entrada
+        for label, options in inputs.get(bench_name, [("", bench_opts)]):
+            for bpred in args.bpred:
+                for btb in btbs:
+                    params = dict(fixed, bpred=bpred)
+                    if btb is not None:
+                        params["btb_entries"] = str(btb)
+                    if label:
+                        params["input"] = label
+                    outdir = out_root / args.cpu / bench_name / run_key(params)
+                    if (outdir / "stats.txt").exists() and not args.force:
+                        continue
+                    write_run_params(outdir, params)
+                    tasks.append((
+                        f"{bench_name} {label} {bpred} btb={btb or 'perfil'}",
+                        lambda outdir=outdir, bench_path=bench_path, options=options, params=params: run_gem5(
+                            gem5_bin=gem5_bin,
+                            cfg=cfg,
+                            outdir=outdir,
+                            cmd=bench_path,
+                            l1i=None,
+                            l1d=None,
+                            options=options,
+                            extra_args=[f"--set={k}={v}" for k, v in params.items() if k != "input"],
+                            scratch=scratch,
+                        ),
+                    ))
+
+    print(f"{len(tasks)} simulacoes ({len(args.bpred)} preditores x {len(btbs)} BTB, --jobs {args.jobs})")
+    failed = run_parallel(tasks, args.jobs)
+    if failed:
+        raise SystemExit(f"{failed} simulacoes falharam")
+
+
+def collect_bp(out_root: Path, cpu: str) -> List[Dict[str, object]]:
+    """Rows of the l1_sweep table for the predictor runs, plus predictor name and input."""
+    rows: List[Dict[str, object]] = []
+    for bench_dir in sorted((out_root / cpu).glob("*")):
+        if not bench_dir.is_dir():
+            continue
+        for run_dir in sorted(bench_dir.glob("*")):
+            params = read_run_params(run_dir)
+            if "bpred" not in params or not (run_dir / "stats.txt").exists():
+                continue
+            row: Dict[str, object] = dict(compute_metrics(parse_stats(run_dir / "stats.txt")))
+            row.update(read_config_params(run_dir))
+            row["mem_type"] = run_mem_type(run_dir, params)
+            row["bench"] = bench_dir.name
+            row["l1_size"] = params.get("l1d_size", "")
+            row["bpred_name"] = params["bpred"]
+            row["input"] = params.get("input", "")
+            row["run"] = run_dir.name
+            rows.append(row)
+    return rows
+
+
+def _label(row: Dict[str, object]) -> str:
+    """x label of a (bench, input) group."""
+    return f"{row['bench']} {row['input']}".strip()
+
+
+def plot_bp(rows: List[Dict[str, object]], cpu: str, out_dir: Path) -> None:
+    """One grouped bar chart per metric: (bench, input) groups, one bar per predictor / BTB size."""
+    import matplotlib.pyplot as plt
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    groups = sorted({_label(r) for r in rows})
+    series = sorted(
+        {(str(r["bpred_name"]), r["btb_entries"]) for r in rows},
+        key=lambda s: (DEFAULT_PREDICTORS.index(s[0]) if s[0] in DEFAULT_PREDICTORS else 99, s[0], s[1] or 0),
+    )
+    many_btb = len({s[1] for s in series}) > 1
+    width = 0.8 / max(1, len(series))
+
+    for key, title in (
+        ("branch_mispred_rate", "Branch misprediction rate"),
+        ("btb_hit_rate", "BTB hit rate"),
+        ("cpi", "CPI"),
+    ):
+        fig, ax = plt.subplots(figsize=(max(8, 1.5 * len(groups) * max(1, len(series)) / 3), 6))
+        has_any = False
+        for i, (bpred, btb) in enumerate(series):
+            ys = []
+            for group in groups:
+                val = next(
+                    (r[key] for r in rows
+                     if _label(r) == group and r["bpred_name"] == bpred and r["btb_entries"] == btb),
+                    None,
+                )
+                ys.append(float(val) if val is not None else 0.0)  # type: ignore[arg-type]
+                has_any = has_any or val is not None
+            label = f"{bpred} (BTB {int(btb)})" if many_btb and btb else bpred  # type: ignore[arg-type]
+            xs = [g + (i - (len(series) - 1) / 2) * width for g in range(len(groups))]
+            ax.bar(xs, ys, width=width, label=label)
+        if not has_any:
+            plt.close(fig)
+            continue
+        ax.set_xticks(range(len(groups)))
+        ax.set_xticklabels(groups, rotation=20, ha="right")
+        ax.set_ylabel(title)
+        ax.set_title(f"{title} per predictor - Cortex {cpu}")
+        ax.grid(True, axis="y", alpha=0.3)
+        ax.legend(fontsize="small", ncol=2)
+        fig.tight_layout()
+        fig.savefig(out_dir / f"bpred_{key}.png", dpi=160)
+        plt.close(fig)
+
+
+# Etapas medidas com --profile
+PROFILE_STAGES = [
+    "run_bp_sweep", "collect_bp", "parse_stats", "compute_metrics", "write_csv",
+    "plot_bp",
+]
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Branch predictor sweep for gem5 A7/A15 configs")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="simula preditores x BTB x benchmarks x entradas em paralelo")
+    run.add_argument("--cpu", required=True, choices=["A7", "A15"])
+    run.add_argument("--gem5", required=True, help="caminho do gem5.opt (com pred_gem5/ para nottaken/taken)")
+    run.add_argument("--cfg", required=True, help="script se_A7.py ou se_A15.py")
+    run.add_argument("--out-root", default=str(ROOT / "results_bpred"))
+    run.add_argument("--bench", action="append", default=[], help="nome:caminho ou caminho do binario")
+    run.add_argument("--input", action="append", default=[],
+                     help="entrada extra bench:rotulo::args (ex: sha:large::input_large.asc)")
+    run.add_argument("--bpred", nargs="+", default=DEFAULT_PREDICTORS,
+                     help="preditores (nottaken taken bimod 2lev tournament tage)")
+    run.add_argument("--btb-entries", nargs="+", type=int, help="tamanhos de BTB (default: perfil)")
+    run.add_argument("--set", action="append", default=[], help="campo=valor fixo (ex: rob_entries=32)")
+    run.add_argument("--jobs", type=int, default=4, help="simulacoes gem5 em paralelo")
+    run.add_argument("--force", action="store_true", help="refaz runs que ja tem stats.txt")
+    lean_m5out.add_arguments(run)
+
+    collect = sub.add_parser("collect", help="gera a tabela CSV e os graficos")
+    collect.add_argument("--cpu", required=True, choices=["A7", "A15"])
+    collect.add_argument("--out-root", default=str(ROOT / "results_bpred"))
+    collect.add_argument("--csv", default=None, help="default: <out-root>/bpred_<cpu>.csv")
+    collect.add_argument("--no-plot", action="store_true")
+
+    for sp in sub.choices.values():
+        profiling.add_arguments(sp)
+    return p
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    profiling.start(args, f"bp_sweep {args.cmd}", globals(), PROFILE_STAGES)
+
+    if args.cmd == "run":
+        run_bp_sweep(args)
+        return
+
+    out_root = Path(args.out_root).expanduser().resolve()
+    rows = collect_bp(out_root, args.cpu)
+    if not rows:
+        raise SystemExit("Nenhum resultado de preditor encontrado")
+    csv_path = Path(args.csv) if args.csv else out_root / f"bpred_{args.cpu}.csv"
+    write_csv(rows, csv_path, extra_fields=BP_FIELDS)  # type: ignore[arg-type]
+    print(f"Wrote {csv_path}")
+    for r in sorted(rows, key=lambda r: (_label(r), str(r["bpred_name"]), r["btb_entries"] or 0)):  # type: ignore[return-value]
+        mispred, btb, cpi = r["branch_mispred_rate"], r["btb_hit_rate"], r["cpi"]
+        entries = r["btb_entries"]
+        print(
+            f"  {_label(r):<24} {str(r['bpred_name']):<12} "
+            f"BTB {'' if entries is None else int(float(entries)):<6} "  # type: ignore[arg-type]
+            f"mispred {'' if mispred is None else f'{float(mispred):.4f}':<8} "  # type: ignore[arg-type]
+            f"BTB hit {'' if btb is None else f'{float(btb):.4f}':<8} "  # type: ignore[arg-type]
+            f"CPI {'' if cpi is None else f'{float(cpi):.3f}'}"  # type: ignore[arg-type]
+        )
+    if not args.no_plot:
+        out_dir = out_root / f"figures_{args.cpu}"
+        plot_bp(rows, args.cpu, out_dir)
+        print(f"Plots saved to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
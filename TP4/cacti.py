@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parse CACTI 6.5 outputs (result_L1_*.txt) and look up cache characteristics
+by geometry (size, block size, associativity).
+
+Missing geometries can be computed by running the cacti binary on configs
+generated from a template; runs go through a process pool and their parsed
+results are cached in cacti65/generated/ under the hash of the config.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import profiling
+
+
+ROOT = Path(__file__).resolve().parent
+CACTI_DIR = ROOT / "Projet" / "cacti65"
+CACTI_BIN = CACTI_DIR / "cacti"
+CACTI_TEMPLATE = CACTI_DIR / "cache_L1_A15.cfg"
+GENERATED_DIR = CACTI_DIR / "generated"
+DEFAULT_TECH_NM = 32
+
+# Block size of the L1 caches in se_A7.py / se_A15.py
+CPU_BLOCK_SIZE = {
+    "A7": 32,
+    "A15": 64,
+}
+L1_ASSOC = 2
+
+Geometry = Tuple[int, int, int]
+
+_FIELDS = {
+    "size_bytes": re.compile(r"Total cache size \(bytes\):\s*(\d+)"),
+    "assoc": re.compile(r"Associativity:\s*(\d+)"),
+    "block_bytes": re.compile(r"Block size \(bytes\):\s*(\d+)"),
+    "tech_nm": re.compile(r"Technology size \(nm\):\s*(\d+)"),
+    "access_time_ns": re.compile(r"Access time \(ns\):\s*([-+\d.eE]+)"),
+    "read_energy_nj": re.compile(r"Read Energy \(nJ\):\s*([-+\d.eE]+)"),
+    "write_energy_nj": re.compile(r"Write Energy \(nJ\):\s*([-+\d.eE]+)"),
+    "leakage_mw": re.compile(r"Leakage Power Closed Page \(mW\):\s*([-+\d.eE]+)"),
+}
+_AREA_RE = re.compile(r"Cache height x width \(mm\):\s*([-+\d.eE]+)\s*x\s*([-+\d.eE]+)")
+
+
+def parse_cacti_output(path: Path) -> Dict[str, float]:
+    """Parse the 'Cache Parameters' section of a CACTI output file."""
+    text = path.read_text(encoding="utf-8", errors="ignore")
+    result: Dict[str, float] = {}
+    for key, pattern in _FIELDS.items():
+        m = pattern.search(text)
+        if m:
+            result[key] = float(m.group(1))
+    m = _AREA_RE.search(text)
+    if m:
+        height, width = float(m.group(1)), float(m.group(2))
+        result["height_mm"] = height
+        result["width_mm"] = width
+        result["area_mm2"] = height * width
+    return result
+
+
+def load_cacti_results(
+    cacti_dir: Path = CACTI_DIR,
+    tech_nm: int = DEFAULT_TECH_NM,
+) -> Dict[Geometry, Dict[str, float]]:
+    """Index every result_*.txt in cacti_dir, and the cached generated results, by (size, block, assoc)."""
+    results: Dict[Geometry, Dict[str, float]] = {}
+    for path in sorted((cacti_dir / "generated").glob("*.json")):
+        parsed = json.loads(path.read_text(encoding="utf-8"))
+        if "error" not in parsed and int(parsed.get("tech_nm", tech_nm)) == tech_nm:
+            results[(int(parsed["size_bytes"]), int(parsed["block_bytes"]), int(parsed["assoc"]))] = parsed
+    # Hand-made results take precedence over generated ones
+    for path in sorted(cacti_dir.glob("result_*.txt")):
+        parsed = parse_cacti_output(path)
+        if not {"size_bytes", "block_bytes", "assoc"} <= parsed.keys():
+            continue
+        parsed["source"] = path.name  # type: ignore[assignment]
+        key = (int(parsed["size_bytes"]), int(parsed["block_bytes"]), int(parsed["assoc"]))
+        results[key] = parsed
+    return results
+
+
+_CFG_LINES = {
+    "size": re.compile(r"^-size \(bytes\).*$", re.M),
+    "block": re.compile(r"^-block size \(bytes\).*$", re.M),
+    "assoc": re.compile(r"^-associativity.*$", re.M),
+    "tech": re.compile(r"^-technology \(u\).*$", re.M),
+    "cache_type": re.compile(r"^-cache type.*$", re.M),
+}
+
+
+def make_config(
+    size_bytes: int,
+    block_bytes: int,
+    assoc: int,
+    tech_nm: int = DEFAULT_TECH_NM,
+    template: Path = CACTI_TEMPLATE,
+) -> str:
+    """CACTI config for one geometry: the template with its active size/block/assoc/tech lines replaced."""
+    text = template.read_text(encoding="utf-8", errors="ignore")
+    values = {
+        "size": f"-size (bytes) {size_bytes}",
+        "block": f"-block size (bytes) {block_bytes}",
+        "assoc": f"-associativity {assoc}",
+        "tech": f"-technology (u) {tech_nm / 1000:g}",
+        "cache_type": '-cache type "cache"',
+    }
+    for key, pattern in _CFG_LINES.items():
+        # Patterns only match active lines: the first gets the value, later ones are dropped
+        m = pattern.search(text)
+        if m is None:
+            text += values[key] + "\n"
+        else:
+            text = text[: m.start()] + values[key] + pattern.sub("", text[m.end():])
+    return text
+
+
+def config_hash(config: str, cacti_bin: Path = CACTI_BIN) -> str:
+    return hashlib.sha1((cacti_bin.name + "\n" + config).encode("utf-8")).hexdigest()[:16]
+
+
+def run_cacti(config: str, cacti_bin: Path = CACTI_BIN) -> str:
+    """Run cacti on a config in a scratch directory and return its output."""
+    with tempfile.TemporaryDirectory(prefix="cacti_") as tmp:
+        cfg_path = Path(tmp) / "cache.cfg"
+        cfg_path.write_text(config, encoding="utf-8")
+        proc = subprocess.run(
+            [str(cacti_bin), "-infile", str(cfg_path)],
+            cwd=tmp,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            encoding="utf-8",
+            errors="ignore",
+        )
+    if "Cache Parameters" not in proc.stdout:
+        raise RuntimeError(f"cacti failed (exit {proc.returncode}): {proc.stdout.strip()[-500:]}")
+    return proc.stdout
+
+
+def _run_job(job: Tuple[str, str, str, str]) -> Tuple[str, Optional[Dict[str, float]], str]:
+    digest, config, cacti_bin, out_dir = job
+    try:
+        output = run_cacti(config, Path(cacti_bin))
+    except RuntimeError as e:
+        # Not cached: a failure may be transient and is retried on the next sweep
+        return digest, None, str(e).splitlines()[-1]
+    txt_path = Path(out_dir) / f"{digest}.txt"
+    txt_path.write_text(output, encoding="utf-8")
+    parsed = parse_cacti_output(txt_path)
+    parsed["source"] = f"generated/{txt_path.name}"  # type: ignore[assignment]
+    parsed["config_hash"] = digest  # type: ignore[assignment]
+    (Path(out_dir) / f"{digest}.json").write_text(json.dumps(parsed, indent=2, sort_keys=True), encoding="utf-8")
+    return digest, parsed, ""
+
+
+def ensure_results(
+    geometries: Iterable[Geometry],
+    tech_nm: int = DEFAULT_TECH_NM,
+    cacti_bin: Path = CACTI_BIN,
+    out_dir: Path = GENERATED_DIR,
+    template: Path = CACTI_TEMPLATE,
+    jobs: Optional[int] = None,
+) -> Dict[Geometry, Dict[str, float]]:
+    """CACTI results for every geometry, running cacti in parallel only for configs not cached yet.
+    Geometries CACTI cannot organize are reported and left out."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    results: Dict[Geometry, Dict[str, float]] = {}
+    missing: Dict[str, Tuple[Geometry, str]] = {}
+    for geometry in sorted(set(geometries)):
+        config = make_config(*geometry, tech_nm=tech_nm, template=template)
+        digest = config_hash(config, cacti_bin)
+        cached = out_dir / f"{digest}.json"
+        parsed = json.loads(cached.read_text(encoding="utf-8")) if cached.exists() else {}
+        # failures cached by older versions are retried too
+        if parsed and "error" not in parsed:
+            results[geometry] = parsed
+        else:
+            missing[digest] = (geometry, config)
+
+    if missing:
+        print(f"cacti: {len(missing)} geometria(s) a calcular, {len(results)} em cache")
+        work = [(digest, config, str(cacti_bin), str(out_dir)) for digest, (_, config) in missing.items()]
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for digest, parsed, error in pool.map(_run_job, work):
+                geometry = missing[digest][0]
+                if parsed is None:
+                    print(f"cacti: {geometry} ignorada ({error})")
+                    continue
+                results[geometry] = parsed
+    return results
+
+
+def size_to_bytes(size: str) -> int:
+    """Convert a gem5 size string (ex: 4kB, 1MB) to bytes."""
+    m = re.fullmatch(r"\s*(\d+)\s*([kKmMgG]?)i?[bB]?\s*", size)
+    if not m:
+        raise ValueError(f"invalid size: {size!r}")
+    scale = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}[m.group(2).lower()]
+    return int(m.group(1)) * scale
+
+
+def format_size(num_bytes: float) -> str:
+    """Inverse of size_to_bytes (ex: 4096 -> 4kB)."""
+    value = int(num_bytes)
+    for unit, scale in (("GB", 1024 ** 3), ("MB", 1024 ** 2), ("kB", 1024)):
+        if value >= scale and value % scale == 0:
+            return f"{value // scale}{unit}"
+    return f"{value}B"
+
+
+def l1_geometry(cpu: str, l1_size: str) -> Geometry:
+    """CACTI geometry of one L1 cache for a CPU profile and L1 size."""
+    return (size_to_bytes(l1_size), CPU_BLOCK_SIZE[cpu], L1_ASSOC)
+
+
+def l1_area_mm2(
+    results: Dict[Geometry, Dict[str, float]],
+    cpu: str,
+    l1_size: str,
+) -> Optional[float]:
+    """Total L1 area (I + D) in mm2, or None if CACTI has no matching result."""
+    entry = results.get(l1_geometry(cpu, l1_size))
+    if entry is None or "area_mm2" not in entry:
+        return None
+    return 2.0 * entry["area_mm2"]
+
+
+# Etapas medidas com --profile
+PROFILE_STAGES = [
+    "ensure_results", "run_cacti", "load_cacti_results", "parse_cacti_output",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run CACTI for cache geometries (memoized, parallel)")
+    parser.add_argument("--size", nargs="+", required=True, help="tamanhos (ex: 1kB 2kB 512kB)")
+    parser.add_argument("--block", type=int, nargs="+", default=[32, 64], help="tamanho de bloco (bytes)")
+    parser.add_argument("--assoc", type=int, nargs="+", default=[L1_ASSOC])
+    parser.add_argument("--tech", type=int, default=DEFAULT_TECH_NM, help="tecnologia (nm)")
+    parser.add_argument("--cacti-bin", default=str(CACTI_BIN))
+    parser.add_argument("--template", default=str(CACTI_TEMPLATE), help="config CACTI de base")
+    parser.add_argument("--out-dir", default=str(GENERATED_DIR), help="cache dos resultados")
+    parser.add_argument("--jobs", type=int, default=None, help="processos cacti em paralelo")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start(args, "cacti", globals(), PROFILE_STAGES)
+
+    geometries: List[Geometry] = [
+        (size_to_bytes(size), block, assoc)
+        for size in args.size
+        for block in args.block
+        for assoc in args.assoc
+    ]
+    try:
+        results = ensure_results(
+            geometries,
+            tech_nm=args.tech,
+            cacti_bin=Path(args.cacti_bin).expanduser().resolve(),
+            out_dir=Path(args.out_dir).expanduser().resolve(),
+            template=Path(args.template).expanduser().resolve(),
+            jobs=args.jobs,
+        )
+    except (OSError, RuntimeError) as e:
+        raise SystemExit(str(e))
+
+    print(f"{'size':>8} {'block':>5} {'assoc':>5} {'access ns':>10} {'read nJ':>10} {'write nJ':>10} {'leak mW':>10} {'area mm2':>10}")
+    for (size, block, assoc), r in sorted(results.items()):
+        print(
+            f"{format_size(size):>8} {block:>5} {assoc:>5} {r.get('access_time_ns', 0):>10.4g} "
+            f"{r.get('read_energy_nj', 0):>10.4g} {r.get('write_energy_nj', 0):>10.4g} "
+            f"{r.get('leakage_mw', 0):>10.4g} {r.get('area_mm2', 0):>10.4g}"
+        )
+
+
+if __name__ == "__main__":
+    main()
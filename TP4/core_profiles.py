@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Core profiles (Cortex A7 / A15) as data, shared by the gem5 configs (se_core.py)
+and the sweep tools. No m5 import here, so the sweep scripts can load it too.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple, Union
+
+Value = Union[int, float, str]
+Profile = Dict[str, Value]
+
+
+PROFILES: Dict[str, Profile] = {
+    "A7": {
+        # Cortex A7: blocs 32B
+        "cache_line_size": 32,
+        # O3 default fetch buffer = 64B dans certaines versions gem5: avec des
+        # lignes 32B, ca declenche le fatal "fetch buffer 64 > block 32".
+        "fetch_buffer_size": 32,
+        "fetch_queue_size": 8,
+        # Decode / Issue / Commit : 2 / 4 / 2
+        "fetch_width": 2,
+        "decode_width": 2,
+        "rename_width": 4,
+        "dispatch_width": 4,
+        "issue_width": 4,
+        "wb_width": 2,
+        "commit_width": 2,
+        # RUU/LSQ : 2 / 8  (interpretation gem5: ROB=2, LQ=8, SQ=8)
+        "rob_entries": 2,
+        "lq_entries": 8,
+        "sq_entries": 8,
+        # Branch predictor : bimodal, BTB=256
+        "bpred": "bimode",
+        "btb_entries": 256,
+        # I-L1 / D-L1: 32KB / 32 / 2, L2: 512KB / 32 / 8
+        "l1i_size": "32kB",
+        "l1i_assoc": 2,
+        "l1d_size": "32kB",
+        "l1d_assoc": 2,
+        "l2_size": "512kB",
+        "l2_assoc": 8,
+        # Prefetchers (none, stride, tagged, bop, ampm, dcpt, spp) ; 0 = defaut gem5
+        "l1d_prefetcher": "none",
+        "l1d_prefetch_degree": 0,
+        "l1d_prefetch_distance": 0,
+        "l2_prefetcher": "none",
+        "l2_prefetch_degree": 0,
+        "l2_prefetch_distance": 0,
+        "clock": "2GHz",
+        "voltage": 1.1,
+        # L2 / bus : hors du domaine DVFS du core
+        "uncore_clock": "2GHz",
+        "mem_type": "DDR3_1600_8x8",
+    },
+    "A15": {
+        # Cortex A15: blocs 64B
+        "cache_line_size": 64,
+        "fetch_buffer_size": 64,
+        "fetch_queue_size": 15,
+        # Decode / Issue / Commit : 4 / 8 / 4
+        "fetch_width": 4,
+        "decode_width": 4,
+        "rename_width": 8,
+        "dispatch_width": 8,
+        "issue_width": 8,
+        "wb_width": 4,
+        "commit_width": 4,
+        # RUU/LSQ : 16 / 16  (gem5: ROB=16, LQ=16, SQ=16)
+        "rob_entries": 16,
+        "lq_entries": 16,
+        "sq_entries": 16,
+        # Branch predictor : "2 level" (LocalBP), BTB=256
+        "bpred": "local",
+        "btb_entries": 256,
+        # I-L1 / D-L1: 32KB / 64 / 2, L2: 512KB / 64 / 16
+        "l1i_size": "32kB",
+        "l1i_assoc": 2,
+        "l1d_size": "32kB",
+        "l1d_assoc": 2,
+        "l2_size": "512kB",
+        "l2_assoc": 16,
+        # Prefetchers (none, stride, tagged, bop, ampm, dcpt, spp) ; 0 = defaut gem5
+        "l1d_prefetcher": "none",
+        "l1d_prefetch_degree": 0,
+        "l1d_prefetch_distance": 0,
+        "l2_prefetcher": "none",
+        "l2_prefetch_degree": 0,
+        "l2_prefetch_distance": 0,
+        "clock": "2GHz",
+        "voltage": 1.2,
+        "uncore_clock": "2GHz",
+        "mem_type": "DDR3_1600_8x8",
+    },
+}
+
+
+# DVFS operating points (clock, voltage in V), highest = profile clock/voltage.
+# Typical big.LITTLE tables, scaled so that fmax matches the 2GHz of the TPs.
+OPERATING_POINTS: Dict[str, List[Tuple[str, float]]] = {
+    "A7": [
+        ("500MHz", 0.80),
+        ("1GHz", 0.90),
+        ("1500MHz", 1.00),
+        ("2GHz", 1.10),
+    ],
+    "A15": [
+        ("500MHz", 0.85),
+        ("1GHz", 0.95),
+        ("1500MHz", 1.05),
+        ("2GHz", 1.20),
+    ],
+}
+
+
+def get_profile(name: str) -> Profile:
+    """Copy of a profile, so callers can override fields freely."""
+    try:
+        return dict(PROFILES[name])
+    except KeyError:
+        raise ValueError(f"unknown profile {name!r} (choices: {', '.join(PROFILES)})") from None
+
+
+def _coerce(field: str, default: Value, raw: str) -> Value:
+    if isinstance(default, bool):
+        return raw.lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        try:
+            return int(raw)
+        except ValueError:
+            raise ValueError(f"{field} expects an integer, got {raw!r}") from None
+    if isinstance(default, float):
+        return float(raw)
+    return raw
+
+
+def apply_overrides(profile: Profile, overrides: Sequence[str]) -> Profile:
+    """Apply 'field=value' overrides, converting to the type of the profile field."""
+    result = dict(profile)
+    for item in overrides:
+        if "=" not in item:
+            raise ValueError(f"invalid override {item!r} (use field=value)")
+        field, raw = item.split("=", 1)
+        field = field.strip().replace("-", "_")
+        if field not in result:
+            raise ValueError(f"unknown profile field {field!r} (fields: {', '.join(sorted(result))})")
+        result[field] = _coerce(field, result[field], raw.strip())
+    return result
+
+
+def profile_fields(name: str = "A7") -> List[str]:
+    return sorted(PROFILES[name])
+
+
+def operating_points(name: str) -> List[Tuple[str, float]]:
+    try:
+        return list(OPERATING_POINTS[name])
+    except KeyError:
+        raise ValueError(f"no operating points for {name!r}") from None
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Design-space sampling (Latin hypercube, Sobol) and full grids over core
+profile fields.
+
+A dimension is written 'field=spec' where spec is either a list of values
+(l1d_size=1kB,2kB,4kB / bpred=bimode,local) or a range lo:hi, optionally
+log-scaled (rob_entries=2:64:log). Sizes in ranges are rounded to powers of two.
+Grids can be filtered with Python-like conditions over the dimensions
+('l1i_size <= l1d_size and l2_size >= 8 * l1d_size', sizes in bytes).
+"""
+
+from __future__ import annotations
+
+import ast
+import itertools
+import math
+import random
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from cacti import format_size, size_to_bytes
+
+
+Dimension = Tuple[str, Union[List[str], Tuple[float, float, bool, str]]]
+
+# Joe & Kuo (2008) direction numbers, dimensions 2..21: (degree s, a, m_1..m_s)
+_SOBOL_TABLE = [
+    (1, 0, [1]),
+    (2, 1, [1, 3]),
+    (3, 1, [1, 3, 1]),
+    (3, 2, [1, 1, 1]),
+    (4, 1, [1, 1, 3, 3]),
+    (4, 4, [1, 3, 5, 13]),
+    (5, 2, [1, 1, 5, 5, 17]),
+    (5, 4, [1, 1, 5, 5, 5]),
+    (5, 7, [1, 1, 7, 11, 19]),
+    (5, 11, [1, 1, 5, 1, 1]),
+    (5, 13, [1, 1, 1, 3, 11]),
+    (5, 14, [1, 3, 5, 5, 31]),
+    (6, 1, [1, 3, 3, 9, 7, 49]),
+    (6, 13, [1, 1, 1, 15, 21, 21]),
+    (6, 16, [1, 3, 1, 13, 27, 49]),
+    (6, 19, [1, 1, 1, 15, 7, 5]),
+    (6, 22, [1, 3, 1, 15, 13, 25]),
+    (6, 25, [1, 1, 5, 5, 19, 61]),
+    (7, 1, [1, 3, 7, 11, 23, 15, 103]),
+    (7, 4, [1, 3, 7, 13, 13, 15, 69]),
+]
+SOBOL_MAX_DIM = len(_SOBOL_TABLE) + 1
+_BITS = 32
+
+
+def _is_size(value: str) -> bool:
+    return any(ch.isalpha() for ch in value) and value[0].isdigit()
+
+
+def parse_dimension(spec: str) -> Dimension:
+    if "=" not in spec:
+        raise ValueError(f"invalid dimension {spec!r} (use field=v1,v2 or field=lo:hi[:log])")
+    name, body = spec.split("=", 1)
+    if ":" not in body:
+        return name, [v for v in body.split(",") if v]
+    parts = body.split(":")
+    if len(parts) not in (2, 3) or (len(parts) == 3 and parts[2] != "log"):
+        raise ValueError(f"invalid range {spec!r} (use lo:hi or lo:hi:log)")
+    lo_s, hi_s = parts[0], parts[1]
+    log = len(parts) == 3
+    if _is_size(lo_s):
+        return name, (float(size_to_bytes(lo_s)), float(size_to_bytes(hi_s)), log, "size")
+    kind = "int" if lo_s.lstrip("-").isdigit() and hi_s.lstrip("-").isdigit() else "float"
+    return name, (float(lo_s), float(hi_s), log, kind)
+
+
+def parse_fixed(specs: Sequence[str]) -> Dict[str, str]:
+    """Fixed 'field=value' settings (--set) as a dict."""
+    fixed = {}
+    for spec in specs:
+        name, sep, value = spec.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"invalid setting {spec!r} (use field=value)")
+        fixed[name.strip()] = value
+    return fixed
+
+
+def latin_hypercube(n: int, d: int, seed: Optional[int] = None) -> List[List[float]]:
+    """n points in [0, 1)^d, exactly one per stratum 1/n in each dimension."""
+    rng = random.Random(seed)
+    columns = []
+    for _ in range(d):
+        strata = list(range(n))
+        rng.shuffle(strata)
+        columns.append([(s + rng.random()) / n for s in strata])
+    return [[columns[j][i] for j in range(d)] for i in range(n)]
+
+
+def _direction_numbers(dim: int) -> List[int]:
+    if dim == 0:
+        return [1 << (_BITS - 1 - k) for k in range(_BITS)]
+    s, a, m = _SOBOL_TABLE[dim - 1]
+    v = [m[k] << (_BITS - 1 - k) for k in range(s)]
+    for k in range(s, _BITS):
+        value = v[k - s] ^ (v[k - s] >> s)
+        for i in range(1, s):
+            if (a >> (s - 1 - i)) & 1:
+                value ^= v[k - i]
+        v.append(value)
+    return v
+
+
+def sobol(n: int, d: int, skip: int = 0) -> List[List[float]]:
+    """First n points (after `skip`) of the Sobol sequence in [0, 1)^d (Gray-code order)."""
+    if d > SOBOL_MAX_DIM:
+        raise ValueError(f"sobol supports up to {SOBOL_MAX_DIM} dimensions, use lhs")
+    directions = [_direction_numbers(j) for j in range(d)]
+    x = [0] * d
+    points: List[List[float]] = []
+    scale = float(1 << _BITS)
+    for i in range(n + skip):
+        if i >= skip:
+            points.append([xj / scale for xj in x])
+        c = (~i & (i + 1)).bit_length() - 1  # lowest zero bit of i
+        for j in range(d):
+            x[j] ^= directions[j][c]
+    return points
+
+
+def map_unit(dim: Dimension, u: float) -> str:
+    """Value of a dimension at unit coordinate u in [0, 1)."""
+    _, spec = dim
+    if isinstance(spec, list):
+        return spec[min(int(u * len(spec)), len(spec) - 1)]
+    lo, hi, log, kind = spec
+    if log:
+        value = math.exp(math.log(lo) + u * (math.log(hi) - math.log(lo)))
+    else:
+        value = lo + u * (hi - lo)
+    if kind == "size":
+        exp_lo, exp_hi = int(round(math.log2(lo))), int(round(math.log2(hi)))
+        exponent = min(max(int(round(math.log2(value))), exp_lo), exp_hi)
+        return format_size(2 ** exponent)
+    if kind == "int":
+        return str(min(max(int(round(value)), int(lo)), int(hi)))
+    return f"{value:.6g}"
+
+
+def sample_points(
+    dims: Sequence[Dimension],
+    n: int,
+    design: str = "lhs",
+    seed: Optional[int] = None,
+) -> List[Dict[str, str]]:
+    if design == "lhs":
+        unit = latin_hypercube(n, len(dims), seed)
+    elif design == "sobol":
+        unit = sobol(n, len(dims))
+    else:
+        raise ValueError(f"unknown design {design!r}")
+    points: List[Dict[str, str]] = []
+    seen = set()
+    for row in unit:
+        point = {dims[j][0]: map_unit(dims[j], u) for j, u in enumerate(row)}
+        key = tuple(sorted(point.items()))
+        if key in seen:
+            continue
+        seen.add(key)
+        points.append(point)
+    return points
+
+
+def expand_dimension(dim: Dimension) -> List[str]:
+    """Every value of a dimension, for a full grid.
+
+    Size ranges and log ranges of integers give the powers of two in [lo, hi],
+    linear integer ranges every integer. Float ranges have no natural grid.
+    """
+    name, spec = dim
+    if isinstance(spec, list):
+        return list(spec)
+    lo, hi, log, kind = spec
+    if kind == "float":
+        raise ValueError(f"{name}: float range has no grid, list the values (v1,v2,...)")
+    if kind == "size" or log:
+        exp_lo, exp_hi = math.ceil(math.log2(max(lo, 1))), math.floor(math.log2(hi))
+        values = [2 ** e for e in range(exp_lo, exp_hi + 1)]
+        return [format_size(v) if kind == "size" else str(v) for v in values]
+    return [str(v) for v in range(int(lo), int(hi) + 1)]
+
+
+_SIZE_LITERAL = re.compile(r"(?<![\w.])(\d+)\s*([kKmMgG])i?B\b")
+_FILTER_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+    ast.Name, ast.Load, ast.Constant, ast.Tuple, ast.List,
+)
+
+
+def grid_value(value: str) -> Union[int, float, str]:
+    """Value of a dimension as seen by filters: sizes in bytes, numbers, else the string."""
+    if _is_size(value):
+        try:
+            return size_to_bytes(value)
+        except ValueError:
+            return value
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            continue
+    return value
+
+
+def compile_filter(expr: str, names: Sequence[str]) -> Callable[[Dict[str, str]], bool]:
+    """Condition over the dimensions of a point (comparisons, arithmetic, and/or/not, in)."""
+    source = _SIZE_LITERAL.sub(lambda m: str(size_to_bytes(m.group(1) + m.group(2) + "B")), expr)
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"invalid filter {expr!r}: {e.msg}") from None
+    for node in ast.walk(tree):
+        if not isinstance(node, _FILTER_NODES):
+            raise ValueError(f"invalid filter {expr!r}: {type(node).__name__} not allowed")
+        if isinstance(node, ast.Name) and node.id not in names:
+            raise ValueError(f"filter {expr!r} uses {node.id!r}, not a dimension ({', '.join(names)})")
+    code = compile(tree, "<where>", "eval")
+
+    def check(point: Dict[str, str]) -> bool:
+        env = {k: grid_value(v) for k, v in point.items()}
+        return bool(eval(code, {"__builtins__": {}}, env))
+
+    return check
+
+
+def grid_points(dims: Sequence[Dimension], where: Sequence[str] = ()) -> List[Dict[str, str]]:
+    """Cartesian product of the dimensions, keeping the points that pass every filter."""
+    names = [name for name, _ in dims]
+    if len(set(names)) != len(names):
+        raise ValueError(f"duplicate dimension in {', '.join(names)}")
+    filters = [compile_filter(expr, names) for expr in where]
+    points: List[Dict[str, str]] = []
+    for values in itertools.product(*(expand_dimension(d) for d in dims)):
+        point = dict(zip(names, values))
+        if all(f(point) for f in filters):
+            points.append(point)
+    return points
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DVFS sweep: run each benchmark at every operating point (clock, voltage) of
+a core profile, scale the core power by V^2 f plus leakage, and report the
+most energy-efficient frequency per benchmark and how much frequency a run
+can give up for (almost) free. L2 and DRAM stay at uncore_clock, so
+memory-bound runs barely slow down when the core clock drops.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core_profiles import get_profile, operating_points
+from design_space import parse_fixed
+from energy_efficiency import dvfs_power_mw
+from l1_sweep import (
+    ROOT,
+    compute_metrics,
+    discover_binaries,
+    parse_bench_list,
+    parse_stats,
+    read_run_params,
+    run_gem5,
+    run_key,
+    run_parallel,
+    write_run_params,
+)
+from pareto import parse_clock
+import lean_m5out
+import profiling
+
+
+def parse_operating_point(spec: str) -> Tuple[str, float]:
+    """'1GHz@0.9' -> ('1GHz', 0.9)."""
+    clock, sep, volt = spec.partition("@")
+    if not sep:
+        raise SystemExit(f"Ponto de operacao invalido: {spec} (use clock@volts, ex: 1GHz@0.9)")
+    return clock, float(volt.rstrip("Vv"))
+
+
+def run_dvfs(args: argparse.Namespace) -> None:
+    gem5_bin = Path(args.gem5).expanduser().resolve()
+    cfg = Path(args.cfg).expanduser().resolve()
+    out_root = Path(args.out_root).expanduser().resolve()
+
+    points = [parse_operating_point(p) for p in args.point] if args.point else operating_points(args.cpu)
+    try:
+        fixed = parse_fixed(args.set)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    benches = parse_bench_list(args.bench) if args.bench else discover_binaries(ROOT)
+    if not benches:
+        raise SystemExit("Nenhum binário encontrado (.riscv). Use --bench.")
+
+    scratch = lean_m5out.scratch_dir(args)
+    tasks = []
+    for bench_name, bench_path, bench_opts in benches:
+        for clock, volt in points:
+            params = dict(fixed, clock=clock, voltage=f"{volt:g}")
+            outdir = out_root / args.cpu / bench_name / run_key(params)
+            if (outdir / "stats.txt").exists() and not args.force:
+                continue
+            write_run_params(outdir, params)
+            tasks.append((
+                f"{bench_name} {clock}@{volt:g}V",
+                lambda outdir=outdir, bench_path=bench_path, bench_opts=bench_opts, params=params: run_gem5(
+                    gem5_bin=gem5_bin,
+                    cfg=cfg,
+                    outdir=outdir,
+                    cmd=bench_path,
+                    l1i=None,
+                    l1d=None,
+                    options=bench_opts,
+                    extra_args=[f"--set={k}={v}" for k, v in params.items()],
+                    scratch=scratch,
+                ),
+            ))
+
+    print(f"{len(tasks)} simulacoes ({len(points)} pontos x {len(benches)} benchmarks, --jobs {args.jobs})")
+    failed = run_parallel(tasks, args.jobs)
+    if failed:
+        raise SystemExit(f"{failed} simulacoes falharam")
+
+
+def collect_dvfs(out_root: Path, cpu: str) -> List[Dict[str, object]]:
+    """One row per DVFS run, with power, energy, EDP and slowdown vs the top operating point."""
+    profile = get_profile(cpu)
+    fmax_hz = parse_clock(str(profile["clock"]))
+    vmax = float(profile["voltage"])
+
+    rows: List[Dict[str, object]] = []
+    for bench_dir in sorted((out_root / cpu).glob("*")):
+        if not bench_dir.is_dir():
+            continue
+        for run_dir in sorted(bench_dir.glob("*")):
+            params = read_run_params(run_dir)
+            if "clock" not in params or "voltage" not in params:
+                continue
+            metrics = compute_metrics(parse_stats(run_dir / "stats.txt"))
+            t = metrics["sim_seconds"]
+            if t is None:
+                continue
+            freq = parse_clock(params["clock"])
+            volt = float(params["voltage"])
+            power = dvfs_power_mw(cpu, freq, volt, fmax_hz, vmax)
+            others = ",".join(f"{k}={v}" for k, v in sorted(params.items()) if k not in ("clock", "voltage"))
+            rows.append({
+                "bench": bench_dir.name,
+                "config": others,
+                "clock": params["clock"],
+                "freq_mhz": freq / 1e6,
+                "voltage": volt,
+                "sim_seconds": t,
+                "ipc": metrics["ipc"],
+                "power_mw": power,
+                "energy_mj": power * t,
+                "edp_mj_s": power * t * t,
+            })
+
+    # Slowdown and frequency sensitivity vs the fastest point of each (bench, config)
+    groups: Dict[Tuple[str, str], List[Dict[str, object]]] = {}
+    for r in rows:
+        groups.setdefault((str(r["bench"]), str(r["config"])), []).append(r)
+    for group in groups.values():
+        ref = max(group, key=lambda r: float(r["freq_mhz"]))  # type: ignore[arg-type]
+        for r in group:
+            slowdown = float(r["sim_seconds"]) / float(ref["sim_seconds"])  # type: ignore[arg-type]
+            ideal = float(ref["freq_mhz"]) / float(r["freq_mhz"])  # type: ignore[arg-type]
+            r["slowdown"] = slowdown
+            # 1 = time scales with 1/f (compute bound), 0 = time independent of f (memory bound)
+            r["freq_sensitivity"] = (slowdown - 1.0) / (ideal - 1.0) if ideal > 1.0 else None
+            r["energy_vs_fmax"] = float(r["energy_mj"]) / float(ref["energy_mj"])  # type: ignore[arg-type]
+    return rows
+
+
+def summarize_dvfs(rows: List[Dict[str, object]], tolerance: float) -> List[Dict[str, object]]:
+    """Best energy / EDP frequency and the lowest 'free' frequency (slowdown <= 1 + tolerance)."""
+    groups: Dict[Tuple[str, str], List[Dict[str, object]]] = {}
+    for r in rows:
+        groups.setdefault((str(r["bench"]), str(r["config"])), []).append(r)
+
+    summary: List[Dict[str, object]] = []
+    for (bench, config), group in sorted(groups.items()):
+        group.sort(key=lambda r: float(r["freq_mhz"]))  # type: ignore[arg-type]
+        top = group[-1]
+        best_energy = min(group, key=lambda r: float(r["energy_mj"]))  # type: ignore[arg-type]
+        best_edp = min(group, key=lambda r: float(r["edp_mj_s"]))  # type: ignore[arg-type]
+        free: Optional[Dict[str, object]] = next(
+            (r for r in group if float(r["slowdown"]) <= 1.0 + tolerance),  # type: ignore[arg-type]
+            top,
+        )
+        sens = [float(r["freq_sensitivity"]) for r in group if r["freq_sensitivity"] is not None]  # type: ignore[arg-type]
+        summary.append({
+            "bench": bench,
+            "config": config,
+            "fmax_clock": top["clock"],
+            "best_energy_clock": best_energy["clock"],
+            "best_energy_saving_pct": (1.0 - float(best_energy["energy_vs_fmax"])) * 100.0,  # type: ignore[arg-type]
+            "best_energy_slowdown": best_energy["slowdown"],
+            "best_edp_clock": best_edp["clock"],
+            "free_clock": free["clock"],  # type: ignore[index]
+            "free_freq_drop_pct": (1.0 - float(free["freq_mhz"]) / float(top["freq_mhz"])) * 100.0,  # type: ignore[index,arg-type]
+            "free_energy_saving_pct": (1.0 - float(free["energy_vs_fmax"])) * 100.0,  # type: ignore[index,arg-type]
+            "mean_freq_sensitivity": sum(sens) / len(sens) if sens else None,
+        })
+    return summary
+
+
+def write_rows(rows: List[Dict[str, object]], csv_path: Path) -> None:
+    if not rows:
+        return
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    with csv_path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def plot_dvfs(rows: List[Dict[str, object]], cpu: str, out_dir: Path) -> None:
+    """Per benchmark: energy and slowdown vs core frequency; all benchmarks: frequency sensitivity."""
+    import matplotlib.pyplot as plt
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    benches = sorted({str(r["bench"]) for r in rows})
+
+    for bench in benches:
+        fig, ax_e = plt.subplots(figsize=(10, 6))
+        ax_t = ax_e.twinx()
+        for config in sorted({str(r["config"]) for r in rows if r["bench"] == bench}):
+            sel = sorted(
+                (r for r in rows if r["bench"] == bench and r["config"] == config),
+                key=lambda r: float(r["freq_mhz"]),  # type: ignore[arg-type]
+            )
+            xs = [float(r["freq_mhz"]) for r in sel]  # type: ignore[arg-type]
+            suffix = f" ({config})" if config else ""
+            ax_e.plot(xs, [float(r["energy_mj"]) for r in sel], marker="o", linewidth=2, label=f"Energy{suffix}")  # type: ignore[arg-type]
+            ax_t.plot(xs, [float(r["slowdown"]) for r in sel], marker="s", linestyle="--", label=f"Slowdown{suffix}")  # type: ignore[arg-type]
+        ax_e.set_title(f"DVFS - {bench.capitalize()} (Cortex {cpu})")
+        ax_e.set_xlabel("Core frequency (MHz)")
+        ax_e.set_ylabel("Core energy (mJ)")
+        ax_t.set_ylabel("Slowdown vs fmax")
+        ax_e.grid(True, alpha=0.3)
+        lines = ax_e.get_legend_handles_labels()
+        lines_t = ax_t.get_legend_handles_labels()
+        ax_e.legend(lines[0] + lines_t[0], lines[1] + lines_t[1])
+        fig.tight_layout()
+        fig.savefig(out_dir / f"{bench}_{cpu.lower()}_dvfs.png", dpi=160)
+        plt.close(fig)
+
+    plt.figure(figsize=(10, 6))
+    for bench in benches:
+        sel = sorted(
+            (r for r in rows if r["bench"] == bench and r["freq_sensitivity"] is not None),
+            key=lambda r: float(r["freq_mhz"]),  # type: ignore[arg-type]
+        )
+        if sel:
+            plt.plot(
+                [float(r["freq_mhz"]) for r in sel],  # type: ignore[arg-type]
+                [float(r["freq_sensitivity"]) for r in sel],  # type: ignore[arg-type]
+                marker="o",
+                linewidth=2,
+                label=bench.capitalize(),
+            )
+    plt.title(f"Frequency sensitivity (1 = compute bound, 0 = memory bound) - Cortex {cpu}")
+    plt.xlabel("Core frequency (MHz)")
+    plt.ylabel("(T(f)/T(fmax) - 1) / (fmax/f - 1)")
+    plt.grid(True, alpha=0.3)
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(out_dir / f"cortex_{cpu.lower()}_freq_sensitivity.png", dpi=160)
+    plt.close()
+
+
+# Etapas medidas com --profile
+PROFILE_STAGES = [
+    "run_dvfs", "collect_dvfs", "parse_stats", "compute_metrics", "summarize_dvfs",
+    "write_rows", "plot_dvfs",
+]
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="DVFS sweep with V^2 f scaled power for A7/A15")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="simula cada ponto de operacao")
+    run.add_argument("--cpu", required=True, choices=["A7", "A15"])
+    run.add_argument("--gem5", required=True, help="caminho do gem5.opt")
+    run.add_argument("--cfg", required=True, help="script se_A7.py ou se_A15.py")
+    run.add_argument("--out-root", default=str(ROOT / "results_dvfs"))
+    run.add_argument("--bench", action="append", default=[], help="nome:caminho ou caminho do binario")
+    run.add_argument("--point", nargs="+", help="pontos clock@volts (default: OPERATING_POINTS do perfil)")
+    run.add_argument("--set", action="append", default=[], help="campo=valor fixo (ex: l1d_size=4kB)")
+    run.add_argument("--jobs", type=int, default=4, help="simulacoes gem5 em paralelo")
+    run.add_argument("--force", action="store_true", help="refaz runs que ja tem stats.txt")
+    lean_m5out.add_arguments(run)
+
+    report = sub.add_parser("report", help="energia por frequencia, melhor frequencia por benchmark")
+    report.add_argument("--cpu", required=True, choices=["A7", "A15"])
+    report.add_argument("--out-root", default=str(ROOT / "results_dvfs"))
+    report.add_argument("--tolerance", type=float, default=0.05,
+                        help="slowdown aceito para a frequencia 'gratis' (default: 5%%)")
+    report.add_argument("--no-plot", action="store_true")
+
+    for sp in sub.choices.values():
+        profiling.add_arguments(sp)
+    return p
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    profiling.start(args, f"dvfs {args.cmd}", globals(), PROFILE_STAGES)
+
+    if args.cmd == "run":
+        run_dvfs(args)
+        return
+
+    out_root = Path(args.out_root).expanduser().resolve()
+    rows = collect_dvfs(out_root, args.cpu)
+    if not rows:
+        raise SystemExit("Nenhum resultado DVFS encontrado")
+    summary = summarize_dvfs(rows, args.tolerance)
+    write_rows(rows, out_root / f"dvfs_{args.cpu}.csv")
+    write_rows(summary, out_root / f"dvfs_summary_{args.cpu}.csv")
+    print(f"Wrote {out_root / f'dvfs_{args.cpu}.csv'} and dvfs_summary_{args.cpu}.csv")
+    for s in summary:
+        sens = s["mean_freq_sensitivity"]
+        print(
+            f"  {s['bench']}{' [' + str(s['config']) + ']' if s['config'] else ''}: "
+            f"best energy @ {s['best_energy_clock']} (-{float(s['best_energy_saving_pct']):.1f}%), "  # type: ignore[arg-type]
+            f"best EDP @ {s['best_edp_clock']}, "
+            f"free down to {s['free_clock']} (-{float(s['free_freq_drop_pct']):.0f}% f), "  # type: ignore[arg-type]
+            f"sensitivity {'' if sens is None else f'{float(sens):.2f}'}"  # type: ignore[arg-type]
+        )
+    if not args.no_plot:
+        out_dir = out_root / f"figures_{args.cpu}"
+        plot_dvfs(rows, args.cpu, out_dir)
+        print(f"Plots saved to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 """
 Compute energy efficiency (IPC/mW) from L1 sweep results and generate plots.
+With --model cacti, energy is computed per run from CACTI cache energies and
+the gem5 access/miss counts instead of a constant power per core.
 """
 
 from __future__ import annotations
@@ -12,6 +14,8 @@ import json
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+import profiling
+
 
 ROOT = Path(__file__).resolve().parent
 
@@ -22,6 +26,20 @@ POWER_CONSUMPTION = {
     "A15": 500.0,  # mW
 }
 
+# Share of POWER_CONSUMPTION that is leakage (at fmax / Vmax)
+LEAKAGE_FRACTION = {
+    "A7": 0.2,
+    "A15": 0.3,
+}
+
+
+def dvfs_power_mw(cpu: str, freq_hz, voltage, fmax_hz: float, vmax: float):
+    """Core power at an operating point: dynamic part scaled by V^2 f, leakage by V."""
+    p_max = POWER_CONSUMPTION[cpu]
+    leak = LEAKAGE_FRACTION[cpu]
+    v_ratio = voltage / vmax
+    return p_max * ((1.0 - leak) * v_ratio ** 2 * (freq_hz / fmax_hz) + leak * v_ratio)
+
 
 def load_csv(csv_path: Path) -> List[Dict[str, str]]:
     """Load results CSV file."""
@@ -79,6 +97,120 @@ def write_efficiency_csv(rows: List[Dict[str, str]], csv_path: Path) -> None:
         writer.writerows(rows)
 
 
+# Per-run energy model: core power (POWER_CONSUMPTION, without caches) plus
+# CACTI dynamic energy per access and leakage power for L1 I/D and L2.
+ENERGY_COMPONENTS = ["core", "l1i_dynamic", "l1d_dynamic", "l1_leakage", "l2_dynamic", "l2_leakage"]
+
+ENERGY_FIELDS = (
+    ["bench", "l1_size", "run", "ipc", "sim_seconds", "sim_insts"]
+    + [f"energy_{c}_mj" for c in ENERGY_COMPONENTS]
+    + ["energy_total_mj", "power_mw", "energy_per_inst_nj", "edp_mj_s", "efficiency", "l2_modeled"]
+)
+
+
+def _cache_geometry(
+    row: Dict[str, object],
+    size_key: str,
+    assoc_key: str,
+) -> Optional[Tuple[int, int, int]]:
+    try:
+        return (
+            int(float(row[size_key])),  # type: ignore[arg-type]
+            int(float(row["cache_line_size"])),  # type: ignore[arg-type]
+            int(float(row[assoc_key])),  # type: ignore[arg-type]
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def compute_energy_model(
+    runs: List[Dict[str, object]],
+    cpu: str,
+    cacti: Dict[Tuple[int, int, int], Dict[str, float]],
+) -> List[Dict[str, object]]:
+    """Total and per-component energy, EDP and IPC/mW of every run (NumPy over all runs)."""
+    import numpy as np
+
+    from cacti import l1_geometry
+
+    def column(key: str) -> "np.ndarray":
+        return np.array([np.nan if r.get(key) in (None, "", "None") else float(r[key]) for r in runs])  # type: ignore[arg-type]
+
+    def cacti_column(geometries: List[Optional[Tuple[int, int, int]]], key: str) -> "np.ndarray":
+        return np.array([cacti.get(g, {}).get(key, np.nan) if g else np.nan for g in geometries])
+
+    l1i_geo, l1d_geo, l2_geo = [], [], []
+    for r in runs:
+        fallback = l1_geometry(cpu, str(r.get("l1_size", ""))) if r.get("l1_size") else None
+        l1i_geo.append(_cache_geometry(r, "l1i_size", "l1i_assoc") or fallback)
+        l1d_geo.append(_cache_geometry(r, "l1d_size", "l1d_assoc") or fallback)
+        l2_geo.append(_cache_geometry(r, "l2_size", "l2_assoc"))
+
+    t = column("sim_seconds")
+    insts = column("sim_insts")
+    d_reads = np.where(np.isnan(column("d_reads")), column("d_accesses"), column("d_reads"))
+    d_writes = np.nan_to_num(column("d_writes"))
+
+    # mW * s = mJ, nJ * 1e-6 = mJ
+    energy = {
+        "core": POWER_CONSUMPTION[cpu] * t,
+        "l1i_dynamic": 1e-6 * (
+            column("i_accesses") * cacti_column(l1i_geo, "read_energy_nj")
+            + column("i_misses") * cacti_column(l1i_geo, "write_energy_nj")
+        ),
+        "l1d_dynamic": 1e-6 * (
+            d_reads * cacti_column(l1d_geo, "read_energy_nj")
+            + (d_writes + column("d_misses")) * cacti_column(l1d_geo, "write_energy_nj")
+        ),
+        "l1_leakage": (cacti_column(l1i_geo, "leakage_mw") + cacti_column(l1d_geo, "leakage_mw")) * t,
+    }
+    # L2 is optional: only counted when CACTI has its geometry
+    l2_read = cacti_column(l2_geo, "read_energy_nj")
+    l2_modeled = ~np.isnan(l2_read)
+    energy["l2_dynamic"] = np.where(
+        l2_modeled,
+        1e-6 * (column("l2_accesses") * l2_read + column("l2_misses") * cacti_column(l2_geo, "write_energy_nj")),
+        0.0,
+    )
+    energy["l2_leakage"] = np.where(l2_modeled, cacti_column(l2_geo, "leakage_mw") * t, 0.0)
+
+    total = sum(energy[c] for c in ENERGY_COMPONENTS)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        power_mw = total / t
+        energy_per_inst = total * 1e6 / insts
+        efficiency = column("ipc") / power_mw
+    edp = total * t
+
+    results: List[Dict[str, object]] = []
+    for i, r in enumerate(runs):
+        if not np.isfinite(total[i]):
+            print(f"{r.get('bench')} {r.get('run')}: no CACTI result for L1 {l1d_geo[i]} or no stats, skipped")
+            continue
+        row: Dict[str, object] = {k: r.get(k) for k in ("bench", "l1_size", "run", "ipc", "sim_seconds", "sim_insts")}
+        for c in ENERGY_COMPONENTS:
+            row[f"energy_{c}_mj"] = float(energy[c][i])
+        row["energy_total_mj"] = float(total[i])
+        row["power_mw"] = float(power_mw[i])
+        row["energy_per_inst_nj"] = float(energy_per_inst[i])
+        row["edp_mj_s"] = float(edp[i])
+        row["efficiency"] = float(efficiency[i])
+        row["l2_modeled"] = int(l2_modeled[i])
+        results.append(row)
+    return results
+
+
+def write_energy_csv(rows: List[Dict[str, object]], csv_path: Path) -> None:
+    """Write energy model results to CSV."""
+    if not rows:
+        return
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    with csv_path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=ENERGY_FIELDS)
+        writer.writeheader()
+        for r in rows:
+            writer.writerow({k: r.get(k) for k in ENERGY_FIELDS})
+
+
 def _size_key(size: str) -> Tuple[int, str]:
     """Sort key for L1 sizes."""
     digits = "".join(ch for ch in size if ch.isdigit())
@@ -87,10 +219,15 @@ def _size_key(size: str) -> Tuple[int, str]:
     return (num, unit)
 
 
-def plot_efficiency(efficiency_csv: Path, out_dir: Path) -> None:
-    """Generate efficiency plots from CSV."""
-    import matplotlib.pyplot as plt
-    
+def plot_efficiency(
+    efficiency_csv: Path,
+    out_dir: Path,
+    jobs: Optional[int] = None,
+    force: bool = False,
+) -> None:
+    """Generate efficiency plots from CSV (one process-pool job per figure, unchanged figures skipped)."""
+    from plot_pool import line_figure, render_figures
+
     if not efficiency_csv.exists():
         raise SystemExit(f"CSV not found: {efficiency_csv}")
     
@@ -115,82 +252,118 @@ def plot_efficiency(efficiency_csv: Path, out_dir: Path) -> None:
         else:
             row["cpu"] = "Unknown"
     
-    benches = sorted({r["bench"] for r in rows})
-    cpus = sorted({r["cpu"] for r in rows if r["cpu"] != "Unknown"})
-    
+    # Group once: (bench, cpu) -> rows sorted by L1 size
+    groups: Dict[Tuple[str, str], List[Dict[str, str]]] = {}
+    for row in sorted(rows, key=lambda r: _size_key(r["l1_size"])):
+        groups.setdefault((row["bench"], row["cpu"]), []).append(row)
+    benches = sorted({bench for bench, _ in groups})
+    cpus = sorted({cpu for _, cpu in groups if cpu != "Unknown"})
+
+    def series(label: str, group: List[Dict[str, str]]) -> Tuple[str, List[str], List[float]]:
+        return (label, [r["l1_size"] for r in group], [float(r["efficiency"]) for r in group])
+
+    common = {"xlabel": "L1 size", "ylabel": "Efficiency (IPC/mW)", "linewidth": 2, "legend": True}
+    figures = []
+
     # Plot 1: Combined (all applications and CPUs together)
-    plt.figure(figsize=(12, 6))
+    combined = []
     for bench in benches:
-        bench_rows = [r for r in rows if r["bench"] == bench]
-        bench_rows.sort(key=lambda r: (r["cpu"], _size_key(r["l1_size"])))
-        
+        bench_rows = [r for cpu in sorted(c for b, c in groups if b == bench) for r in groups[(bench, cpu)]]
+        combined.append(series(bench, bench_rows))
+    figures.append({
+        "out_path": out_dir / "combined_energy_efficiency.png",
+        "series": combined,
+        "title": "Energy Efficiency Comparison (IPC/mW) - All Applications",
+        "figsize": (12, 6),
+    })
+
+    # Plot 2-3: By application (Dijkstra and Blowfish), comparing A7 and A15
+    for bench in benches:
+        figures.append({
+            "out_path": out_dir / f"{bench}_energy_efficiency.png",
+            "series": [series(f"Cortex {cpu}", groups[(bench, cpu)]) for cpu in cpus if (bench, cpu) in groups],
+            "title": f"Energy Efficiency - {bench.capitalize()}",
+            "figsize": (10, 6),
+        })
+
+    # Plot 4-5: By CPU (A7 and A15), comparing applications
+    for cpu in cpus:
+        figures.append({
+            "out_path": out_dir / f"cortex_{cpu.lower()}_energy_efficiency.png",
+            "series": [series(bench.capitalize(), groups[(bench, cpu)]) for bench in benches if (bench, cpu) in groups],
+            "title": f"Energy Efficiency - Cortex {cpu}",
+            "figsize": (10, 6),
+        })
+
+    # One scope per input CSV: the A7 and A15 runs share the output directory
+    render_figures(
+        [(line_figure, dict(common, **fig)) for fig in figures],
+        jobs,
+        scope=f"energy_efficiency {efficiency_csv.name}",
+        force=force,
+        out_dir=out_dir,
+    )
+
+
+def plot_energy_model(energy_csv: Path, cpu: str, out_dir: Path) -> None:
+    """Energy breakdown, EDP and IPC/mW plots from the energy model CSV."""
+    import matplotlib.pyplot as plt
+
+    rows = load_csv(energy_csv)
+    if not rows:
+        raise SystemExit(f"CSV not found or empty: {energy_csv}")
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    benches = sorted({r["bench"] for r in rows})
+
+    # Per application: stacked energy components and EDP per L1 size
+    for bench in benches:
+        bench_rows = sorted((r for r in rows if r["bench"] == bench), key=lambda r: _size_key(r["l1_size"]))
         xs = [r["l1_size"] for r in bench_rows]
-        ys = [float(r["efficiency"]) for r in bench_rows]
-        
-        plt.plot(xs, ys, marker="o", label=bench, linewidth=2)
-    
-    plt.title("Energy Efficiency Comparison (IPC/mW) - All Applications")
+
+        fig, (ax_e, ax_edp) = plt.subplots(1, 2, figsize=(14, 6))
+        bottom = [0.0] * len(bench_rows)
+        for comp in ENERGY_COMPONENTS:
+            ys = [float(r[f"energy_{comp}_mj"]) for r in bench_rows]
+            if not any(ys):
+                continue
+            ax_e.bar(xs, ys, bottom=bottom, label=comp)
+            bottom = [b + y for b, y in zip(bottom, ys)]
+        ax_e.set_title(f"Energy breakdown - {bench.capitalize()} (Cortex {cpu})")
+        ax_e.set_xlabel("L1 size")
+        ax_e.set_ylabel("Energy (mJ)")
+        ax_e.grid(True, axis="y", alpha=0.3)
+        ax_e.legend()
+
+        ax_edp.plot(xs, [float(r["edp_mj_s"]) for r in bench_rows], marker="o", linewidth=2)
+        ax_edp.set_title(f"Energy-delay product - {bench.capitalize()} (Cortex {cpu})")
+        ax_edp.set_xlabel("L1 size")
+        ax_edp.set_ylabel("EDP (mJ.s)")
+        ax_edp.grid(True, alpha=0.3)
+
+        fig.tight_layout()
+        fig.savefig(out_dir / f"{bench}_{cpu.lower()}_energy_model.png", dpi=160)
+        plt.close(fig)
+
+    # Per CPU: IPC/mW with the modelled power, all applications
+    plt.figure(figsize=(10, 6))
+    for bench in benches:
+        bench_rows = sorted((r for r in rows if r["bench"] == bench), key=lambda r: _size_key(r["l1_size"]))
+        plt.plot(
+            [r["l1_size"] for r in bench_rows],
+            [float(r["efficiency"]) for r in bench_rows],
+            marker="o",
+            label=bench.capitalize(),
+            linewidth=2,
+        )
+    plt.title(f"Energy Efficiency (CACTI model) - Cortex {cpu}")
     plt.xlabel("L1 size")
     plt.ylabel("Efficiency (IPC/mW)")
     plt.grid(True, alpha=0.3)
     plt.legend()
     plt.tight_layout()
-    
-    out_path = out_dir / "combined_energy_efficiency.png"
-    plt.savefig(out_path, dpi=160)
+    plt.savefig(out_dir / f"cortex_{cpu.lower()}_energy_model_efficiency.png", dpi=160)
     plt.close()
-    
-    # Plot 2-3: By application (Dijkstra and Blowfish), comparing A7 and A15
-    for bench in benches:
-        plt.figure(figsize=(10, 6))
-        bench_rows = [r for r in rows if r["bench"] == bench]
-        
-        for cpu in cpus:
-            cpu_rows = [r for r in bench_rows if r["cpu"] == cpu]
-            cpu_rows.sort(key=lambda r: _size_key(r["l1_size"]))
-            
-            xs = [r["l1_size"] for r in cpu_rows]
-            ys = [float(r["efficiency"]) for r in cpu_rows]
-            
-            if xs and ys:
-                plt.plot(xs, ys, marker="o", label=f"Cortex {cpu}", linewidth=2)
-        
-        plt.title(f"Energy Efficiency - {bench.capitalize()}")
-        plt.xlabel("L1 size")
-        plt.ylabel("Efficiency (IPC/mW)")
-        plt.grid(True, alpha=0.3)
-        plt.legend()
-        plt.tight_layout()
-        
-        out_path = out_dir / f"{bench}_energy_efficiency.png"
-        plt.savefig(out_path, dpi=160)
-        plt.close()
-    
-    # Plot 4-5: By CPU (A7 and A15), comparing applications
-    for cpu in cpus:
-        plt.figure(figsize=(10, 6))
-        cpu_rows = [r for r in rows if r["cpu"] == cpu]
-        
-        for bench in benches:
-            bench_rows = [r for r in cpu_rows if r["bench"] == bench]
-            bench_rows.sort(key=lambda r: _size_key(r["l1_size"]))
-            
-            xs = [r["l1_size"] for r in bench_rows]
-            ys = [float(r["efficiency"]) for r in bench_rows]
-            
-            if xs and ys:
-                plt.plot(xs, ys, marker="o", label=bench.capitalize(), linewidth=2)
-        
-        plt.title(f"Energy Efficiency - Cortex {cpu}")
-        plt.xlabel("L1 size")
-        plt.ylabel("Efficiency (IPC/mW)")
-        plt.grid(True, alpha=0.3)
-        plt.legend()
-        plt.tight_layout()
-        
-        out_path = out_dir / f"cortex_{cpu.lower()}_energy_efficiency.png"
-        plt.savefig(out_path, dpi=160)
-        plt.close()
 
 
 def _extract_cpu(bench: str) -> Optional[str]:
@@ -204,13 +377,35 @@ def _extract_cpu(bench: str) -> Optional[str]:
 
 
 
-def main() -> None:
+# Stages timed by --profile
+PROFILE_STAGES = [
+    "load_csv", "compute_efficiency", "write_efficiency_csv", "compute_energy_model", "write_energy_csv",
+    "plot_efficiency", "plot_energy_model", "l1_sweep.collect_results", "l1_sweep.parse_stats", "l1_sweep.compute_metrics",
+    "cacti.ensure_results", "cacti.load_cacti_results", "plot_pool.render_figures",
+]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Compute and plot energy efficiency")
     
     parser.add_argument("--cpu", required=True, choices=["A7", "A15"],
                         help="CPU type")
-    parser.add_argument("--input-csv", required=True,
-                        help="Input CSV from l1_sweep results")
+    parser.add_argument("--model", choices=["constant", "cacti"], default="constant",
+                        help="constant: POWER_CONSUMPTION only; cacti: per-run core + cache energy")
+    parser.add_argument("--input-csv",
+                        help="Input CSV from l1_sweep results (constant model)")
+    parser.add_argument("--results-root", default=str(ROOT / "Projet" / "results_l1"),
+                        help="l1_sweep output root with the m5out directories (cacti model)")
+    parser.add_argument("--cacti-dir", default=None,
+                        help="Directory with CACTI result_*.txt files (cacti model)")
+    parser.add_argument("--run-cacti", action="store_true",
+                        help="Run CACTI for the cache geometries not computed yet (cacti model)")
+    parser.add_argument("--cacti-bin", default=None, help="cacti binary (default: cacti65/cacti)")
+    parser.add_argument("--jobs", type=int, default=None, help="Parallel CACTI processes")
+    parser.add_argument("--plot-jobs", type=int, default=None,
+                        help="Parallel figure processes (default: one per core)")
+    parser.add_argument("--force-plot", action="store_true",
+                        help="Redraw every figure, even when its data did not change")
     parser.add_argument("--output-csv", 
                         help="Output CSV for efficiency results (default: auto)")
     parser.add_argument("--output-dir",
@@ -218,8 +413,44 @@ def main() -> None:
     parser.add_argument("--plot-only", action="store_true",
                         help="Skip CSV generation and only plot from existing CSV")
     
-    args = parser.parse_args()
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.start(args, "energy_efficiency", globals(), PROFILE_STAGES)
     
+    if args.model == "cacti":
+        from cacti import CACTI_DIR, ensure_results, load_cacti_results
+        from l1_sweep import collect_results
+
+        results_root = Path(args.results_root).expanduser().resolve()
+        output_csv = Path(args.output_csv or results_root / f"energy_{args.cpu.lower()}.csv")
+        output_dir = Path(args.output_dir or results_root / "figures_energy_model")
+        if not args.plot_only:
+            cacti_dir = Path(args.cacti_dir) if args.cacti_dir else CACTI_DIR
+            runs = collect_results(results_root, args.cpu)
+            if args.run_cacti:
+                geometries = {
+                    g
+                    for r in runs
+                    for g in (
+                        _cache_geometry(r, "l1i_size", "l1i_assoc"),
+                        _cache_geometry(r, "l1d_size", "l1d_assoc"),
+                        _cache_geometry(r, "l2_size", "l2_assoc"),
+                    )
+                    if g is not None
+                }
+                cacti_kwargs = {"cacti_bin": Path(args.cacti_bin)} if args.cacti_bin else {}
+                ensure_results(geometries, out_dir=cacti_dir / "generated", jobs=args.jobs, **cacti_kwargs)
+            cacti = load_cacti_results(cacti_dir)
+            energy_rows = compute_energy_model(runs, args.cpu, cacti)
+            write_energy_csv(energy_rows, output_csv)
+            print(f"Wrote energy CSV to {output_csv} ({len(energy_rows)}/{len(runs)} runs)")
+        plot_energy_model(output_csv, args.cpu, output_dir)
+        print(f"Plots saved to {output_dir}")
+        return
+
+    if args.input_csv is None:
+        parser.error("--input-csv is required with --model constant")
+
     # Set defaults based on CPU
     if args.output_csv is None:
         args.output_csv = str(
@@ -238,7 +469,7 @@ def main() -> None:
         print(f"Wrote efficiency CSV to {args.output_csv}")
     
     # Plot
-    plot_efficiency(Path(args.output_csv), Path(args.output_dir))
+    plot_efficiency(Path(args.output_csv), Path(args.output_dir), jobs=args.plot_jobs, force=args.force_plot)
     print(f"Plots saved to {args.output_dir}")
 
 
@@ -1,5 +1,9 @@
 from pathlib import Path
+import argparse
 import re
+
+import profiling
+
 BASE_PATH = Path(__file__).parent
 
 paths = {
@@ -31,8 +35,24 @@ def parse(path: str):
     return num_inst, classes
 
 
-def main():
-    for app, path in paths.items():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the committed instruction mix of gem5 runs")
+    parser.add_argument("stats", nargs="*", metavar="APP=STATS",
+                        help="stats.txt to read, named by app (default: the Projet blowfish/dijkstra runs)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.start(args, "inst_mix", globals(), ["parse"])
+
+    runs = paths
+    if args.stats:
+        runs = {}
+        for spec in args.stats:
+            app, sep, path = spec.partition("=")
+            if not sep:
+                app, path = Path(spec).parent.name, spec
+            runs[app] = Path(path)
+
+    for app, path in runs.items():
         num_inst, classes = parse(path)
         print(app, "numInsts", num_inst)
         items = [(k, v) for k, v in classes.items() if v[0] != 0 and k != "total"]
@@ -8,14 +8,18 @@ Defaults to auto-discovering *.riscv binaries under TP4/Projet.
 from __future__ import annotations
 
 import argparse
+import configparser
 import csv
 import json
 import math
 import os
+import re
 import shlex
-import subprocess
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import lean_m5out
+import profiling
 
 
 ROOT = Path(__file__).resolve().parent
@@ -53,12 +57,52 @@ def get_first(stats: Dict[str, float], patterns: Iterable[str]) -> Optional[floa
     return None
 
 
+_CPU_STAT = re.compile(r"^system\.cpu(\d+)\.(.+)$")
+# Razoes por core: nao se somam, sao recalculadas ou caem nos fallbacks de compute_metrics
+_RATIO_STAT = re.compile(r"(Rate|Ratio|Pct|^ipc$|^cpi$|accuracy$|coverage$|avg)", re.IGNORECASE)
+
+
+def aggregate_cpus(stats: Dict[str, float]) -> Dict[str, float]:
+    """Fold the system.cpuN.* stats of a multi-core run into system.cpu.*.
+
+    Counts are summed over the cores, numCycles is the max (cores run side by
+    side), IPC is simInsts / cycles and the L1 miss rates are misses / accesses.
+    Single-core stats are returned unchanged.
+    """
+    per_cpu: Dict[str, List[float]] = {}
+    for key, value in stats.items():
+        m = _CPU_STAT.match(key)
+        if m and not _RATIO_STAT.search(m.group(2).rsplit(".", 1)[-1].split("::")[0]):
+            per_cpu.setdefault(m.group(2), []).append(value)
+    if not per_cpu or any(k.startswith("system.cpu.") for k in stats):
+        return stats
+
+    merged = dict(stats)
+    for name, values in per_cpu.items():
+        merged[f"system.cpu.{name}"] = max(values) if name == "numCycles" else sum(values)
+
+    cycles = merged.get("system.cpu.numCycles")
+    insts = get_first(stats, ["simInsts", "sim_insts"])
+    if cycles and insts:
+        merged["system.cpu.ipc"] = insts / cycles
+        merged["system.cpu.cpi"] = cycles / insts
+    for cache in ("icache", "dcache"):
+        for kind in ("overall", "demand"):
+            accesses = merged.get(f"system.cpu.{cache}.{kind}Accesses::total")
+            misses = merged.get(f"system.cpu.{cache}.{kind}Misses::total")
+            if accesses and misses is not None:
+                merged[f"system.cpu.{cache}.{kind}MissRate::total"] = misses / accesses
+    return merged
+
+
 def compute_metrics(stats: Dict[str, float]) -> Dict[str, Optional[float]]:
     metrics: Dict[str, Optional[float]] = {}
+    stats = aggregate_cpus(stats)
 
-    metrics["sim_seconds"] = stats.get("sim_seconds")
-    metrics["sim_ticks"] = stats.get("sim_ticks")
-    metrics["sim_insts"] = stats.get("sim_insts")
+    # gem5 >= 23 renamed sim_seconds/sim_ticks/sim_insts to camelCase
+    metrics["sim_seconds"] = get_first(stats, ["sim_seconds", "simSeconds"])
+    metrics["sim_ticks"] = get_first(stats, ["sim_ticks", "simTicks"])
+    metrics["sim_insts"] = get_first(stats, ["sim_insts", "simInsts"])
 
     metrics["num_cycles"] = get_first(stats, [
         "system.cpu.numCycles",
@@ -102,6 +146,45 @@ def compute_metrics(stats: Dict[str, float]) -> Dict[str, Optional[float]]:
         "l2cache.demandMissRate::total",
     ])
 
+    # Access / miss counts (energy model)
+    for name, cache in (("i", "system.cpu.icache"), ("d", "system.cpu.dcache"), ("l2", "system.l2cache")):
+        short = cache.split(".")[-1]
+        metrics[f"{name}_accesses"] = get_first(stats, [
+            f"{cache}.overallAccesses::total",
+            f"{cache}.overall_accesses::total",
+            f"{short}.overallAccesses::total",
+        ])
+        metrics[f"{name}_misses"] = get_first(stats, [
+            f"{cache}.overallMisses::total",
+            f"{cache}.overall_misses::total",
+            f"{short}.overallMisses::total",
+        ])
+    metrics["d_reads"] = get_first(stats, [
+        "system.cpu.dcache.ReadReq.accesses::total",
+        "system.cpu.dcache.ReadReq_accesses::total",
+        "dcache.ReadReq.accesses::total",
+    ])
+    metrics["d_writes"] = get_first(stats, [
+        "system.cpu.dcache.WriteReq.accesses::total",
+        "system.cpu.dcache.WriteReq_accesses::total",
+        "dcache.WriteReq.accesses::total",
+    ])
+
+    # Prefetchers: accuracy = useful / issued, coverage = useful / (useful + demand misses)
+    for name, cache in (("l1d", "system.cpu.dcache"), ("l2", "system.l2cache")):
+        issued = get_first(stats, [f"{cache}.prefetcher.pfIssued", f"{cache}.prefetcher.num_hwpf_issued"])
+        useful = get_first(stats, [f"{cache}.prefetcher.pfUseful"])
+        misses = get_first(stats, [f"{cache}.demandMisses::total", f"{cache}.demand_misses::total"])
+        accuracy = get_first(stats, [f"{cache}.prefetcher.accuracy"])
+        coverage = get_first(stats, [f"{cache}.prefetcher.coverage"])
+        if accuracy is None and issued and useful is not None:
+            accuracy = useful / issued
+        if coverage is None and useful is not None and misses is not None and useful + misses > 0:
+            coverage = useful / (useful + misses)
+        metrics[f"{name}_pf_issued"] = issued
+        metrics[f"{name}_pf_accuracy"] = accuracy
+        metrics[f"{name}_pf_coverage"] = coverage
+
     pred = get_first(stats, [
         "system.cpu.branchPred.condPredicted",
         "system.cpu.branchPred.condPred",
@@ -116,9 +199,157 @@ def compute_metrics(stats: Dict[str, float]) -> Dict[str, Optional[float]]:
     else:
         metrics["branch_mispred_rate"] = None
 
+    # BTB: gem5 < 24 exporta BTBHits/BTBLookups, gem5 >= 24 btb.lookups/btb.misses
+    btb_ratio = get_first(stats, ["system.cpu.branchPred.BTBHitRatio"])
+    btb_pct = get_first(stats, ["system.cpu.branchPred.BTBHitPct"])
+    if btb_ratio is None and btb_pct is not None:
+        btb_ratio = btb_pct / 100.0
+    btb_lookups = get_first(stats, ["system.cpu.branchPred.BTBLookups", "system.cpu.branchPred.btb.lookups::total"])
+    btb_hits = get_first(stats, ["system.cpu.branchPred.BTBHits"])
+    btb_misses = get_first(stats, ["system.cpu.branchPred.btb.misses::total"])
+    if btb_hits is None and btb_lookups is not None and btb_misses is not None:
+        btb_hits = btb_lookups - btb_misses
+    if btb_ratio is None and btb_lookups and btb_hits is not None:
+        btb_ratio = btb_hits / btb_lookups
+    metrics["btb_hit_rate"] = btb_ratio
+
     return metrics
 
 
+COUNT_FIELDS = [
+    "i_accesses",
+    "i_misses",
+    "d_accesses",
+    "d_misses",
+    "d_reads",
+    "d_writes",
+    "l2_accesses",
+    "l2_misses",
+]
+
+PREFETCH_FIELDS = [
+    "l1d_prefetcher",
+    "l1d_pf_issued",
+    "l1d_pf_accuracy",
+    "l1d_pf_coverage",
+    "l2_prefetcher",
+    "l2_pf_issued",
+    "l2_pf_accuracy",
+    "l2_pf_coverage",
+]
+
+# Prefetcher de cada cache (tipo gem5 no config.ini, "none" sem prefetcher)
+PREFETCHER_SECTIONS = {
+    "l1d_prefetcher": "cpu.dcache",
+    "l2_prefetcher": "l2cache",
+}
+
+
+# (secao do config.ini, parametro gem5) -> coluna do CSV
+CONFIG_PARAMS = {
+    "cache_line_size": ("system", "cache_line_size"),
+    "fetch_width": ("cpu", "fetchWidth"),
+    "decode_width": ("cpu", "decodeWidth"),
+    "issue_width": ("cpu", "issueWidth"),
+    "commit_width": ("cpu", "commitWidth"),
+    "rob_entries": ("cpu", "numROBEntries"),
+    "lq_entries": ("cpu", "LQEntries"),
+    "sq_entries": ("cpu", "SQEntries"),
+    "l1i_size": ("cpu.icache", "size"),
+    "l1i_assoc": ("cpu.icache", "assoc"),
+    "l1d_size": ("cpu.dcache", "size"),
+    "l1d_assoc": ("cpu.dcache", "assoc"),
+    "l2_size": ("l2cache", "size"),
+    "l2_assoc": ("l2cache", "assoc"),
+}
+PARAM_FIELDS = list(CONFIG_PARAMS) + ["bpred", "btb_entries", "num_cpus", "mem_type"]
+
+
+def read_config_params(run_dir: Path) -> Dict[str, object]:
+    """Microarchitecture parameters of a run, read back from its config.ini."""
+    params: Dict[str, object] = {k: None for k in PARAM_FIELDS}
+    ini_path = run_dir / "config.ini"
+    ini = configparser.ConfigParser(interpolation=None, strict=False)
+    ini.optionxform = str  # type: ignore[assignment,method-assign]
+    if ini_path.exists():
+        ini.read(ini_path, encoding="utf-8")
+    elif ini_path.with_suffix(".ini.gz").exists():
+        # m5out enxuto (--lean)
+        import gzip
+
+        with gzip.open(ini_path.with_suffix(".ini.gz"), "rt", encoding="utf-8") as fh:
+            ini.read_file(fh)
+    else:
+        return params
+
+    cpus = sorted(s for s in ini.sections() if re.fullmatch(r"system\.cpu\d*", s))
+    params["num_cpus"] = float(len(cpus)) if cpus else None
+    cpu = cpus[0] if cpus else "system.cpu"
+
+    for name, (section, key) in CONFIG_PARAMS.items():
+        if section == "system":
+            full = "system"
+        elif section.startswith("cpu"):
+            full = cpu + section[len("cpu"):]
+        else:
+            full = f"system.{section}"
+        try:
+            params[name] = float(ini.get(full, key))
+        except (configparser.Error, ValueError):
+            continue
+
+    for name, section in PREFETCHER_SECTIONS.items():
+        full = cpu + section[len("cpu"):] if section.startswith("cpu") else f"system.{section}"
+        if ini.has_section(full):
+            params[name] = ini.get(full + ".prefetcher", "type", fallback="none")
+
+    # Preditor: no gem5 >= 24 fica em branchPred.conditionalBranchPred (exceto os estaticos)
+    bp = cpu + ".branchPred"
+    if ini.has_section(bp):
+        params["bpred"] = ini.get(bp + ".conditionalBranchPred", "type", fallback=None) or ini.get(bp, "type")
+        entries = ini.get(bp + ".btb", "numEntries", fallback=None) or ini.get(bp, "BTBEntries", fallback=None)
+        params["btb_entries"] = float(entries) if entries else None
+
+    # mem_type nao sai do config.ini: a secao dram so tem type=DRAMInterface (ver run_mem_type)
+    return params
+
+
+def run_mem_type(run_dir: Path, params: Dict[str, str]) -> Optional[str]:
+    """DRAM model of a run: its params.json (point or --set), else the default of its
+    CPU profile; None for runs without params.json."""
+    if not params:
+        return None
+    if params.get("mem_type"):
+        return params["mem_type"]
+    from core_profiles import PROFILES
+
+    profile = PROFILES.get(run_dir.parent.parent.name)
+    return str(profile["mem_type"]) if profile else None
+
+
+def write_run_params(outdir: Path, params: Dict[str, str]) -> None:
+    outdir.mkdir(parents=True, exist_ok=True)
+    (outdir / "params.json").write_text(json.dumps(params, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def read_run_params(run_dir: Path) -> Dict[str, str]:
+    path = run_dir / "params.json"
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def run_key(params: Dict[str, str]) -> str:
+    """Stable directory name for a point of the design space."""
+    if set(params) == {"l1"}:
+        return f"l1_{params['l1']}"
+    parts = []
+    for k in sorted(params):
+        v = "".join(ch if ch.isalnum() or ch in ".-" else "-" for ch in str(params[k]))
+        parts.append(f"{k}-{v}")
+    return "__".join(parts)
+
+
 def discover_binaries(root: Path) -> List[Tuple[str, Path, List[str]]]:
     bins: List[Tuple[str, Path, List[str]]] = []
     for path in root.rglob("*.riscv"):
@@ -144,58 +375,348 @@ def parse_bench_list(values: List[str]) -> List[Tuple[str, Path, List[str]]]:
     return benches
 
 
-def run_gem5(
+def gem5_command(
     gem5_bin: Path,
     cfg: Path,
     outdir: Path,
     cmd: Path,
-    l1i: str,
-    l1d: str,
+    l1i: Optional[str],
+    l1d: Optional[str],
     options: List[str],
-) -> None:
-    outdir.mkdir(parents=True, exist_ok=True)
+    extra_args: Optional[List[str]] = None,
+    gem5_args: Optional[List[str]] = None,
+) -> List[str]:
+    """Command line of one gem5 simulation into outdir."""
     args = [
         str(gem5_bin),
         "-d",
         str(outdir),
+        *(gem5_args or []),
         str(cfg),
         f"--cmd={cmd}",
-        f"--l1i={l1i}",
-        f"--l1d={l1d}",
     ]
+    if l1i:
+        args.append(f"--l1i={l1i}")
+    if l1d:
+        args.append(f"--l1d={l1d}")
+    if extra_args:
+        args.extend(extra_args)
     if options:
         args.append("--options")
         args.extend(options)
-    subprocess.run(args, check=True)
+    return args
 
 
-def run_sweep(args: argparse.Namespace) -> None:
+def run_gem5(
+    gem5_bin: Path,
+    cfg: Path,
+    outdir: Path,
+    cmd: Path,
+    l1i: Optional[str],
+    l1d: Optional[str],
+    options: List[str],
+    extra_args: Optional[List[str]] = None,
+    gem5_args: Optional[List[str]] = None,
+    on_line: Optional[Callable[[str], None]] = None,
+    scratch: Optional[Path] = None,
+) -> None:
+    """Run one gem5 simulation into outdir.
+
+    With on_line, the gem5 output (stdout and stderr) goes to outdir/gem5.log
+    and each line is also passed to on_line as it arrives; otherwise it goes
+    to the terminal. With scratch (--lean), gem5 writes a lean m5out under
+    scratch and only the retained files reach outdir (lean_m5out.py).
+    """
+    outdir.mkdir(parents=True, exist_ok=True)
+    if scratch is not None:
+        with lean_m5out.staged(outdir, scratch) as stage:
+            gem5_args = lean_m5out.LEAN_GEM5_ARGS + list(gem5_args or [])
+            _run_gem5_command(gem5_command(gem5_bin, cfg, stage, cmd, l1i, l1d, options, extra_args, gem5_args),
+                              outdir, on_line)
+        return
+    _run_gem5_command(gem5_command(gem5_bin, cfg, outdir, cmd, l1i, l1d, options, extra_args, gem5_args),
+                      outdir, on_line)
+
+
+def _run_gem5_command(args: List[str], outdir: Path, on_line: Optional[Callable[[str], None]]) -> None:
+    import subprocess
+
+    if on_line is None:
+        subprocess.run(args, check=True)
+        return
+    with open(outdir / "gem5.log", "w", encoding="utf-8") as log, subprocess.Popen(
+        args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace", bufsize=1
+    ) as proc:
+        for line in proc.stdout:
+            log.write(line)
+            on_line(line)
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, args)
+
+
+def run_parallel(tasks: List[Tuple[str, Callable[[], None]]], jobs: int, progress: Optional[Any] = None) -> int:
+    """Run (label, fn) tasks on `jobs` threads (one gem5 process each); returns the number of failures.
+
+    progress (a sweep_progress.SweepProgress) is told when each task starts
+    and ends, and prints the [ok]/[falhou] lines above its table.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    def tracked(label: str, fn: Callable[[], None]) -> None:
+        if progress is not None:
+            progress.started(label)
+        fn()
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {pool.submit(tracked, label, fn): label for label, fn in tasks}
+        for fut in as_completed(futures):
+            label = futures[fut]
+            try:
+                fut.result()
+                if progress is not None:
+                    progress.finished(label, True)
+                else:
+                    print(f"[ok] {label}")
+            except Exception as e:
+                failed += 1
+                if progress is not None:
+                    progress.finished(label, False, str(e))
+                else:
+                    print(f"[falhou] {label}: {e}")
+    return failed
+
+
+# Opcoes do se_core.py que nao sao campos do perfil (o resto passa por --set)
+CONFIG_OPTIONS = ["num_cpus", "prefetch_degree", "prefetch_distance"]
+
+
+def point_args(point: Dict[str, str]) -> List[str]:
+    """se_A7.py / se_A15.py options of a design point ('l1' sets both L1 sizes)."""
+    args: List[str] = []
+    for k, v in point.items():
+        if k == "l1":
+            args += [f"--l1i={v}", f"--l1d={v}"]
+        elif k in CONFIG_OPTIONS:
+            args.append(f"--{k.replace('_', '-')}={v}")
+        else:
+            args.append(f"--set={k}={v}")
+    return args
+
+
+def run_points(
+    args: argparse.Namespace,
+    points: List[Dict[str, str]],
+    extra_args: Optional[List[str]] = None,
+    settings: Optional[Dict[str, str]] = None,
+) -> None:
+    """Simulate every (benchmark, point) in <out-root>/<cpu>/<bench>/<run key>, --jobs at a time.
+    settings (--set values passed in extra_args) are recorded in params.json with the point."""
     gem5_bin = Path(args.gem5).expanduser().resolve()
     cfg = Path(args.cfg).expanduser().resolve()
     out_root = Path(args.out_root).expanduser().resolve()
 
-    if args.bench:
-        benches = parse_bench_list(args.bench)
-    else:
-        benches = discover_binaries(ROOT)
-
+    benches = parse_bench_list(args.bench) if args.bench else discover_binaries(ROOT)
     if not benches:
         raise SystemExit("Nenhum binário encontrado (.riscv). Use --bench.")
-
-    sizes = args.sizes
-
+    fixed = list(extra_args or [])
+    if args.env:
+        fixed.append(f"--env={Path(args.env).expanduser().resolve()}")
+    if args.progress:
+        fixed.append(f"--heartbeat={args.heartbeat}")
+    scratch = lean_m5out.scratch_dir(args)
+    lines: Dict[str, Callable[[str], None]] = {}
+
+    tasks = []
+    sims: Dict[str, Tuple[Path, Dict[str, Any]]] = {}
     for bench_name, bench_path, bench_opts in benches:
-        for size in sizes:
-            outdir = out_root / args.cpu / bench_name / f"l1_{size}"
-            run_gem5(
+        for point in points:
+            key = run_key(point)
+            outdir = out_root / args.cpu / bench_name / key
+            # gem5 cria stats.txt vazio no inicio: um run que morreu deve ser refeito
+            stats = outdir / "stats.txt"
+            if stats.exists() and stats.stat().st_size and not args.force:
+                continue
+            # Sweep L1 simples: diretorios l1_<size> sem params.json (formato historico)
+            if set(point) != {"l1"}:
+                write_run_params(outdir, dict(settings or {}, **point))
+            label = f"{bench_name} {key}"
+            sims[label] = (outdir, dict(
                 gem5_bin=gem5_bin,
                 cfg=cfg,
                 outdir=outdir,
                 cmd=bench_path,
-                l1i=size,
-                l1d=size,
+                l1i=None,
+                l1d=None,
                 options=bench_opts,
-            )
+                extra_args=fixed + point_args(point),
+            ))
+            tasks.append((label, lambda label=label: run_gem5(**sims[label][1], on_line=lines.get(label), scratch=scratch)))
+
+    print(f"{len(tasks)} simulacoes ({len(points)} pontos x {len(benches)} benchmarks, --jobs {args.jobs})")
+    if scratch is not None:
+        print(f"m5out enxuto: gem5 escreve em {scratch}")
+    if args.pipeline:
+        pipeline_points(args, out_root, sims, scratch)
+        return
+    if args.progress and tasks:
+        from sweep_progress import SweepProgress
+
+        with SweepProgress([label for label, _ in tasks], args.jobs) as progress:
+            lines.update({label: (lambda text, label=label: progress.line(label, text)) for label, _ in tasks})
+            failed = run_parallel(tasks, args.jobs, progress)
+    else:
+        failed = run_parallel(tasks, args.jobs)
+    if failed:
+        raise SystemExit(f"{failed} simulacoes falharam")
+
+
+def pipeline_points(
+    args: argparse.Namespace,
+    out_root: Path,
+    sims: Dict[str, Tuple[Path, Dict[str, Any]]],
+    scratch: Optional[Path] = None,
+) -> None:
+    """--pipeline: run the simulations and keep the CSV and the figures up to date as each one exits.
+
+    The table is the one of `collect` (every run under <out-root>/<cpu>); the
+    runs that are not simulated again are parsed while the first ones run.
+    """
+    from sweep_pipeline import SimJob, pipeline
+
+    csv_path = Path(args.csv).expanduser().resolve() if args.csv else out_root / "results.csv"
+    out_dir = Path(args.out_dir).expanduser().resolve() if args.out_dir else out_root / "figures"
+    jobs = []
+    for label, (outdir, kw) in sims.items():
+        if scratch is None:
+            jobs.append(SimJob(label, gem5_command(**kw), outdir))
+            continue
+        stage = lean_m5out.stage_dir(scratch, outdir)
+        argv = gem5_command(**dict(kw, outdir=stage, gem5_args=lean_m5out.LEAN_GEM5_ARGS))
+        jobs.append(SimJob(label, argv, outdir,
+                           finish=lambda ok, stage=stage, outdir=outdir: lean_m5out.finish(stage, outdir, ok)))
+    simulated = {outdir for outdir, _ in sims.values()}
+    existing = [
+        run_dir
+        for bench_dir in sorted((out_root / args.cpu).glob("*")) if bench_dir.is_dir()
+        for run_dir in sorted(bench_dir.glob("*")) if run_dir.is_dir() and run_dir not in simulated
+    ]
+
+    def parse(run_dir: Path) -> Optional[Tuple[Tuple[str, str], Dict[str, Optional[float]]]]:
+        row = collect_run(run_dir)
+        return None if row is None else ((str(row["bench"]), str(row["run"])), row)
+
+    def table(rows: Dict[Tuple[str, str], Dict[str, Optional[float]]]) -> None:
+        write_csv([rows[k] for k in sorted(rows)], csv_path)
+
+    def plot() -> List[Path]:
+        return plot_from_csv(csv_path, out_dir, jobs=args.plot_jobs)
+
+    def run(progress: Optional[Any] = None) -> Any:
+        return pipeline(jobs, args.jobs, parse, table, None if args.no_plot else plot,
+                        existing=existing, progress=progress)
+
+    if args.progress and jobs:
+        from sweep_progress import SweepProgress
+
+        with SweepProgress([job.label for job in jobs], args.jobs) as progress:
+            result = run(progress)
+    else:
+        result = run()
+    print(result.summary())
+    print(f"CSV: {csv_path}" + ("" if args.no_plot else f" | figuras: {out_dir}"))
+    if result.failed:
+        raise SystemExit(f"{len(result.failed)} simulacoes falharam")
+
+
+def run_sweep(args: argparse.Namespace) -> None:
+    from design_space import grid_points
+
+    dims = [
+        ("l1", list(args.sizes)),
+        ("num_cpus", [str(n) for n in args.num_cpus or [1]]),
+        ("l1d_prefetcher", args.l1d_prefetcher or ["none"]),
+        ("l2_prefetcher", args.l2_prefetcher or ["none"]),
+    ]
+    defaults = {"num_cpus": "1", "l1d_prefetcher": "none", "l2_prefetcher": "none"}
+    points = []
+    for point in grid_points(dims):  # type: ignore[arg-type]
+        # Valores default ficam fora da chave: mesmos diretorios que o sweep L1 simples
+        point = {k: v for k, v in point.items() if defaults.get(k) != v}
+        if args.prefetch_degree is not None and ("l1d_prefetcher" in point or "l2_prefetcher" in point):
+            point["prefetch_degree"] = str(args.prefetch_degree)
+        points.append(point)
+    run_points(args, points)
+
+
+def run_grid(args: argparse.Namespace) -> None:
+    from core_profiles import profile_fields
+    from design_space import expand_dimension, grid_points, parse_dimension, parse_fixed
+
+    try:
+        fixed = parse_fixed(args.set)
+        dims = [parse_dimension(d) for d in args.dim]
+        allowed = set(profile_fields(args.cpu)) | {"l1"} | set(CONFIG_OPTIONS)
+        unknown = [name for name, _ in dims if name not in allowed]
+        if unknown:
+            raise ValueError(f"Dimensao desconhecida: {', '.join(unknown)} (campos do perfil, l1 ou {', '.join(CONFIG_OPTIONS)})")
+        points = grid_points(dims, args.where)
+        total = math.prod(len(expand_dimension(d)) for d in dims)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    # Valores fixos entram na chave: duas grades com --set diferentes nao se misturam
+    points = [dict(fixed, **point) for point in points]
+    print(f"{len(points)} pontos (de {total} no produto cartesiano)")
+    for point in points:
+        print("  " + run_key(point))
+    if args.dry_run:
+        return
+    run_points(args, points)
+
+
+def run_sample(args: argparse.Namespace) -> None:
+    from design_space import parse_dimension, parse_fixed, sample_points
+
+    try:
+        fixed = parse_fixed(args.set)
+        dims = [parse_dimension(d) for d in args.dim]
+        points = sample_points(dims, args.n, design=args.design, seed=args.seed)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    print(f"{len(points)} pontos ({args.design})")
+    for point in points:
+        print("  " + " ".join(f"{k}={v}" for k, v in point.items()))
+    if args.dry_run:
+        return
+    run_points(args, points, extra_args=[f"--set={o}" for o in args.set], settings=fixed)
+
+
+def collect_run(run_dir: Path) -> Optional[Dict[str, Optional[float]]]:
+    """Table row of one run directory (<out-root>/<cpu>/<bench>/<run>), None if it is
+    not a run or has no stats yet (failed or still running)."""
+    params = read_run_params(run_dir)
+    if not params and not run_dir.name.startswith("l1_"):
+        return None
+    stats_path = run_dir / "stats.txt"
+    if not stats_path.is_file() or stats_path.stat().st_size == 0:
+        return None
+    stats = parse_stats(stats_path)
+    metrics = compute_metrics(stats)
+    metrics.update(read_config_params(run_dir))
+    metrics["bench"] = run_dir.parent.name
+    if params:
+        metrics["l1_size"] = params.get("l1", params.get("l1d_size", ""))
+    else:
+        metrics["l1_size"] = run_dir.name.replace("l1_", "")
+    # Dimensoes da grade que o config.ini nao mostra (prefetch_degree, ...)
+    for k, v in params.items():
+        if k != "l1" and k not in metrics:
+            metrics[k] = v  # type: ignore[assignment]
+    metrics["mem_type"] = run_mem_type(run_dir, params)  # type: ignore[assignment]
+    metrics["run"] = run_dir.name
+    return metrics
 
 
 def collect_results(out_root: Path, cpu: str) -> List[Dict[str, Optional[float]]]:
@@ -206,36 +727,44 @@ def collect_results(out_root: Path, cpu: str) -> List[Dict[str, Optional[float]]
     for bench_dir in sorted((out_root / cpu).glob("*")):
         if not bench_dir.is_dir():
             continue
-        bench_name = bench_dir.name
-        for l1_dir in sorted(bench_dir.glob("l1_*")):
-            if not l1_dir.is_dir():
+        for run_dir in sorted(bench_dir.glob("*")):
+            if not run_dir.is_dir():
                 continue
-            l1_size = l1_dir.name.replace("l1_", "")
-            stats = parse_stats(l1_dir / "stats.txt")
-            metrics = compute_metrics(stats)
-            metrics["bench"] = bench_name
-            metrics["l1_size"] = l1_size
-            rows.append(metrics)
+            metrics = collect_run(run_dir)
+            if metrics is not None:
+                rows.append(metrics)
     return rows
 
 
-def write_csv(rows: List[Dict[str, Optional[float]]], csv_path: Path) -> None:
+METRIC_FIELDS = [
+    "sim_seconds",
+    "sim_ticks",
+    "sim_insts",
+    "num_cycles",
+    "ipc",
+    "cpi",
+    "i_miss_rate",
+    "d_miss_rate",
+    "l2_miss_rate",
+    "branch_mispred_rate",
+    "btb_hit_rate",
+]
+
+
+def write_csv(
+    rows: List[Dict[str, Optional[float]]],
+    csv_path: Path,
+    extra_fields: Optional[List[str]] = None,
+) -> None:
+    """Write the table; row keys outside the standard columns (grid dimensions) go at the end."""
     if not rows:
         return
-    fieldnames = [
-        "bench",
-        "l1_size",
-        "sim_seconds",
-        "sim_ticks",
-        "sim_insts",
-        "num_cycles",
-        "ipc",
-        "cpi",
-        "i_miss_rate",
-        "d_miss_rate",
-        "l2_miss_rate",
-        "branch_mispred_rate",
-    ]
+    fieldnames = (
+        ["bench", "l1_size"] + METRIC_FIELDS + (extra_fields or [])
+        + COUNT_FIELDS + PREFETCH_FIELDS + ["run"] + PARAM_FIELDS
+    )
+    known = set(fieldnames)
+    fieldnames += sorted({k for r in rows for k in r if k not in known})
     csv_path.parent.mkdir(parents=True, exist_ok=True)
     with csv_path.open("w", newline="", encoding="utf-8") as fh:
         writer = csv.DictWriter(fh, fieldnames=fieldnames)
@@ -244,15 +773,101 @@ def write_csv(rows: List[Dict[str, Optional[float]]], csv_path: Path) -> None:
             writer.writerow({k: r.get(k) for k in fieldnames})
 
 
-def _size_key(size: str) -> Tuple[int, str]:
-    digits = "".join(ch for ch in size if ch.isdigit())
-    unit = "".join(ch for ch in size if ch.isalpha()).lower()
-    num = int(digits) if digits else 0
-    return (num, unit)
+def _missing(value: Optional[str]) -> bool:
+    return value is None or value == "" or value == "None"
 
 
-def plot_from_csv(csv_path: Path, out_dir: Path, combined: bool = False) -> None:
-    import matplotlib.pyplot as plt
+def _x_key(value: str) -> Tuple[int, float, str]:
+    """Sort key of an axis value: numbers and gem5 sizes by magnitude, then strings."""
+    from cacti import size_to_bytes
+
+    for parse in (float, size_to_bytes):
+        try:
+            return (0, float(parse(value)), "")  # type: ignore[operator]
+        except ValueError:
+            continue
+    return (1, 0.0, value)
+
+
+def _dim_value(key: str, value: str) -> str:
+    """Short text of a dimension value (config.ini sizes in bytes -> 4kB)."""
+    from cacti import format_size
+
+    try:
+        num = float(value)
+    except ValueError:
+        return value
+    if key.endswith("_size") and key != "cache_line_size" and num >= 1024:
+        return format_size(num)
+    return str(int(num)) if num.is_integer() else value
+
+
+def _dim_label(key: str, value: str) -> str:
+    if key in PREFETCHER_SECTIONS:
+        return f"{key.split('_')[0]}:{value.replace('Prefetcher', '')}"
+    if key == "num_cpus":
+        return f"{_dim_value(key, value)} cores"
+    if key == "bench":
+        return value
+    return f"{key}={_dim_value(key, value)}"
+
+
+def _series_keys(rows: List[Dict[str, str]], x: str, fields: List[str]) -> List[str]:
+    """Columns that separate the curves of a plot.
+
+    A column is kept when it varies and is not already fixed by x and the
+    columns kept before it (l1d_size follows l1_size, the prefetcher type
+    from config.ini follows the one in params.json, ...).
+    """
+    keys: List[str] = []
+    for field in fields:
+        if field == x or len({r.get(field) for r in rows}) < 2:
+            continue
+        seen: Dict[Tuple[Optional[str], ...], Optional[str]] = {}
+        for r in rows:
+            group = tuple(r.get(k) for k in [x] + keys)
+            if seen.setdefault(group, r.get(field)) != r.get(field):
+                keys.append(field)
+                break
+    return keys
+
+
+def _variant(row: Dict[str, str], keys: List[str]) -> str:
+    """Label of the curve of a row: its values of the series columns."""
+    return " ".join(_dim_label(k, row[k]) for k in keys if not _missing(row.get(k)))
+
+
+def _variants(rows: List[Dict[str, str]], keys: List[str]) -> List[str]:
+    """Curve labels, ordered by the values of the series columns (2kB before 16kB)."""
+    order = {_variant(r, keys): tuple(_x_key(r.get(k) or "") for k in keys) for r in rows}
+    return sorted(order, key=lambda v: order[v])
+
+
+def _figure_series(
+    groups: Dict[str, List[Dict[str, str]]],
+    key: str,
+    x: str,
+    positions: Dict[str, int],
+) -> List[Tuple[str, List[int], List[float]]]:
+    """(label, x positions, values) of every curve that has the metric."""
+    series = []
+    for variant, group in groups.items():
+        points = [(positions[r[x]], float(r[key])) for r in group if not _missing(r.get(key))]
+        if points:
+            series.append((variant, [p[0] for p in points], [p[1] for p in points]))
+    return series
+
+
+def plot_from_csv(
+    csv_path: Path,
+    out_dir: Path,
+    combined: bool = False,
+    x: str = "l1_size",
+    jobs: Optional[int] = None,
+    force: bool = False,
+) -> List[Path]:
+    """Draw the figures of a sweep table whose data changed, one process-pool job per figure."""
+    from plot_pool import line_figure, render_figures
 
     if not csv_path.exists():
         raise SystemExit("CSV nao encontrado")
@@ -260,13 +875,20 @@ def plot_from_csv(csv_path: Path, out_dir: Path, combined: bool = False) -> None
     rows: List[Dict[str, str]] = []
     with csv_path.open("r", encoding="utf-8") as fh:
         reader = csv.DictReader(fh)
+        header = list(reader.fieldnames or [])
         for row in reader:
             rows.append(row)
 
     if not rows:
-        return
+        return []
+    if x not in header:
+        raise SystemExit(f"Coluna {x} ausente do CSV")
+
+    # Colunas que podem ser dimensoes: parametros, prefetchers e as colunas extras da grade
+    standard = set(["bench", "run"] + METRIC_FIELDS + COUNT_FIELDS + PREFETCH_FIELDS + PARAM_FIELDS)
+    dim_fields = PARAM_FIELDS + ["l1_size"] + list(PREFETCHER_SECTIONS) + [c for c in header if c not in standard]
+    dim_fields = [c for c in dict.fromkeys(dim_fields) if c in header]
 
-    benches = sorted({r["bench"] for r in rows})
     metrics = [
         ("ipc", "IPC"),
         ("cpi", "CPI"),
@@ -275,71 +897,97 @@ def plot_from_csv(csv_path: Path, out_dir: Path, combined: bool = False) -> None
         ("l2_miss_rate", "L2 miss rate"),
         ("branch_mispred_rate", "Branch mispred rate"),
         ("sim_seconds", "Tempo simulado (s)"),
+        ("l1d_pf_accuracy", "L1D prefetch accuracy"),
+        ("l1d_pf_coverage", "L1D prefetch coverage"),
+        ("l2_pf_accuracy", "L2 prefetch accuracy"),
+        ("l2_pf_coverage", "L2 prefetch coverage"),
     ]
+    xlabel = "L1 size" if x == "l1_size" else x
+    suffix = "" if x == "l1_size" else f"_vs_{x}"
+    rows = [r for r in rows if not _missing(r.get(x))]
+    rows.sort(key=lambda r: _x_key(r[x]))
 
-    out_dir.mkdir(parents=True, exist_ok=True)
-
+    # Agrupa uma vez so: figura -> (curva -> linhas), depois cada metrica so le os grupos
     if combined:
-        for key, title in metrics:
-            plt.figure()
-            has_any = False
-            for bench in benches:
-                bench_rows = [r for r in rows if r["bench"] == bench]
-                bench_rows.sort(key=lambda r: _size_key(r["l1_size"]))
-                xs = []
-                ys = []
-                for r in bench_rows:
-                    val = r.get(key)
-                    if val is None or val == "" or val == "None":
-                        continue
-                    xs.append(r["l1_size"])
-                    ys.append(float(val))
-                if not xs:
-                    continue
-                has_any = True
-                plt.plot(xs, ys, marker="o", label=bench)
-
-            if not has_any:
-                plt.close()
-                continue
-
-            plt.title(f"{title} vs L1")
-            plt.xlabel("L1 size")
-            plt.ylabel(title)
-            plt.grid(True, alpha=0.3)
-            plt.legend()
-            out_path = out_dir / f"combined_{key}.png"
-            plt.tight_layout()
-            plt.savefig(out_path, dpi=160)
-            plt.close()
-        return
+        keys = _series_keys(rows, x, ["bench"] + dim_fields)
+        figures = [("combined", "", rows, keys)]
+    else:
+        by_bench: Dict[str, List[Dict[str, str]]] = {}
+        for r in rows:
+            by_bench.setdefault(r["bench"], []).append(r)
+        figures = [
+            (bench, f"{bench} - ", bench_rows, _series_keys(bench_rows, x, dim_fields))
+            for bench, bench_rows in sorted(by_bench.items())
+        ]
 
-    for bench in benches:
-        bench_rows = [r for r in rows if r["bench"] == bench]
-        bench_rows.sort(key=lambda r: _size_key(r["l1_size"]))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    figure_jobs = []
+    for prefix, title_prefix, group_rows, keys in figures:
+        # Eixo categorico na ordem de _x_key, comum a todas as curvas
+        positions = {v: i for i, v in enumerate(dict.fromkeys(r[x] for r in group_rows))}
+        xticks = (list(positions.values()), [_dim_value(x, v) for v in positions])
+        groups: Dict[str, List[Dict[str, str]]] = {v: [] for v in _variants(group_rows, keys)}
+        for r in group_rows:
+            groups[_variant(r, keys)].append(r)
+        if not combined and "" in groups:
+            groups["base"] = groups.pop("")
 
         for key, title in metrics:
-            xs = []
-            ys = []
-            for r in bench_rows:
-                val = r.get(key)
-                if val is None or val == "" or val == "None":
-                    continue
-                xs.append(r["l1_size"])
-                ys.append(float(val))
-            if not xs:
+            series = _figure_series(groups, key, x, positions)
+            if not series:
                 continue
+            figure_jobs.append((line_figure, {
+                "out_path": out_dir / f"{prefix}_{key}{suffix}.png",
+                "series": series,
+                "title": f"{title_prefix}{title} vs {xlabel}",
+                "xlabel": xlabel,
+                "ylabel": title,
+                "xticks": xticks,
+                "legend": True if combined else "auto",
+                "legend_fontsize": "small",
+            }))
+    scope = f"l1_sweep plot {'combined' if combined else 'bench'} x={x}"
+    return render_figures(figure_jobs, jobs, scope=scope, force=force, out_dir=out_dir)
+
+
+def watch_results(args: argparse.Namespace) -> None:
+    """Incremental collect + plot: every run that finishes is parsed once, the
+    table rewritten and only the figures whose data changed redrawn."""
+    from stats_watch import StatsWatcher, watch
 
-            plt.figure()
-            plt.plot(xs, ys, marker="o")
-            plt.title(f"{bench} - {title} vs L1")
-            plt.xlabel("L1 size")
-            plt.ylabel(title)
-            plt.grid(True, alpha=0.3)
-            out_path = out_dir / f"{bench}_{key}.png"
-            plt.tight_layout()
-            plt.savefig(out_path, dpi=160)
-            plt.close()
+    out_root = Path(args.out_root).expanduser().resolve()
+    csv_path = Path(args.csv).expanduser().resolve()
+    out_dir = Path(args.out_dir).expanduser().resolve()
+    runs_root = out_root / args.cpu
+
+    # Tabela existente: seus runs so sao relidos se o stats.txt mudou depois dela
+    rows: Dict[Tuple[str, str], Dict[str, Optional[float]]] = {}
+    processed: Dict[Path, float] = {}
+    if csv_path.exists() and not args.force:
+        written = csv_path.stat().st_mtime
+        with csv_path.open("r", encoding="utf-8") as fh:
+            for r in csv.DictReader(fh):
+                # tabelas antigas sem coluna run: o diretorio do run e l1_<tamanho>
+                r["run"] = r.get("run") or f"l1_{r['l1_size']}"
+                rows[(r["bench"], r["run"])] = r  # type: ignore[assignment]
+                processed[runs_root / r["bench"] / r["run"] / "stats.txt"] = written
+
+    def update(batch: List[Path]) -> None:
+        for stats_path in batch:
+            row = collect_run(stats_path.parent)
+            if row is not None:
+                rows[(str(row["bench"]), str(row["run"]))] = row
+        write_csv([rows[k] for k in sorted(rows)], csv_path)
+        msg = f"{len(batch)} runs novos, {len(rows)} na tabela"
+        if not args.no_plot:
+            drawn = plot_from_csv(csv_path, out_dir, combined=args.combined, x=args.x, jobs=args.jobs)
+            msg += f", {len(drawn)} figuras redesenhadas"
+        print(msg, flush=True)
+
+    watcher = StatsWatcher([(runs_root, 2)], settle=args.settle, processed=processed)
+    if not args.once:
+        print(f"observando {runs_root} a cada {args.interval:g} s (Ctrl-C para sair)", flush=True)
+    watch(watcher, update, interval=args.interval, once=args.once)
 
 
 def default_sizes(cpu: str) -> List[str]:
@@ -350,17 +998,69 @@ def default_sizes(cpu: str) -> List[str]:
     raise SystemExit("CPU invalido: use A7 ou A15")
 
 
+def _add_sim_args(sp: argparse.ArgumentParser, required: bool = True) -> None:
+    """Options shared by the subcommands that run gem5."""
+    sp.add_argument("--cpu", required=True, choices=["A7", "A15"])
+    sp.add_argument("--gem5", required=required, help="caminho do gem5.opt")
+    sp.add_argument("--cfg", required=required, help="script se_A7.py ou se_A15.py")
+    sp.add_argument("--out-root", default=str(ROOT / "results_l1"))
+    sp.add_argument("--bench", action="append", default=[], help="nome:caminho ou caminho do binario")
+    sp.add_argument("--env", help="arquivo VAR=valor para o processo simulado (ex: OMP_NUM_THREADS)")
+    sp.add_argument("--jobs", type=int, default=1, help="simulacoes gem5 em paralelo")
+    sp.add_argument("--force", action="store_true", help="refaz runs que ja tem stats.txt")
+    sp.add_argument("--progress", action="store_true",
+                    help="tabela ao vivo dos runs com ETA (saida do gem5 em <run>/gem5.log)")
+    sp.add_argument("--heartbeat", type=int, default=1_000_000_000,
+                    help="ticks simulados entre duas linhas de progresso do gem5 (default: 1e9 = 1 ms)")
+    sp.add_argument("--pipeline", action="store_true",
+                    help="le cada stats.txt assim que o gem5 termina e atualiza CSV e figuras durante o sweep")
+    sp.add_argument("--csv", help="com --pipeline: CSV (default: <out-root>/results.csv)")
+    sp.add_argument("--out-dir", help="com --pipeline: figuras (default: <out-root>/figures)")
+    sp.add_argument("--no-plot", action="store_true", help="com --pipeline: so o CSV")
+    sp.add_argument("--plot-jobs", type=int, default=1,
+                    help="com --pipeline: processos de desenho (default: 1, os cores ficam para o gem5)")
+    lean_m5out.add_arguments(sp)
+
+
+# Etapas medidas com --profile
+PROFILE_STAGES = [
+    "run_points", "pipeline_points", "run_gem5", "collect_results", "collect_run", "parse_stats",
+    "compute_metrics", "read_config_params", "read_run_params", "write_csv", "plot_from_csv",
+    "plot_pool.render_figures",
+]
+
+
 def build_arg_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="Sweep L1 sizes for gem5 A7/A15 configs")
     sub = p.add_subparsers(dest="cmd", required=True)
 
     run = sub.add_parser("run", help="executa simulacoes")
-    run.add_argument("--cpu", required=True, choices=["A7", "A15"])
-    run.add_argument("--gem5", required=True, help="caminho do gem5.opt")
-    run.add_argument("--cfg", required=True, help="script se_A7.py ou se_A15.py")
-    run.add_argument("--out-root", default=str(ROOT / "results_l1"))
-    run.add_argument("--bench", action="append", default=[], help="nome:caminho ou caminho do binario")
+    _add_sim_args(run)
     run.add_argument("--sizes", nargs="+", help="override lista de tamanhos (ex: 1kB 2kB)")
+    run.add_argument("--l1d-prefetcher", nargs="+", help="dimensao extra: none stride tagged ...")
+    run.add_argument("--l2-prefetcher", nargs="+", help="dimensao extra: none stride tagged ...")
+    run.add_argument("--prefetch-degree", type=int, help="degree dos prefetchers")
+    run.add_argument("--num-cpus", nargs="+", type=int, help="dimensao extra: numero de cores (ex: 1 2 4)")
+
+    grid = sub.add_parser("grid", help="simula o produto cartesiano de dimensoes quaisquer")
+    _add_sim_args(grid, required=False)
+    grid.add_argument("--dim", action="append", required=True,
+                      help="campo do perfil, l1 ou num_cpus: v1,v2,... ou lo:hi[:log] "
+                           "(ex: l1d_size=1kB:16kB, mem_type=DDR3_1600_8x8,DDR4_2400_8x8)")
+    grid.add_argument("--where", action="append", default=[],
+                      help="filtro sobre as dimensoes, tamanhos em bytes (ex: 'l1i_size <= l1d_size')")
+    grid.add_argument("--set", action="append", default=[], help="campo=valor fixo para todos os pontos")
+    grid.add_argument("--dry-run", action="store_true", help="so lista os pontos")
+
+    sample = sub.add_parser("sample", help="amostra o espaco de projeto (LHS/Sobol) e simula")
+    _add_sim_args(sample, required=False)
+    sample.add_argument("--dim", action="append", required=True,
+                        help="campo do perfil: v1,v2,... ou lo:hi[:log] (ex: rob_entries=2:64:log)")
+    sample.add_argument("--design", choices=["lhs", "sobol"], default="lhs")
+    sample.add_argument("-n", type=int, default=16, help="numero de pontos")
+    sample.add_argument("--seed", type=int, default=None, help="semente do LHS")
+    sample.add_argument("--set", action="append", default=[], help="campo=valor fixo para todos os pontos")
+    sample.add_argument("--dry-run", action="store_true", help="so lista os pontos")
 
     collect = sub.add_parser("collect", help="gera CSV a partir dos m5out")
     collect.add_argument("--cpu", required=True, choices=["A7", "A15"])
@@ -371,19 +1071,49 @@ def build_arg_parser() -> argparse.ArgumentParser:
     plot.add_argument("--csv", default=str(ROOT / "results_l1" / "results.csv"))
     plot.add_argument("--out-dir", default=str(ROOT / "results_l1" / "figures"))
     plot.add_argument("--combined", action="store_true", help="gera um grafico com multiple benchmarks")
-
+    plot.add_argument("--x", default="l1_size", help="coluna do eixo x (ex: l2_size, num_cpus)")
+    plot.add_argument("--jobs", type=int, default=None, help="processos de desenho (default: todos os cores)")
+    plot.add_argument("--force", action="store_true", help="redesenha todas as figuras, mesmo sem mudanca nos dados")
+
+    watch = sub.add_parser("watch", help="collect + plot incrementais enquanto os runs terminam")
+    watch.add_argument("--cpu", required=True, choices=["A7", "A15"])
+    watch.add_argument("--out-root", default=str(ROOT / "results_l1"))
+    watch.add_argument("--csv", default=str(ROOT / "results_l1" / "results.csv"))
+    watch.add_argument("--out-dir", default=str(ROOT / "results_l1" / "figures"))
+    watch.add_argument("--combined", action="store_true", help="gera um grafico com multiple benchmarks")
+    watch.add_argument("--x", default="l1_size", help="coluna do eixo x (ex: l2_size, num_cpus)")
+    watch.add_argument("--jobs", type=int, default=None, help="processos de desenho (default: todos os cores)")
+    watch.add_argument("--no-plot", action="store_true", help="so atualiza o CSV")
+    watch.add_argument("--interval", type=float, default=2.0, help="segundos entre duas varreduras dos stats.txt")
+    watch.add_argument("--settle", type=float, default=2.0,
+                       help="segundos sem mudanca antes de ler um stats.txt (nunca le um arquivo pela metade)")
+    watch.add_argument("--once", action="store_true", help="processa os runs terminados e sai")
+    watch.add_argument("--force", action="store_true", help="ignora o CSV existente e rele todos os runs")
+
+    for sp in sub.choices.values():
+        profiling.add_arguments(sp)
     return p
 
 
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> None:
     parser = build_arg_parser()
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    profiling.start(args, f"l1_sweep {args.cmd}", globals(), PROFILE_STAGES)
 
     if args.cmd == "run":
         args.sizes = args.sizes if args.sizes else default_sizes(args.cpu)
         run_sweep(args)
         return
 
+    if args.cmd in ("grid", "sample"):
+        if not args.dry_run and not (args.gem5 and args.cfg):
+            raise SystemExit(f"{args.cmd} requer --gem5 e --cfg (ou --dry-run)")
+        if args.cmd == "grid":
+            run_grid(args)
+        else:
+            run_sample(args)
+        return
+
     if args.cmd == "collect":
         out_root = Path(args.out_root).expanduser().resolve()
         rows = collect_results(out_root, args.cpu)
@@ -394,7 +1124,12 @@ def main() -> None:
     if args.cmd == "plot":
         csv_path = Path(args.csv).expanduser().resolve()
         out_dir = Path(args.out_dir).expanduser().resolve()
-        plot_from_csv(csv_path, out_dir, combined=args.combined)
+        drawn = plot_from_csv(csv_path, out_dir, combined=args.combined, x=args.x, jobs=args.jobs, force=args.force)
+        print(f"{len(drawn)} figuras redesenhadas em {out_dir}")
+        return
+
+    if args.cmd == "watch":
+        watch_results(args)
         return
 
 
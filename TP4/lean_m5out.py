@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Lean m5out (--lean) for the sweep drivers.
+
+A full m5out is about 410 kB (config.dot, .pdf, .svg, config.ini, a 105 kB
+config.json, citations.bib, stats.txt), written to the results root, often
+an NFS home directory, while collect only needs stats.txt and config.ini. In
+lean mode gem5 runs with --dot-config= (no dot/pdf/svg) and writes into a
+staging directory on local scratch (tmpfs when there is one). When it exits
+successfully the retained files are moved to the run directory:
+config.ini and config.json gzipped, citations.bib dropped, anything else
+(traces of the capture commands...) as is, and stats.txt last, so a
+stats.txt in the results root is always a finished run. The staging
+directory is removed in every case; a failed run leaves no stats.txt and is
+simulated again next time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+# gzip, hashlib, shutil e tempfile so quando ha um run: collect importa este modulo via l1_sweep
+
+# Opcoes do gem5 (antes do script de config)
+LEAN_GEM5_ARGS = ["--dot-config="]
+COMPRESSED = ["config.ini", "config.json"]
+DROPPED = ["citations.bib", "config.dot", "config.dot.pdf", "config.dot.svg"]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--lean", action="store_true",
+                        help="m5out enxuto: sem config.dot/pdf/svg, configs em .gz, gem5 escreve em --scratch")
+    parser.add_argument("--scratch", default=None,
+                        help="com --lean: diretorio local onde o gem5 escreve (default: /dev/shm, senao $TMPDIR)")
+
+
+def default_scratch() -> Path:
+    import tempfile
+
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return shm
+    return Path(tempfile.gettempdir())
+
+
+def scratch_dir(args: argparse.Namespace) -> Optional[Path]:
+    """Scratch root of --lean, None without it."""
+    if not getattr(args, "lean", False):
+        return None
+    return Path(args.scratch).expanduser().resolve() if args.scratch else default_scratch()
+
+
+def stage_dir(scratch: Path, outdir: Path) -> Path:
+    """Empty staging directory of a run (same name for the same run directory)."""
+    import hashlib
+    import shutil
+
+    digest = hashlib.sha1(str(outdir.resolve()).encode("utf-8")).hexdigest()[:12]
+    stage = scratch / f"es201_m5out_{os.getuid()}" / f"{outdir.name}_{digest}"
+    # restos de um run interrompido
+    shutil.rmtree(stage, ignore_errors=True)
+    stage.parent.mkdir(parents=True, exist_ok=True)
+    return stage
+
+
+def retain(stage: Path, outdir: Path) -> List[Path]:
+    """Move the retained files of a staged m5out to outdir; returns the files written."""
+    import gzip
+    import shutil
+
+    outdir.mkdir(parents=True, exist_ok=True)
+    written: List[Path] = []
+    names = sorted(p.name for p in stage.iterdir() if p.name not in DROPPED)
+    # stats.txt por ultimo: so aparece quando o resto ja esta no lugar
+    if "stats.txt" in names:
+        names.remove("stats.txt")
+        names.append("stats.txt")
+    for name in names:
+        src = stage / name
+        if name in COMPRESSED:
+            dst = outdir / (name + ".gz")
+            tmp = dst.with_name("." + dst.name + ".tmp")
+            with src.open("rb") as fin, gzip.open(tmp, "wb", compresslevel=6) as fout:
+                shutil.copyfileobj(fin, fout)
+            # um config nao comprimido de um run anterior seria lido no lugar deste
+            (outdir / name).unlink(missing_ok=True)
+        elif src.is_dir():
+            dst = outdir / name
+            shutil.rmtree(dst, ignore_errors=True)
+            shutil.move(str(src), str(dst))
+            written.append(dst)
+            continue
+        else:
+            dst = outdir / name
+            tmp = dst.with_name("." + name + ".tmp")
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+        written.append(dst)
+    return written
+
+
+def finish(stage: Path, outdir: Path, ok: bool) -> None:
+    """End of a staged run: retain its files if gem5 succeeded, then remove the staging directory."""
+    import shutil
+
+    try:
+        if ok:
+            retain(stage, outdir)
+    finally:
+        shutil.rmtree(stage, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def staged(outdir: Path, scratch: Path) -> Iterator[Path]:
+    """gem5 output directory of a lean run; the retained files reach outdir if the block succeeds."""
+    stage = stage_dir(scratch, outdir)
+    ok = False
+    try:
+        yield stage
+        ok = True
+    finally:
+        finish(stage, outdir, ok)
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stand-in gem5 executable for load-testing the sweep orchestration
+(l1_sweep.py run/grid/sample, TP5 script_bench.sh) without simulating.
+
+It takes gem5 command lines:
+
+    mock_gem5.py [-d DIR | --outdir=DIR] [-r] [-e] <config.py> [config options]
+
+with the options of se_core.py (--cmd, --l1i, --l1d, --num-cpus, --set,
+--options ...) and of se.py (-c, -o "args", -n, --cpu-type, --o3-width).
+Unknown options are ignored. Like gem5 it writes config.ini/config.json
+(L1 sizes, widths, and the --set fields collect reads back: l2_size,
+rob_entries, ...), config.dot*, citations.bib and an empty stats.txt at
+start-up, spends the simulated run's cost, then writes stats.txt from the
+synth_stats.py model of the run and prints "Exiting @ tick ...".
+
+The cost model and the fault injection come from MOCK_GEM5_CONFIG (a JSON
+file) and MOCK_GEM5_<KEY> environment variables, see DEFAULTS. A run fails,
+hangs or is OOM-killed either with a probability (*_rate) or when its
+command line matches a regex (*_match); the draws are seeded by the command
+line, so the same run behaves the same way on every attempt.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import re
+import shlex
+import shutil
+import signal
+import socket
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+import synth_stats
+
+DEFAULTS: Dict[str, Any] = {
+    "seconds": 0.2,      # fixed cost of a run (s)
+    "per_minst": 0.0,    # + seconds per million simulated instructions
+    "jitter": 0.1,       # +-fraction applied to the cost
+    "mode": "sleep",     # sleep | cpu (busy loop)
+    "memory_mb": 0,      # memory touched for the whole run
+    "fail_rate": 0.0,    # fatal error, exit 1
+    "fail_match": "",
+    "hang_rate": 0.0,    # never finishes, no output (until killed)
+    "hang_match": "",
+    "oom_rate": 0.0,     # allocates oom_mb, then SIGKILL like the OOM killer
+    "oom_match": "",
+    "oom_mb": 256,
+    "seed": 0,
+    "dumps": 1,          # statistics blocks in stats.txt
+    "names": "auto",     # stat names: new (gem5 >= 23), old (gem5-stable), auto: old with se.py options
+    "template": "",      # m5out used as template (default: synth_stats A15 template)
+}
+
+# gem5 options that take a value (before the config script)
+GEM5_VALUE_OPTIONS = {
+    "-d", "--outdir", "--stdout-file", "--stderr-file", "--debug-flags", "--debug-file",
+    "--debug-start", "--debug-end", "--listener-mode", "--stats-file", "--dump-config", "--json-config",
+    "--dot-config", "--dot-dvfs-config", "--remote-gdb-port",
+}
+# config options that take a value; the others are flags
+CONFIG_VALUE_OPTIONS = {
+    "--cmd", "-c", "-o", "--l1i", "--l1d", "--num-cpus", "-n", "--set", "--cpu-type", "--o3-width",
+    "--profile", "--clock", "--mem-size", "--env", "--bpred", "--btb-entries", "--l1d-prefetcher",
+    "--l2-prefetcher", "--prefetch-degree", "--prefetch-distance", "--maxinsts", "--out",
+    "--heartbeat",
+}
+TEMPLATE_EXTRAS = ["config.dot", "config.dot.pdf", "config.dot.svg", "citations.bib"]
+
+
+def load_config() -> Dict[str, Any]:
+    """DEFAULTS, then the MOCK_GEM5_CONFIG file, then MOCK_GEM5_<KEY> variables."""
+    cfg = dict(DEFAULTS)
+    path = os.environ.get("MOCK_GEM5_CONFIG")
+    if path:
+        cfg.update(json.loads(Path(path).read_text(encoding="utf-8")))
+    for key, default in DEFAULTS.items():
+        raw = os.environ.get(f"MOCK_GEM5_{key.upper()}")
+        if raw is not None:
+            cfg[key] = type(default)(raw) if not isinstance(default, str) else raw
+    return cfg
+
+
+def parse_command_line(argv: List[str]) -> Tuple[Dict[str, str], Optional[str], Dict[str, List[str]]]:
+    """(gem5 options, config script, config options) of a gem5 command line.
+
+    Options are kept as lists of values; --options takes everything after it
+    (se_core.py), -o/--options=... take one shell-quoted string (se.py).
+    """
+    gem5: Dict[str, str] = {}
+    i = 0
+    while i < len(argv) and argv[i].startswith("-"):
+        opt, eq, value = argv[i].partition("=")
+        if opt in GEM5_VALUE_OPTIONS and not eq:
+            i += 1
+            value = argv[i] if i < len(argv) else ""
+        gem5[opt] = value
+        i += 1
+    if i == len(argv):
+        return gem5, None, {}
+    script, rest = argv[i], argv[i + 1:]
+
+    config: Dict[str, List[str]] = {}
+    j = 0
+    while j < len(rest):
+        opt, eq, value = rest[j].partition("=")
+        if opt == "--options" and not eq:
+            config["--options"] = rest[j + 1:]
+            break
+        if opt in CONFIG_VALUE_OPTIONS and not eq:
+            j += 1
+            value = rest[j] if j < len(rest) else ""
+        if opt in ("-o", "--options"):
+            config.setdefault("--options", []).extend(shlex.split(value))
+        else:
+            config.setdefault(opt, []).append(value)
+        j += 1
+    return gem5, script, config
+
+
+def _last(config: Dict[str, List[str]], *names: str) -> Optional[str]:
+    for name in names:
+        if config.get(name):
+            return config[name][-1]
+    return None
+
+
+def _overrides(config: Dict[str, List[str]]) -> Dict[str, str]:
+    return dict(o.split("=", 1) for o in config.get("--set", []) if "=" in o)
+
+
+# ---------------- m5out ----------------
+
+def run_model(config: Dict[str, List[str]], cfg: Dict[str, Any], template_dir: Path,
+              rng: random.Random) -> Tuple[str, int, int]:
+    """(stats.txt text, simulated instructions, final tick) of the run."""
+    from cacti import size_to_bytes
+
+    stats_text = (template_dir / "stats.txt").read_text(encoding="utf-8", errors="ignore")
+    sets = _overrides(config)
+    num_cpus = int(_last(config, "--num-cpus", "-n") or sets.get("num_cpus", 1))
+    old_names = cfg["names"] == "old" or (cfg["names"] == "auto" and "--cpu-type" in config)
+    cmd = _last(config, "--cmd", "-c") or "a.out"
+    options = config.get("--options", [])
+
+    if num_cpus == 1 and not old_names:
+        template, base = synth_stats.stats_template(stats_text, synth_stats.MODEL_STATS)
+        l1i = _last(config, "--l1i") or sets.get("l1i_size")
+        l1d = _last(config, "--l1d") or sets.get("l1d_size")
+        name = template_dir.name
+        ref = size_to_bytes(name.replace("l1_", "")) if name.startswith("l1_") else 16384
+        l1_bytes = size_to_bytes(l1d or l1i or "16kB")
+        scale = synth_stats._bench_scale(" ".join([Path(cmd).name, *options]))
+        values = synth_stats.tp4_values(base, l1_bytes, ref, scale, rng)
+        dumps = [template.render(v) for v in synth_stats.split_dumps(values, cfg["dumps"])]
+        return "".join(dumps), int(values["simInsts"]), int(values["finalTick"])
+
+    # Multi-core: OpenMP matrix product model (matrix size from "-o 'threads size'")
+    _, base = synth_stats.stats_template(stats_text, synth_stats.MODEL_STATS)
+    slots = ["simSeconds", "simTicks", "finalTick", "simInsts", "simOps", "hostSeconds", *synth_stats.TP5_CPU_STATS]
+    renames = synth_stats.TP5_RENAMES if old_names else {}
+    # gem5 names a single core system.cpu, several cores system.cpuN
+    multi = num_cpus > 1
+    template, _ = synth_stats.stats_template(stats_text, slots, num_cpus=num_cpus if multi else None, renames=renames)
+    matrix = int(options[1]) if len(options) > 1 and options[1].isdigit() else 64
+    width = int(_last(config, "--o3-width") or 4)
+    glob, cores = synth_stats.tp5_values(base, matrix, width, num_cpus, rng)
+    if not old_names:
+        new = {v: k for k, v in synth_stats.TP5_RENAMES.items()}
+        glob = {new.get(k, k): v for k, v in glob.items()}
+        cores = [{("commitStats0.numInsts" if k == "committedInsts" else k): v for k, v in c.items()} for c in cores]
+    core_dumps = [list(synth_stats.split_dumps(c, cfg["dumps"])) for c in cores]
+    chunks = []
+    for j, g in enumerate(synth_stats.split_dumps(glob, cfg["dumps"])):
+        values: Dict[str, object] = dict(g)
+        for i, cd in enumerate(core_dumps):
+            prefix = f"system.cpu{i}." if multi else "system.cpu."
+            values.update({prefix + k: v for k, v in cd[j].items()})
+        chunks.append(template.render(values))
+    insts = int(glob.get("sim_insts", glob.get("simInsts", 0)))
+    tick = int(glob.get("final_tick", glob.get("finalTick", 0)))
+    return "".join(chunks), insts, tick
+
+
+def cpu_ini(text: str, num_cpus: int) -> str:
+    """config.ini with one [system.cpuN*] copy of the system.cpu sections per core."""
+    if num_cpus == 1:
+        return text
+    sections = re.split(r"(?m)^(?=\[)", text)
+    out = []
+    for sec in sections:
+        name = sec[1:sec.find("]")] if sec.startswith("[") else ""
+        if name == "system.cpu" or name.startswith("system.cpu."):
+            out.extend(f"[system.cpu{i}{sec[len('[system.cpu'):]}" for i in range(num_cpus))
+        else:
+            out.append(sec)
+    return "".join(out)
+
+
+def write_config(outdir: Path, template_dir: Path, config: Dict[str, List[str]],
+                 gem5: Optional[Dict[str, str]] = None) -> int:
+    """config.ini/json and the other start-up files; returns the number of cores.
+
+    Like gem5, --dump-config/--json-config/--dot-config name the files and an
+    empty value turns them off (--dot-config= writes no config.dot*).
+    """
+    gem5 = gem5 or {}
+    ini_name = gem5.get("--dump-config", "config.ini")
+    json_name = gem5.get("--json-config", "config.json")
+    dot_name = gem5.get("--dot-config", "config.dot")
+    sets = _overrides(config)
+    num_cpus = int(_last(config, "--num-cpus", "-n") or sets.get("num_cpus", 1))
+    l1i = _last(config, "--l1i") or sets.get("l1i_size")
+    l1d = _last(config, "--l1d") or sets.get("l1d_size")
+    width = _last(config, "--o3-width")
+    ini_params = {}
+    json_params = {}
+    if l1i:
+        ini_params[(synth_stats.ICACHE, "size")] = "l1i"
+        json_params[("system", "cpu", "icache", "size")] = "l1i"
+    if l1d:
+        ini_params[(synth_stats.DCACHE, "size")] = "l1d"
+        json_params[("system", "cpu", "dcache", "size")] = "l1d"
+    if width:
+        for k in synth_stats.TP5_WIDTH_PARAMS:
+            ini_params[("system.cpu", k)] = "width"
+            json_params[("system", "cpu", k)] = "width"
+
+    from cacti import size_to_bytes
+    from l1_sweep import CONFIG_PARAMS
+
+    values: Dict[str, object] = {"l1i": size_to_bytes(l1i) if l1i else None,
+                                 "l1d": size_to_bytes(l1d) if l1d else None,
+                                 "width": int(width) if width else None}
+    # Other --set fields that collect reads back from config.ini (l2_size, rob_entries, ...)
+    for field, (section, key) in CONFIG_PARAMS.items():
+        if field not in sets or field in ("l1i_size", "l1d_size"):
+            continue
+        path = ("system",) + (() if section == "system" else tuple(section.split(".")))
+        ini_params[(".".join(path), key)] = field
+        json_params[path + (key,)] = field
+        values[field] = size_to_bytes(sets[field]) if field.endswith("_size") else sets[field]
+    ini = synth_stats.ini_template((template_dir / "config.ini").read_text(encoding="utf-8"), ini_params)
+    cfg_json = synth_stats.json_template((template_dir / "config.json").read_text(encoding="utf-8"), json_params)
+    if ini_name:
+        (outdir / ini_name).write_text(cpu_ini(ini.render(values), num_cpus), encoding="utf-8")
+    if json_name:
+        (outdir / json_name).write_text(cfg_json.render(values), encoding="utf-8")
+    for name in TEMPLATE_EXTRAS:
+        if name.startswith("config.dot"):
+            if not dot_name:
+                continue
+            target = dot_name + name[len("config.dot"):]
+        else:
+            target = name
+        if (template_dir / name).exists():
+            shutil.copyfile(template_dir / name, outdir / target)
+    return num_cpus
+
+
+# ---------------- Cost and faults ----------------
+
+def _triggered(kind: str, cfg: Dict[str, Any], command: str, rng: random.Random) -> bool:
+    draw = rng.random()
+    pattern = cfg[f"{kind}_match"]
+    return draw < float(cfg[f"{kind}_rate"]) or bool(pattern and re.search(pattern, command))
+
+
+# Memory of an OOM run, held until its SIGKILL
+_OOM_HOG: List[bytearray] = []
+
+
+def _touch(mb: float) -> bytearray:
+    buf = bytearray(int(mb * 2**20))
+    buf[::4096] = b"\x01" * len(range(0, len(buf), 4096))
+    return buf
+
+
+def spend(seconds: float, mode: str) -> None:
+    deadline = time.monotonic() + seconds
+    if mode == "cpu":
+        x = 0
+        while time.monotonic() < deadline:
+            for _ in range(10000):
+                x = (x * 1103515245 + 12345) & 0x7FFFFFFF
+    else:
+        time.sleep(max(0.0, seconds))
+
+
+def simulate(cost: float, fraction: float, tick: int, insts: int, heartbeat: int, mode: str, out: TextIO) -> None:
+    """Spend fraction * cost, with the se_core.py heartbeat lines of that part of the run."""
+    steps = min(1000, tick // heartbeat) if heartbeat > 0 else 0
+    done = 0
+    for k in range(1, steps + 1):
+        if k / steps > fraction:
+            break
+        spend(cost / steps, mode)
+        done = k
+        out.write(f"heartbeat @ tick {tick * k // steps} insts {insts * k // steps}\n")
+        out.flush()
+    spend(cost * fraction - (cost * done / steps if steps else 0.0), mode)
+
+
+def banner(out: TextIO, argv: List[str]) -> None:
+    out.write(
+        "gem5 Simulator System.  https://www.gem5.org\n"
+        "gem5 is copyrighted software; use the --copyright option for details.\n\n"
+        "gem5 version 24.0.0.0 (mock_gem5.py)\n"
+        f"gem5 compiled {datetime.now():%b %d %Y %H:%M:%S}\n"
+        f"gem5 started {datetime.now():%b %d %Y %H:%M:%S}\n"
+        f"gem5 executing on {socket.gethostname()}, pid {os.getpid()}\n"
+        f"command line: {' '.join(shlex.quote(a) for a in argv)}\n\n"
+    )
+    out.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    full = [sys.argv[0], *argv]
+    gem5, script, config = parse_command_line(argv)
+    if script is None:
+        sys.stderr.write("usage: mock_gem5.py [gem5 options] <config.py> [config options]\n")
+        return 1
+    cfg = load_config()
+
+    outdir = Path(gem5.get("--outdir") or gem5.get("-d") or "m5out")
+    outdir.mkdir(parents=True, exist_ok=True)
+    out: TextIO = sys.stdout
+    err: TextIO = sys.stderr
+    if "-r" in gem5 or "--redirect-stdout" in gem5:
+        out = (outdir / (gem5.get("--stdout-file") or "simout")).open("w", encoding="utf-8")
+    if "-e" in gem5 or "--redirect-stderr" in gem5:
+        err = (outdir / (gem5.get("--stderr-file") or "simerr")).open("w", encoding="utf-8")
+    banner(out, full)
+
+    if not Path(script).exists():
+        err.write(f"fatal: Could not open script {script}: No such file or directory\n")
+        return 1
+    if not (_last(config, "--cmd", "-c")):
+        err.write(f"fatal: {script}: no --cmd/-c binary to run\n")
+        return 1
+
+    heartbeat = int(_last(config, "--heartbeat") or 0)
+    command = " ".join(full)
+    rng = random.Random(f"{cfg['seed']}|{command}")
+    template_dir = Path(cfg["template"]) if cfg["template"] else synth_stats.TEMPLATE_DIRS["A15"]
+    write_config(outdir, template_dir, config, gem5)
+    # gem5 opens stats.txt at start-up: a run that dies leaves it empty
+    (outdir / "stats.txt").write_text("", encoding="utf-8")
+    out.write("**** REAL SIMULATION ****\n")
+    out.flush()
+
+    stats, insts, tick = run_model(config, cfg, template_dir, rng)
+    cost = (float(cfg["seconds"]) + float(cfg["per_minst"]) * insts / 1e6) * rng.uniform(1 - cfg["jitter"], 1 + cfg["jitter"])
+    memory = _touch(float(cfg["memory_mb"])) if cfg["memory_mb"] else None
+
+    if _triggered("oom", cfg, command, rng):
+        simulate(cost, rng.random(), tick, insts, heartbeat, cfg["mode"], out)
+        _OOM_HOG.append(_touch(float(cfg["oom_mb"])))
+        os.kill(os.getpid(), signal.SIGKILL)
+    if _triggered("hang", cfg, command, rng):
+        simulate(cost, rng.random(), tick, insts, heartbeat, cfg["mode"], out)
+        while True:
+            time.sleep(3600)
+    if _triggered("fail", cfg, command, rng):
+        simulate(cost, rng.random(), tick, insts, heartbeat, cfg["mode"], out)
+        err.write(f"fatal: mock_gem5: injected failure ({script})\n")
+        err.flush()
+        return 1
+
+    simulate(cost, 1.0, tick, insts, heartbeat, cfg["mode"], out)
+    (outdir / "stats.txt").write_text(stats, encoding="utf-8")
+    out.write(f"Exiting @ tick {tick} because exiting with last active thread context\n")
+    out.flush()
+    del memory
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
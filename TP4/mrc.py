@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Trace-driven miss-ratio curves for the L1 caches. gem5 runs once per
+benchmark with CommMonitor/MemTraceProbe between the CPU and its L1s
+(se_core.py --mem-trace); the packet traces are converted to delta-encoded
+.npy files, and LRU stack distances (Mattson) give the miss rate of every
+L1 size and associativity in one pass per number of sets, instead of one
+O3 simulation per size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cacti import format_size, size_to_bytes
+from core_profiles import get_profile
+from l1_sweep import (
+    ROOT,
+    default_sizes,
+    discover_binaries,
+    parse_bench_list,
+    run_gem5,
+    run_parallel,
+)
+import profiling
+
+
+STREAMS = {"i": "icache", "d": "dcache"}
+TRACE_MAGIC = 0x356D6567  # "gem5", protobuf packet trace header
+DEFAULT_ASSOCS = [1, 2, 4, 8]
+
+
+# ---------------- Trace conversion ----------------
+
+def _read_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        value |= (b & 0x7F) << shift
+        if b < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _skip_header(buf: bytes) -> Tuple[int, int]:
+    """Check the magic number, skip the PacketHeader message; returns (tick_freq, offset)."""
+    if len(buf) < 4 or int.from_bytes(buf[:4], "little") != TRACE_MAGIC:
+        raise ValueError("not a gem5 packet trace (bad magic number)")
+    size, pos = _read_varint(buf, 4)
+    end = pos + size
+    tick_freq = 0
+    while pos < end:
+        tag, pos = _read_varint(buf, pos)
+        if tag & 7 == 0:
+            value, pos = _read_varint(buf, pos)
+            if tag >> 3 == 3:
+                tick_freq = value
+        elif tag & 7 == 2:
+            length, pos = _read_varint(buf, pos)
+            pos += length
+        else:
+            raise ValueError(f"unexpected wire type {tag & 7} in trace header")
+    return tick_freq, end
+
+
+def decode_packet_trace(path: Path) -> Dict[str, np.ndarray]:
+    """Addresses / commands / sizes of a MemTraceProbe trace (.trc or .trc.gz).
+
+    Packet messages only hold varint fields, so every varint of the body is
+    decoded at once with NumPy; only the message boundaries are walked in Python.
+    """
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rb") as fh:  # type: ignore[operator]
+        buf = fh.read()
+    _, offset = _skip_header(buf)
+
+    body = np.frombuffer(buf, dtype=np.uint8, offset=offset)
+    if body.size == 0:
+        return {k: np.zeros(0, dtype=np.uint64) for k in ("addr", "cmd", "size")}
+    is_end = body < 0x80
+    ends = np.flatnonzero(is_end)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    token_of_byte = np.concatenate(([0], np.cumsum(is_end)[:-1]))
+    shift = (np.arange(body.size) - starts[token_of_byte]) * 7
+    parts = (body & 0x7F).astype(np.uint64) << shift.astype(np.uint64)
+    values = np.bitwise_or.reduceat(parts, starts)
+
+    # Message boundaries: length prefix -> first token after the message
+    lengths = values.tolist()
+    end_list = ends.tolist()
+    tob = token_of_byte
+    heads: List[int] = []
+    t, n_tokens = 0, len(lengths)
+    while t < n_tokens:
+        heads.append(t)
+        nxt = end_list[t] + lengths[t] + 1
+        t = int(tob[nxt]) if nxt < body.size else n_tokens
+
+    heads_arr = np.asarray(heads)
+    msg_of_token = np.searchsorted(heads_arr, np.arange(n_tokens), side="right") - 1
+    offset_in_msg = np.arange(n_tokens) - heads_arr[msg_of_token]
+    tag_pos = np.flatnonzero((offset_in_msg % 2 == 1))
+    tags = values[tag_pos]
+    if np.any(tags & 7):
+        raise ValueError("non-varint field in a packet message (unsupported trace version)")
+    fields = tags >> 3
+
+    out: Dict[str, np.ndarray] = {}
+    for name, number in (("cmd", 2), ("addr", 3), ("size", 4)):
+        sel = tag_pos[fields == number]
+        if sel.size != len(heads):
+            raise ValueError(f"field {name} missing in some packets")
+        out[name] = values[sel + 1]
+    return out
+
+
+def write_trace(addrs: np.ndarray, path: Path) -> Dict[str, object]:
+    """Delta-encoded addresses in the smallest integer type that holds every delta."""
+    addrs = addrs.astype(np.int64)
+    base = int(addrs[0]) if addrs.size else 0
+    deltas = np.diff(addrs, prepend=base)
+    dtype = np.int64
+    for candidate in (np.int16, np.int32):
+        info = np.iinfo(candidate)
+        if deltas.size == 0 or (deltas.min() >= info.min and deltas.max() <= info.max):
+            dtype = candidate
+            break
+    np.save(path, deltas.astype(dtype))
+    return {"base": base, "count": int(addrs.size), "dtype": np.dtype(dtype).name}
+
+
+def load_trace(path: Path, meta: Dict[str, object]) -> np.ndarray:
+    """Byte addresses back from a delta-encoded trace (memory-mapped read)."""
+    deltas = np.load(path, mmap_mode="r")
+    return np.cumsum(deltas, dtype=np.int64) + int(meta["base"])  # type: ignore[arg-type]
+
+
+def convert_run(run_dir: Path) -> Dict[str, object]:
+    """icache/dcache .trc.gz of a gem5 run -> i_trace.npy, d_trace.npy, trace.json."""
+    meta: Dict[str, object] = {}
+    for stream, name in STREAMS.items():
+        src = next((p for p in (run_dir / f"{name}.trc.gz", run_dir / f"{name}.trc") if p.exists()), None)
+        if src is None:
+            raise FileNotFoundError(f"{run_dir}: {name}.trc.gz nao encontrado (gem5 com --mem-trace?)")
+        packets = decode_packet_trace(src)
+        meta[stream] = write_trace(packets["addr"], run_dir / f"{stream}_trace.npy")
+    (run_dir / "trace.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return meta
+
+
+# ---------------- Stack distances ----------------
+
+def _count_earlier_leq(v: np.ndarray) -> np.ndarray:
+    """For each i, #{k < i : v[k] <= v[i]} (bottom-up merge sort, each level vectorized)."""
+    n = v.size
+    counts = np.zeros(n, dtype=np.int64)
+    order = np.arange(n)  # sorted by (block of w, v) at each level
+    vv = v.astype(np.int64) + 1
+    w = 1
+    while w < n:
+        # order is made of sorted runs of w: a stable sort by (pair, v) merges
+        # them and keeps left-block elements before right-block ones on ties
+        pair = order // (2 * w)
+        merged = order[np.argsort(pair * (n + 2) + vv[order], kind="stable")]
+        left = (merged // w) % 2 == 0
+        cum_left = np.cumsum(left)
+        pair_m = merged // (2 * w)
+        seg_start = np.concatenate(([True], pair_m[1:] != pair_m[:-1]))
+        base = (cum_left - left)[seg_start][np.cumsum(seg_start) - 1]
+        right = ~left
+        counts[merged[right]] += (cum_left - base)[right]
+        order = merged
+        w *= 2
+    return counts
+
+
+def stack_distances(blocks: np.ndarray) -> np.ndarray:
+    """LRU stack distance of each access (-1 = first access).
+
+    distance(i) = distinct blocks accessed since the previous access p to the
+    same block = #{k in (p, i) : prev(k) <= p} = #{k < i : prev(k) <= p} - (p + 1).
+    """
+    n = blocks.size
+    prev = np.full(n, -1, dtype=np.int64)
+    if n == 0:
+        return prev
+    order = np.argsort(blocks, kind="stable")
+    same = blocks[order[1:]] == blocks[order[:-1]]
+    prev[order[1:][same]] = order[:-1][same]
+    dist = _count_earlier_leq(prev) - (prev + 1)
+    dist[prev < 0] = -1
+    return dist
+
+
+def set_distance_histogram(blocks: np.ndarray, sets: int, max_assoc: int) -> Tuple[int, np.ndarray]:
+    """(cold misses, histogram of per-set stack distances capped at max_assoc)."""
+    if blocks.size == 0:
+        return 0, np.zeros(max_assoc + 1, dtype=int)
+    if sets > 1:
+        order = np.argsort(blocks % sets, kind="stable")
+        blocks = blocks[order]
+    # Back-to-back accesses to the same block (same line fetches, spatial
+    # locality) are distance-0 hits and do not change the other distances
+    repeat = np.concatenate(([False], blocks[1:] == blocks[:-1]))
+    dist = stack_distances(blocks[~repeat])
+    cold = int(np.count_nonzero(dist < 0))
+    hist = np.bincount(np.minimum(dist[dist >= 0], max_assoc), minlength=max_assoc + 1)
+    hist[0] += int(np.count_nonzero(repeat))
+    return cold, hist
+
+
+def miss_ratio_curves(
+    addrs: np.ndarray,
+    block: int,
+    sizes: Sequence[str],
+    assocs: Sequence[int],
+) -> List[Dict[str, object]]:
+    """Miss rate of every (size, assoc) LRU cache; one stack-distance pass per number of sets."""
+    blocks = addrs // block
+    configs: Dict[int, List[Tuple[str, int]]] = {}
+    for size in sizes:
+        n_blocks = size_to_bytes(size) // block
+        for assoc in assocs:
+            if n_blocks % assoc or n_blocks // assoc < 1:
+                continue
+            configs.setdefault(n_blocks // assoc, []).append((size, assoc))
+
+    rows: List[Dict[str, object]] = []
+    for sets, points in sorted(configs.items()):
+        max_assoc = max(a for _, a in points)
+        cold, hist = set_distance_histogram(blocks, sets, max_assoc)
+        for size, assoc in points:
+            # hit iff fewer than assoc distinct blocks of the set since the last use
+            misses = cold + int(hist[assoc:].sum())
+            rows.append({
+                "size": format_size(size_to_bytes(size)),
+                "assoc": assoc,
+                "sets": sets,
+                "block": block,
+                "accesses": int(addrs.size),
+                "misses": misses,
+                "miss_rate": misses / addrs.size if addrs.size else None,
+            })
+    rows.sort(key=lambda r: (size_to_bytes(str(r["size"])), r["assoc"]))
+    return rows
+
+
+# ---------------- Commands ----------------
+
+def run_capture(args: argparse.Namespace) -> None:
+    gem5_bin = Path(args.gem5).expanduser().resolve()
+    cfg = Path(args.cfg).expanduser().resolve()
+    out_root = Path(args.out_root).expanduser().resolve()
+    benches = parse_bench_list(args.bench) if args.bench else discover_binaries(ROOT)
+    if not benches:
+        raise SystemExit("Nenhum binário encontrado (.riscv). Use --bench.")
+
+    def capture(outdir: Path, bench_path: Path, bench_opts: List[str]) -> None:
+        run_gem5(
+            gem5_bin=gem5_bin,
+            cfg=cfg,
+            outdir=outdir,
+            cmd=bench_path,
+            l1i=None,
+            l1d=None,
+            options=bench_opts,
+            extra_args=["--mem-trace"] + [f"--set={o}" for o in args.set],
+        )
+        meta = convert_run(outdir)
+        print(f"{outdir.parent.name}: {meta['i']['count']} acessos I, {meta['d']['count']} acessos D")  # type: ignore[index]
+
+    tasks = []
+    for bench_name, bench_path, bench_opts in benches:
+        outdir = out_root / args.cpu / bench_name / "trace"
+        if (outdir / "trace.json").exists() and not args.force:
+            continue
+        tasks.append((bench_name, lambda o=outdir, p=bench_path, a=bench_opts: capture(o, p, a)))
+    failed = run_parallel(tasks, args.jobs)
+    if failed:
+        raise SystemExit(f"{failed} capturas falharam")
+
+
+def collect_curves(
+    out_root: Path,
+    cpu: str,
+    sizes: Sequence[str],
+    assocs: Sequence[int],
+    block: Optional[int] = None,
+) -> List[Dict[str, object]]:
+    block = block or int(get_profile(cpu)["cache_line_size"])
+    rows: List[Dict[str, object]] = []
+    for meta_path in sorted((out_root / cpu).glob("*/trace/trace.json")):
+        run_dir = meta_path.parent
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        for stream in STREAMS:
+            addrs = load_trace(run_dir / f"{stream}_trace.npy", meta[stream])
+            for row in miss_ratio_curves(addrs, block, sizes, assocs):
+                rows.append(dict(bench=run_dir.parent.name, stream=stream, **row))
+    return rows
+
+
+MRC_FIELDS = ["bench", "stream", "size", "assoc", "sets", "block", "accesses", "misses", "miss_rate"]
+
+
+def write_curves_csv(rows: List[Dict[str, object]], csv_path: Path) -> None:
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    with csv_path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=MRC_FIELDS)
+        writer.writeheader()
+        for r in rows:
+            writer.writerow({k: r.get(k) for k in MRC_FIELDS})
+
+
+def plot_curves(rows: List[Dict[str, object]], cpu: str, out_dir: Path) -> None:
+    """Per benchmark: I$ and D$ miss rate vs size, one line per associativity."""
+    import matplotlib.pyplot as plt
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for bench in sorted({str(r["bench"]) for r in rows}):
+        fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+        for ax, (stream, name) in zip(axes, STREAMS.items()):
+            sel = [r for r in rows if r["bench"] == bench and r["stream"] == stream]
+            for assoc in sorted({int(r["assoc"]) for r in sel}):  # type: ignore[call-overload]
+                # trace vazio: miss_rate None, sem curva
+                pts = sorted(
+                    (r for r in sel if r["assoc"] == assoc and r["miss_rate"] is not None),
+                    key=lambda r: size_to_bytes(str(r["size"])),
+                )
+                ax.plot(
+                    [str(r["size"]) for r in pts],
+                    [float(r["miss_rate"]) for r in pts],  # type: ignore[arg-type]
+                    marker="o",
+                    label=f"{assoc}-way",
+                )
+            ax.set_title(f"{name} miss rate")
+            ax.set_xlabel("L1 size")
+            ax.set_ylabel("Miss rate")
+            ax.grid(True, alpha=0.3)
+            ax.legend()
+        fig.suptitle(f"{bench} - LRU miss-ratio curves (Cortex {cpu})")
+        fig.tight_layout()
+        fig.savefig(out_dir / f"{bench}_mrc.png", dpi=160)
+        plt.close(fig)
+
+
+# Etapas medidas com --profile
+PROFILE_STAGES = [
+    "run_capture", "convert_run", "load_trace", "stack_distances", "miss_ratio_curves",
+    "collect_curves", "write_curves_csv", "plot_curves",
+]
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Trace-driven L1 miss-ratio curves (one gem5 run per benchmark)")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    capture = sub.add_parser("capture", help="simula uma vez com --mem-trace e converte os traces")
+    capture.add_argument("--cpu", required=True, choices=["A7", "A15"])
+    capture.add_argument("--gem5", required=True, help="caminho do gem5.opt (compilado com protobuf)")
+    capture.add_argument("--cfg", required=True, help="script se_A7.py ou se_A15.py")
+    capture.add_argument("--out-root", default=str(ROOT / "results_mrc"))
+    capture.add_argument("--bench", action="append", default=[], help="nome:caminho ou caminho do binario")
+    capture.add_argument("--set", action="append", default=[], help="campo=valor do perfil")
+    capture.add_argument("--jobs", type=int, default=4, help="simulacoes gem5 em paralelo")
+    capture.add_argument("--force", action="store_true", help="refaz capturas existentes")
+
+    convert = sub.add_parser("convert", help="converte icache/dcache.trc.gz de um m5out existente")
+    convert.add_argument("run_dir", nargs="+")
+
+    curves = sub.add_parser("curves", help="calcula as curvas de miss rate (CSV + graficos)")
+    curves.add_argument("--cpu", required=True, choices=["A7", "A15"])
+    curves.add_argument("--out-root", default=str(ROOT / "results_mrc"))
+    curves.add_argument("--sizes", nargs="+", help="tamanhos L1 (default: os do l1_sweep)")
+    curves.add_argument("--assoc", nargs="+", type=int, default=DEFAULT_ASSOCS)
+    curves.add_argument("--block", type=int, default=None, help="tamanho de bloco (default: perfil)")
+    curves.add_argument("--csv", default=None, help="default: <out-root>/mrc_<cpu>.csv")
+    curves.add_argument("--no-plot", action="store_true")
+
+    for sp in sub.choices.values():
+        profiling.add_arguments(sp)
+    return p
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    profiling.start(args, f"mrc {args.cmd}", globals(), PROFILE_STAGES)
+
+    if args.cmd == "capture":
+        run_capture(args)
+        return
+
+    if args.cmd == "convert":
+        for run_dir in args.run_dir:
+            meta = convert_run(Path(run_dir))
+            print(f"{run_dir}: {meta['i']['count']} acessos I, {meta['d']['count']} acessos D")  # type: ignore[index]
+        return
+
+    out_root = Path(args.out_root).expanduser().resolve()
+    sizes = args.sizes or default_sizes(args.cpu) + ["32kB"]
+    rows = collect_curves(out_root, args.cpu, sorted(set(sizes), key=size_to_bytes), args.assoc, args.block)
+    if not rows:
+        raise SystemExit("Nenhum trace encontrado (rode mrc.py capture)")
+    csv_path = Path(args.csv) if args.csv else out_root / f"mrc_{args.cpu}.csv"
+    write_curves_csv(rows, csv_path)
+    print(f"Wrote {csv_path}")
+    if not args.no_plot:
+        out_dir = out_root / f"figures_{args.cpu}"
+        plot_curves(rows, args.cpu, out_dir)
+        print(f"Plots saved to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Find Pareto-optimal (non-dominated) configurations per benchmark over any set
+of objectives (IPC, energy per instruction, sim_seconds, L1 area, ...).
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import csv
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from cacti import CACTI_DIR, l1_area_mm2, load_cacti_results
+from energy_efficiency import POWER_CONSUMPTION, load_csv
+import profiling
+
+
+ROOT = Path(__file__).resolve().parent
+RESULTS_DIR = ROOT / "Projet" / "results_l1"
+
+DEFAULT_OBJECTIVES = ["ipc:max", "energy_per_inst:min", "l1_area:min"]
+
+OBJECTIVE_LABELS = {
+    "ipc": "IPC",
+    "cpi": "CPI",
+    "sim_seconds": "Tempo simulado (s)",
+    "energy_per_inst": "Energy per instruction (nJ)",
+    "l1_area": "L1 area I+D (mm2)",
+}
+
+
+def parse_objective(spec: str) -> Tuple[str, str]:
+    """Parse 'name:min' / 'name:max' (default min)."""
+    name, _, sense = spec.partition(":")
+    sense = sense or "min"
+    if sense not in ("min", "max"):
+        raise SystemExit(f"Objetivo invalido: {spec} (use nome:min ou nome:max)")
+    return name, sense
+
+
+def parse_clock(clock: str) -> float:
+    """Convert a gem5 clock string (ex: 2GHz, 800MHz) to Hz."""
+    units = {"ghz": 1e9, "mhz": 1e6, "khz": 1e3, "hz": 1.0}
+    lower = clock.strip().lower()
+    for unit, scale in units.items():
+        if lower.endswith(unit):
+            return float(lower[: -len(unit)]) * scale
+    return float(lower)
+
+
+def _to_float(value: object) -> Optional[float]:
+    if value is None or value == "" or value == "None":
+        return None
+    try:
+        return float(value)  # type: ignore[arg-type]
+    except ValueError:
+        return None
+
+
+def load_configs(inputs: Sequence[str], clock_hz: float) -> List[Dict[str, object]]:
+    """Load l1_sweep CSVs (CPU=path) and add derived objective columns."""
+    cacti = load_cacti_results(CACTI_DIR)
+    rows: List[Dict[str, object]] = []
+    for spec in inputs:
+        if "=" not in spec:
+            raise SystemExit(f"--input invalido: {spec} (use CPU=caminho.csv)")
+        cpu, path = spec.split("=", 1)
+        for row in load_csv(Path(path).expanduser().resolve()):
+            cfg: Dict[str, object] = dict(row)
+            cfg["cpu"] = cpu
+            ipc = _to_float(row.get("ipc"))
+            power = POWER_CONSUMPTION.get(cpu)
+            # E/inst = P * t / N = P / (IPC * f)
+            if ipc and power is not None:
+                cfg["energy_per_inst"] = power * 1e-3 / (ipc * clock_hz) * 1e9
+            cfg["l1_area"] = l1_area_mm2(cacti, cpu, row.get("l1_size", ""))
+            rows.append(cfg)
+    return rows
+
+
+def _dominates(a: Sequence[float], b: Sequence[float]) -> bool:
+    return all(x <= y for x, y in zip(a, b)) and any(x < y for x, y in zip(a, b))
+
+
+def _front_2d(points: List[Tuple[float, ...]]) -> List[bool]:
+    order = sorted(range(len(points)), key=lambda i: points[i])
+    keep = [False] * len(points)
+    best = float("inf")
+    for i in order:
+        if points[i][1] < best:
+            best = points[i][1]
+            keep[i] = True
+    return keep
+
+
+def _front_3d(points: List[Tuple[float, ...]]) -> List[bool]:
+    # Kung et al.: sweep on f1, keep a staircase of (f2, f3) with f3 decreasing.
+    order = sorted(range(len(points)), key=lambda i: points[i])
+    keep = [False] * len(points)
+    stair_f2: List[float] = []
+    stair_f3: List[float] = []
+    for i in order:
+        _, f2, f3 = points[i]
+        pos = bisect.bisect_right(stair_f2, f2)
+        if pos > 0 and stair_f3[pos - 1] <= f3:
+            continue
+        keep[i] = True
+        start = pos - 1 if pos > 0 and stair_f2[pos - 1] == f2 else pos
+        end = pos
+        while end < len(stair_f2) and stair_f3[end] >= f3:
+            end += 1
+        stair_f2[start:end] = [f2]
+        stair_f3[start:end] = [f3]
+    return keep
+
+
+def _front_nd(points: List[Tuple[float, ...]]) -> List[bool]:
+    return [
+        not any(_dominates(q, p) for q in points if q != p)
+        for p in points
+    ]
+
+
+def pareto_mask(points: List[Tuple[float, ...]]) -> List[bool]:
+    """Non-dominated flags (all objectives minimized).
+
+    O(n log n) for two and three objectives, O(k n^2) otherwise. Identical
+    points do not dominate each other, so duplicates share the same flag.
+    """
+    if not points:
+        return []
+    unique = sorted(set(points))
+    dims = len(unique[0])
+    if dims == 1:
+        best = unique[0]
+        unique_keep = [p == best for p in unique]
+    elif dims == 2:
+        unique_keep = _front_2d(unique)
+    elif dims == 3:
+        unique_keep = _front_3d(unique)
+    else:
+        unique_keep = _front_nd(unique)
+    flags = dict(zip(unique, unique_keep))
+    return [flags[p] for p in points]
+
+
+def compute_fronts(
+    rows: List[Dict[str, object]],
+    objectives: List[Tuple[str, str]],
+) -> List[Dict[str, object]]:
+    """Flag the non-dominated configurations of each benchmark."""
+    results: List[Dict[str, object]] = []
+    by_bench: Dict[str, List[Dict[str, object]]] = {}
+    for row in rows:
+        by_bench.setdefault(str(row.get("bench", "")), []).append(row)
+
+    for bench in sorted(by_bench):
+        valid: List[Dict[str, object]] = []
+        points: List[Tuple[float, ...]] = []
+        for row in by_bench[bench]:
+            values = [_to_float(row.get(n)) for n, _ in objectives]
+            if any(v is None for v in values):
+                print(f"[pareto] ignorado {bench} {row.get('cpu')} {row.get('l1_size')}: objetivo ausente")
+                continue
+            points.append(tuple(
+                -v if sense == "max" else v  # type: ignore[operator]
+                for v, (_, sense) in zip(values, objectives)
+            ))
+            valid.append(row)
+        for row, flag in zip(valid, pareto_mask(points)):
+            out = dict(row)
+            out["pareto"] = int(flag)
+            results.append(out)
+    return results
+
+
+def write_fronts_csv(
+    rows: List[Dict[str, object]],
+    objectives: List[Tuple[str, str]],
+    csv_path: Path,
+) -> None:
+    if not rows:
+        return
+    fieldnames = ["bench", "cpu", "l1_size"] + [n for n, _ in objectives] + ["pareto"]
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    with csv_path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def plot_fronts(
+    rows: List[Dict[str, object]],
+    objectives: List[Tuple[str, str]],
+    out_dir: Path,
+) -> None:
+    """One figure per benchmark on the first two objectives, dominated points dimmed."""
+    import matplotlib.pyplot as plt
+
+    if len(objectives) < 2:
+        return
+    (x_key, x_sense), (y_key, y_sense) = objectives[0], objectives[1]
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    benches = sorted({str(r["bench"]) for r in rows})
+    cpus = sorted({str(r["cpu"]) for r in rows})
+    colors = {cpu: plt.get_cmap("tab10")(i % 10) for i, cpu in enumerate(cpus)}
+
+    for bench in benches:
+        bench_rows = [r for r in rows if r["bench"] == bench]
+        plt.figure(figsize=(10, 6))
+        for cpu in cpus:
+            cpu_rows = [r for r in bench_rows if r["cpu"] == cpu]
+            for flag, alpha, size in ((0, 0.25, 40), (1, 1.0, 70)):
+                sel = [r for r in cpu_rows if r["pareto"] == flag]
+                if not sel:
+                    continue
+                plt.scatter(
+                    [float(r[x_key]) for r in sel],  # type: ignore[arg-type]
+                    [float(r[y_key]) for r in sel],  # type: ignore[arg-type]
+                    color=colors[cpu],
+                    alpha=alpha,
+                    s=size,
+                    edgecolors="black" if flag else "none",
+                    label=f"Cortex {cpu}" + ("" if flag else " (dominated)"),
+                )
+            for r in cpu_rows:
+                plt.annotate(
+                    str(r["l1_size"]),
+                    (float(r[x_key]), float(r[y_key])),  # type: ignore[arg-type]
+                    textcoords="offset points",
+                    xytext=(4, 4),
+                    fontsize=8,
+                    alpha=1.0 if r["pareto"] else 0.35,
+                )
+
+        front = sorted(
+            (r for r in bench_rows if r["pareto"]),
+            key=lambda r: float(r[x_key]),  # type: ignore[arg-type]
+        )
+        if len(objectives) == 2 and len(front) > 1:
+            where = "post" if (x_sense == "min") == (y_sense == "min") else "pre"
+            plt.step(
+                [float(r[x_key]) for r in front],  # type: ignore[arg-type]
+                [float(r[y_key]) for r in front],  # type: ignore[arg-type]
+                where=where,
+                color="gray",
+                linestyle="--",
+                linewidth=1,
+            )
+
+        suffix = "" if len(objectives) == 2 else f" (front over {len(objectives)} objectives)"
+        plt.title(f"{bench} - Pareto front{suffix}")
+        plt.xlabel(f"{OBJECTIVE_LABELS.get(x_key, x_key)} ({x_sense})")
+        plt.ylabel(f"{OBJECTIVE_LABELS.get(y_key, y_key)} ({y_sense})")
+        plt.grid(True, alpha=0.3)
+        plt.legend()
+        plt.tight_layout()
+        plt.savefig(out_dir / f"{bench}_pareto_{x_key}_{y_key}.png", dpi=160)
+        plt.close()
+
+
+# Etapas medidas com --profile
+PROFILE_STAGES = [
+    "load_configs", "load_csv", "load_cacti_results", "compute_fronts", "write_fronts_csv",
+    "plot_fronts",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pareto fronts over L1 sweep results")
+    parser.add_argument(
+        "--input",
+        action="append",
+        default=[],
+        help="CPU=results.csv (repetir; default: results_A7.csv e results_A15.csv)",
+    )
+    parser.add_argument(
+        "--objective",
+        action="append",
+        default=[],
+        help=f"nome:min|max (repetir; default: {' '.join(DEFAULT_OBJECTIVES)})",
+    )
+    parser.add_argument("--clock", default="2GHz", help="clock usado para energy_per_inst")
+    parser.add_argument("--output-csv", default=str(RESULTS_DIR / "pareto.csv"))
+    parser.add_argument("--output-dir", default=str(RESULTS_DIR / "figures_pareto"))
+    parser.add_argument("--no-plot", action="store_true")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start(args, "pareto", globals(), PROFILE_STAGES)
+
+    inputs = args.input or [
+        f"{cpu}={RESULTS_DIR / f'results_{cpu}.csv'}" for cpu in ("A7", "A15")
+    ]
+    objectives = [parse_objective(s) for s in (args.objective or DEFAULT_OBJECTIVES)]
+
+    rows = load_configs(inputs, parse_clock(args.clock))
+    fronts = compute_fronts(rows, objectives)
+    write_fronts_csv(fronts, objectives, Path(args.output_csv))
+    print(f"Wrote Pareto CSV to {args.output_csv}")
+
+    if not args.no_plot:
+        plot_fronts(fronts, objectives, Path(args.output_dir))
+        print(f"Plots saved to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel figure rendering. Each figure is an independent job (a module-level
+draw function and its already grouped data), rendered with the Agg backend in
+a process pool, so regenerating the figures of a large sweep scales with cores.
+
+Rendering is incremental: a manifest in the output directory keeps the hash of
+the data and style of every figure, and only figures whose hash changed (or
+whose file is gone) are drawn again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+FigureJob = Tuple[Callable[..., Path], Dict[str, Any]]
+Series = Tuple[str, Sequence[Any], Sequence[float]]
+
+
+def use_agg() -> None:
+    """Non-interactive backend: figures only go to files."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def _render(job: FigureJob) -> Path:
+    fn, kwargs = job
+    return fn(**kwargs)
+
+
+MANIFEST_NAME = ".figures.json"
+
+
+def job_hash(job: FigureJob) -> str:
+    """Hash of a figure: draw function (name and source) and all its arguments."""
+    fn, kwargs = job
+    h = hashlib.sha256(fn.__qualname__.encode())
+    try:
+        h.update(inspect.getsource(fn).encode())
+    except (OSError, TypeError):
+        pass
+    h.update(json.dumps(kwargs, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def _load_manifest(path: Path) -> Dict[str, Dict[str, str]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _render_all(jobs: Sequence[FigureJob], workers: Optional[int]) -> List[Path]:
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        use_agg()
+        return [_render(job) for job in jobs]
+    # Jobs are cheap to send (a few lists each), so batch them to cut the IPC
+    chunksize = max(1, len(jobs) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers, initializer=use_agg) as pool:
+        return list(pool.map(_render, jobs, chunksize=chunksize))
+
+
+def render_figures(
+    jobs: Sequence[FigureJob],
+    workers: Optional[int] = None,
+    scope: str = "",
+    force: bool = False,
+    out_dir: Optional[Path] = None,
+) -> List[Path]:
+    """Render the jobs that changed (default: one process per core); returns the paths drawn.
+
+    Every job writes kwargs["out_path"]. The manifest sits next to the figures
+    and records, per file, its hash and the scope (the command) that drew it.
+    Files of `scope` that the jobs no longer produce are deleted; files of
+    other scopes are left alone, and out_dir makes sure the figures of
+    `scope` there are cleaned up even when no job writes to it any more.
+    force=True redraws everything.
+    """
+    manifests: Dict[Path, Dict[str, Dict[str, str]]] = {}
+    produced: Dict[Path, set] = {}
+    if out_dir is not None:
+        path = out_dir / MANIFEST_NAME
+        manifests[path] = _load_manifest(path)
+        produced[path] = set()
+    todo: List[FigureJob] = []
+    digests: List[Tuple[Path, str, str]] = []
+    for job in jobs:
+        out = Path(job[1]["out_path"])
+        path = out.parent / MANIFEST_NAME
+        manifest = manifests.setdefault(path, _load_manifest(path))
+        produced.setdefault(path, set()).add(out.name)
+        digest = job_hash(job)
+        entry = manifest.get(out.name, {})
+        if force or entry.get("hash") != digest or not out.exists():
+            todo.append(job)
+            digests.append((path, out.name, digest))
+        else:
+            entry["scope"] = scope
+
+    # Figures of removed series: same scope, not produced this time
+    for path, manifest in manifests.items():
+        for name in [n for n, e in manifest.items() if e.get("scope") == scope and n not in produced[path]]:
+            (path.parent / name).unlink(missing_ok=True)
+            del manifest[name]
+
+    try:
+        drawn = _render_all(todo, workers)
+        for path, name, digest in digests:
+            manifests[path][name] = {"hash": digest, "scope": scope}
+    finally:
+        for path, manifest in manifests.items():
+            if not manifest and not path.exists():
+                continue
+            path.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    return drawn
+
+
+def line_figure(
+    out_path: Path,
+    series: Sequence[Series],
+    title: str,
+    xlabel: str,
+    ylabel: str,
+    xticks: Optional[Tuple[Sequence[float], Sequence[str]]] = None,
+    figsize: Optional[Tuple[float, float]] = None,
+    linewidth: Optional[float] = None,
+    legend: Union[bool, str] = "auto",
+    legend_fontsize: Optional[str] = None,
+    dpi: int = 160,
+) -> Path:
+    """One line per (label, xs, ys) series, markers on the points.
+
+    legend="auto" only draws the legend when there are several series.
+    """
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=figsize)
+    style: Dict[str, Any] = {"linewidth": linewidth} if linewidth else {}
+    for label, xs, ys in series:
+        plt.plot(xs, ys, marker="o", label=label, **style)
+    if xticks is not None:
+        plt.xticks(list(xticks[0]), list(xticks[1]))
+    plt.title(title)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.grid(True, alpha=0.3)
+    if legend is True or (legend == "auto" and len(series) > 1):
+        plt.legend(fontsize=legend_fontsize)
+    plt.tight_layout()
+    plt.savefig(out_path, dpi=dpi)
+    plt.close(fig)
+    return out_path
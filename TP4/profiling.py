@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+--profile for the command-line scripts: per-stage wall / CPU time and counts,
+written as a JSON report next to the outputs of the command.
+
+A script adds the options with add_arguments(parser) and, after parsing,
+calls start(args, command, globals(), STAGES). When --profile is given, the
+stage functions (names in the script, or "other_module.function") are wrapped
+for the rest of the process; each call adds its wall and CPU time, the file
+it read (first argument, when it is an existing file) and the size of what it
+returned (rows, figures...). The report is written when the process exits, so
+a command that fails still leaves one. Without --profile nothing is wrapped.
+
+Stage times are inclusive (collect_results contains its parse_stats calls),
+and CPU time is the process's: threads count together, worker processes
+(gem5, figure pool) are in children_cpu_s.
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import functools
+import importlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Output options of the scripts, in order of preference for the report directory
+OUTPUT_OPTIONS = ["csv", "output_csv", "output", "out_dir", "output_dir", "out", "out_root"]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="JSON",
+                        help="tempo/CPU por etapa em JSON (default: profile_<comando>.json ao lado das saidas)")
+    parser.add_argument("--profile-pstats", action="store_true",
+                        help="com --profile, tambem um dump cProfile (.pstats) ao lado do JSON")
+
+
+def report_path(args: argparse.Namespace, command: str, out_dir: Optional[Path] = None) -> Path:
+    """--profile JSON, or profile_<command>.json in out_dir / the directory of the command's outputs."""
+    if args.profile:
+        return Path(args.profile).expanduser().resolve()
+    name = "profile_" + "_".join(command.split()) + ".json"
+    if out_dir is not None:
+        return Path(out_dir).expanduser().resolve() / name
+    for option in OUTPUT_OPTIONS:
+        value = getattr(args, option, None)
+        if value:
+            out = Path(value).expanduser().resolve()
+            return (out.parent if out.suffix else out) / name
+    return Path.cwd() / name
+
+
+class Profiler:
+    """Per-stage totals of the wrapped functions."""
+
+    def __init__(self, command: str) -> None:
+        import threading
+
+        self.command = command
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self.wall0 = time.perf_counter()
+        self.cpu0 = time.process_time()
+
+    def wrap(self, name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        record = self.stages.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "files": 0, "bytes": 0, "items": 0})
+
+        @functools.wraps(fn)
+        def wrapper(*a: Any, **kw: Any) -> Any:
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                result = fn(*a, **kw)
+            finally:
+                wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+                size = _file_size(a[0]) if a else None
+                with self._lock:
+                    record["calls"] += 1
+                    record["wall_s"] += wall
+                    record["cpu_s"] += cpu
+                    if size is not None:
+                        record["files"] += 1
+                        record["bytes"] += size
+            if isinstance(result, (list, tuple, dict, set)):
+                with self._lock:
+                    record["items"] += len(result)
+            return result
+
+        return wrapper
+
+    def report(self) -> Dict[str, Any]:
+        import resource
+
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {
+            "command": self.command,
+            "argv": sys.argv,
+            "wall_s": round(time.perf_counter() - self.wall0, 6),
+            "cpu_s": round(time.process_time() - self.cpu0, 6),
+            "children_cpu_s": round(children.ru_utime + children.ru_stime, 6),
+            "max_rss_mb": round(rss_kb / 1024, 1),
+            "stages": {
+                name: {k: round(v, 6) if isinstance(v, float) else v for k, v in rec.items()}
+                for name, rec in self.stages.items()
+                if rec["calls"]
+            },
+        }
+
+
+def _file_size(arg: Any) -> Optional[int]:
+    if not isinstance(arg, (str, os.PathLike)):
+        return None
+    try:
+        st = os.stat(arg)
+    except (OSError, ValueError):
+        return None
+    return st.st_size if os.path.isfile(arg) else None
+
+
+def _resolve(namespace: Dict[str, Any], name: str) -> Tuple[Dict[str, Any], str]:
+    """(namespace, attribute) of a stage: "fn" in the script, "other.fn" in module other."""
+    if "." in name:
+        mod_name, attr = name.rsplit(".", 1)
+        return vars(importlib.import_module(mod_name)), attr
+    return namespace, name
+
+
+def start(args: argparse.Namespace, command: str, namespace: Dict[str, Any],
+          stages: Sequence[str], out_dir: Optional[Path] = None) -> Optional[Profiler]:
+    """Wrap the stages and write the report at exit, if --profile was given.
+
+    Names without a module are looked up in `namespace` (the globals() of the
+    script), so a function the script imported is wrapped where it is called.
+    """
+    if getattr(args, "profile", None) is None:
+        return None
+    profiler = Profiler(command)
+    for name in stages:
+        owner, attr = _resolve(namespace, name)
+        owner[attr] = profiler.wrap(name, owner[attr])
+
+    path = report_path(args, command, out_dir)
+    cprofile = None
+    if args.profile_pstats:
+        import cProfile
+
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+    def finish() -> None:
+        report = profiler.report()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if cprofile is not None:
+            cprofile.disable()
+            pstats_path = path.with_suffix(".pstats")
+            cprofile.dump_stats(str(pstats_path))
+            report["pstats"] = str(pstats_path)
+        path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(format_report(report), file=sys.stderr)
+        print(f"perfil: {path}", file=sys.stderr)
+
+    atexit.register(finish)
+    return profiler
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{report['command']}: {report['wall_s']:.3f} s, CPU {report['cpu_s']:.3f} s "
+             f"(+{report['children_cpu_s']:.3f} s filhos), RSS max {report['max_rss_mb']} MB"]
+    stages: List[tuple] = sorted(report["stages"].items(), key=lambda kv: -kv[1]["wall_s"])
+    for name, rec in stages:
+        extra = f"  {rec['files']} arquivos {rec['bytes'] / 1e6:.1f} MB" if rec["files"] else ""
+        lines.append(f"  {name:<32} {rec['wall_s']:9.3f} s  CPU {rec['cpu_s']:9.3f} s  "
+                     f"{rec['calls']:>7} chamadas  {rec['items']:>7} itens{extra}")
+    return "\n".join(lines)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# Config SE heterogene big.LITTLE : N coeurs A15 + M coeurs A7, L1 privees,
+# L2 et bus memoire partages, un processus epingle par coeur.
+#
+# Exemple :
+#   gem5.opt -d m5out TP4/se_biglittle.py --big 1 --little 2 \
+#       --workload "big0:TP4/Projet/dijkstra/dijkstra_small.riscv::TP4/Projet/dijkstra/input.dat" \
+#       --workload "little0:TP4/Projet/blowfish/bf.riscv::e TP4/Projet/blowfish/input_small.asc out.enc key" \
+#       --workload "little1:TP4/SHA/sha.riscv::TP4/SHA/input_small.asc"
+
+import argparse
+import json
+import os
+import shlex
+
+import m5
+from m5.objects import *
+from m5.util import fatal
+
+from core_profiles import apply_overrides, get_profile
+from se_core import build_memory, connect_cpu, core_clock_domain, make_cpu
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--big", type=int, default=1, help="nombre de coeurs A15")
+    ap.add_argument("--little", type=int, default=1, help="nombre de coeurs A7")
+    ap.add_argument("--workload", action="append", default=[],
+                    help="[bigN|littleN:]binaire[::args] (un par coeur, "
+                         "sans prefixe: big d'abord puis little)")
+    ap.add_argument("--set-big", action="append", default=[], help="surcharge du profil A15")
+    ap.add_argument("--set-little", action="append", default=[], help="surcharge du profil A7")
+    ap.add_argument("--l2-size", default=None, help="taille L2 partagee (defaut: profil A15)")
+    ap.add_argument("--l2-assoc", type=int, default=None)
+    ap.add_argument("--mem-size", default="2GB")
+    ap.add_argument("--maxinsts", type=int, default=0)
+    return ap.parse_args()
+
+def parse_workloads(specs, cores):
+    """Associe chaque --workload a un coeur ('big0', 'little1', ...)."""
+    placement = {}
+    free = list(cores)
+    for spec in specs:
+        core, sep, rest = spec.partition(":")
+        if not sep or core not in cores:
+            core, rest = None, spec
+        binary, _, opts = rest.partition("::")
+        if core is None:
+            if not free:
+                fatal(f"plus de coeur libre pour {spec}")
+            core = free[0]
+        if core in placement:
+            fatal(f"coeur {core} deja utilise")
+        free.remove(core)
+        # meme syntaxe que --bench de l1_sweep.py : arguments a la shell
+        placement[core] = [binary] + shlex.split(opts)
+    if free:
+        fatal(f"coeurs sans workload: {', '.join(free)} (un --workload par coeur)")
+    return placement
+
+def main():
+    args = parse_args()
+    try:
+        big = apply_overrides(get_profile("A15"), args.set_big)
+        little = apply_overrides(get_profile("A7"), args.set_little)
+    except ValueError as e:
+        fatal(str(e))
+
+    clusters = [("big", big, args.big), ("little", little, args.little)]
+    cores = [f"{name}{i}" for name, _, n in clusters for i in range(n)]
+    if not cores:
+        fatal("il faut au moins un coeur (--big / --little)")
+    placement = parse_workloads(args.workload, cores)
+
+    system = System()
+    system.clk_domain = SrcClockDomain(clock=big["uncore_clock"], voltage_domain=VoltageDomain())
+    system.mem_mode = "timing"
+    system.mem_ranges = [AddrRange(args.mem_size)]
+    # cache_line_size est global en gem5 classic : on garde les blocs 64B de l'A15
+    # (le fetch buffer 32B de l'A7 reste <= taille de bloc)
+    system.cache_line_size = big["cache_line_size"]
+
+    # Un domaine horloge/tension par cluster, partage par ses coeurs
+    system.big_clk_domain = core_clock_domain(big)
+    system.little_clk_domain = core_clock_domain(little)
+
+    cpus = []
+    for name, p, n in clusters:
+        for i in range(n):
+            cpu = make_cpu(p)
+            cpu.cpu_id = len(cpus)
+            cpu.clk_domain = system.big_clk_domain if name == "big" else system.little_clk_domain
+            cpus.append(cpu)
+    system.cpu = cpus
+
+    system.l2bus = L2XBar()
+    for cpu in system.cpu:
+        connect_cpu(cpu, system.l2bus)
+    shared = dict(big)
+    if args.l2_size:
+        shared["l2_size"] = args.l2_size
+    if args.l2_assoc:
+        shared["l2_assoc"] = args.l2_assoc
+    build_memory(system, shared)
+
+    # Un processus par coeur (pid distincts)
+    system.workload = SEWorkload.init_compatible(placement[cores[0]][0])
+    layout = []
+    for idx, (core, cpu) in enumerate(zip(cores, system.cpu)):
+        process = Process(pid=100 + idx)
+        process.cmd = placement[core]
+        process.executable = placement[core][0]
+        cpu.workload = process
+        cpu.createThreads()
+        layout.append({
+            "core": core,
+            "cpu": f"system.cpu{idx}",
+            "profile": "A15" if core.startswith("big") else "A7",
+            "clock": (big if core.startswith("big") else little)["clock"],
+            "cmd": placement[core],
+        })
+
+    # Placement lu par les scripts d'analyse (stats par system.cpuN)
+    with open(os.path.join(m5.options.outdir, "placement.json"), "w") as fh:
+        json.dump(layout, fh, indent=2)
+
+    root = Root(full_system=False, system=system)
+    m5.instantiate()
+
+    if args.maxinsts > 0:
+        ev = m5.simulate(args.maxinsts)
+    else:
+        ev = m5.simulate()
+
+    m5.stats.dump()
+    print(f"Exiting @ tick {m5.curTick()} because {ev.getCause()}")
+
+main()
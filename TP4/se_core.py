@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+# Builder SE commun aux configs se_A7.py / se_A15.py : la microarchitecture
+# vient d'un profil de core_profiles.py, chaque champ peut etre surcharge
+# avec --set champ=valeur.
+
+import argparse
+import m5
+from m5.objects import *
+from m5.util import fatal
+
+from core_profiles import apply_overrides, get_profile, profile_fields
+
+# ---------------- Caches ----------------
+class L1ICache(Cache):
+    tag_latency = 2
+    data_latency = 2
+    response_latency = 2
+    mshrs = 4
+    tgts_per_mshr = 8
+    is_read_only = True
+    writeback_clean = True
+    def connectCPU(self, cpu): self.cpu_side = cpu.icache_port
+    def connectBus(self, bus): self.mem_side = bus.cpu_side_ports
+
+class L1DCache(Cache):
+    tag_latency = 2
+    data_latency = 2
+    response_latency = 2
+    mshrs = 8
+    tgts_per_mshr = 8
+    writeback_clean = True
+    def connectCPU(self, cpu): self.cpu_side = cpu.dcache_port
+    def connectBus(self, bus): self.mem_side = bus.cpu_side_ports
+
+class L2Cache(Cache):
+    tag_latency = 10
+    data_latency = 10
+    response_latency = 10
+    mshrs = 16
+    tgts_per_mshr = 12
+    writeback_clean = True
+    def connectCPUSideBus(self, bus): self.cpu_side = bus.mem_side_ports
+    def connectMemSideBus(self, bus): self.mem_side = bus.cpu_side_ports
+
+# Nom du profil -> predicteur conditionnel gem5 classic
+# BiModeBP correspond au "bimodal/bi-mode", LocalBP a un 2-level local.
+BPRED_CLASSES = {
+    "bimode": "BiModeBP",
+    "local": "LocalBP",
+    "tournament": "TournamentBP",
+    "tage": "TAGE",
+}
+
+# Predicteurs statiques de pred_gem5/ (a compiler dans gem5, voir add_gem5.txt) :
+# ce sont des BranchPredictor complets, pas des predicteurs conditionnels.
+STATIC_BPRED_CLASSES = {
+    "nottaken": "StaticNotTakenBP",
+    "taken": "StaticTakenBP",
+}
+
+# Noms utilises par SHA/exo1.sh
+BPRED_ALIASES = {
+    "bimod": "bimode",
+    "2lev": "local",
+}
+
+def bpred_names():
+    return list(STATIC_BPRED_CLASSES) + list(BPRED_CLASSES)
+
+# Nom -> prefetcher gem5 classic (caches L1D / L2)
+PREFETCHER_CLASSES = {
+    "stride": "StridePrefetcher",
+    "tagged": "TaggedPrefetcher",
+    "bop": "BOPPrefetcher",
+    "ampm": "AMPMPrefetcher",
+    "dcpt": "DCPTPrefetcher",
+    "spp": "SignaturePathPrefetcher",
+}
+
+def parse_args(profile_name):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cmd", required=True, help="binaire a executer")
+    ap.add_argument("--options", nargs=argparse.REMAINDER, default=[], help="args du binaire")
+    ap.add_argument("--out", default="", help="juste informatif")
+    ap.add_argument("--profile", default=profile_name, help="profil de core_profiles.py")
+    ap.add_argument("--set", dest="overrides", action="append", default=[],
+                    help="surcharge d'un champ du profil (ex: rob_entries=32). "
+                         "Champs: " + ", ".join(profile_fields(profile_name)))
+    ap.add_argument("--clock", default=None, help="raccourci pour --set clock=...")
+    ap.add_argument("--mem-size", default="2GB")
+    ap.add_argument("--num-cpus", type=int, default=1,
+                    help="nombre de coeurs (L1 I/D privees, L2 partagee), ex: binaires OpenMP")
+    ap.add_argument("--env", default=None,
+                    help="fichier de variables d'environnement VAR=valeur (ex: OMP_NUM_THREADS=4)")
+    ap.add_argument("--l1i", default=None, help="taille cache L1 I (ex: 1kB, 2kB, 4kB)")
+    ap.add_argument("--l1d", default=None, help="taille cache L1 D (ex: 1kB, 2kB, 4kB)")
+    ap.add_argument("--bpred", default=None,
+                    help=", ".join(bpred_names()) + " (raccourci pour --set bpred=...)")
+    ap.add_argument("--btb-entries", type=int, default=None, help="raccourci pour --set btb_entries=...")
+    ap.add_argument("--l1d-prefetcher", default=None,
+                    help="none ou " + ", ".join(PREFETCHER_CLASSES) + " (raccourci pour --set)")
+    ap.add_argument("--l2-prefetcher", default=None, help="idem pour la L2")
+    ap.add_argument("--prefetch-degree", type=int, default=None, help="degre des prefetchers L1D et L2")
+    ap.add_argument("--prefetch-distance", type=int, default=None, help="distance des prefetchers L1D et L2")
+    ap.add_argument("--mem-trace", action="store_true",
+                    help="trace des acces CPU -> L1 I/D (icache.trc.gz / dcache.trc.gz, gem5 avec protobuf)")
+    ap.add_argument("--maxinsts", type=int, default=0)
+    ap.add_argument("--heartbeat", type=int, default=0,
+                    help="imprime 'heartbeat @ tick T insts N' tous les HEARTBEAT ticks simules (0: rien)")
+    return ap.parse_args()
+
+def resolve_profile(args):
+    overrides = list(args.overrides)
+    # Options historiques de se_A7.py / se_A15.py
+    if args.l1i:
+        overrides.append(f"l1i_size={args.l1i}")
+    if args.l1d:
+        overrides.append(f"l1d_size={args.l1d}")
+    if args.clock:
+        overrides.append(f"clock={args.clock}")
+    if args.bpred:
+        overrides.append(f"bpred={args.bpred}")
+    if args.btb_entries is not None:
+        overrides.append(f"btb_entries={args.btb_entries}")
+    if args.l1d_prefetcher:
+        overrides.append(f"l1d_prefetcher={args.l1d_prefetcher}")
+    if args.l2_prefetcher:
+        overrides.append(f"l2_prefetcher={args.l2_prefetcher}")
+    for level in ("l1d", "l2"):
+        if args.prefetch_degree is not None:
+            overrides.append(f"{level}_prefetch_degree={args.prefetch_degree}")
+        if args.prefetch_distance is not None:
+            overrides.append(f"{level}_prefetch_distance={args.prefetch_distance}")
+    return apply_overrides(get_profile(args.profile), overrides)
+
+def make_branch_pred(p):
+    name = BPRED_ALIASES.get(p["bpred"], p["bpred"])
+    btb = SimpleBTB(numEntries=p["btb_entries"])
+    if name in STATIC_BPRED_CLASSES:
+        cls = STATIC_BPRED_CLASSES[name]
+        if cls not in globals():
+            fatal(f"{cls} absent de ce gem5 : appliquer pred_gem5/add_gem5.txt puis recompiler")
+        return globals()[cls](btb=btb)
+    cls = BPRED_CLASSES.get(name)
+    if cls is None:
+        fatal(f"bpred inconnu: {p['bpred']} (choix: {', '.join(bpred_names())})")
+    return BranchPredictor(
+        conditionalBranchPred=globals()[cls](),
+        btb=btb,
+    )
+
+def make_prefetcher(p, level):
+    """Prefetcher du profil pour 'l1d' ou 'l2' (None si none)."""
+    name = p[f"{level}_prefetcher"]
+    if name == "none":
+        return None
+    cls = PREFETCHER_CLASSES.get(name)
+    if cls is None or cls not in globals():
+        fatal(f"prefetcher inconnu: {name} (choix: none, {', '.join(PREFETCHER_CLASSES)})")
+    pf = globals()[cls]()
+    # degree/distance n'existent pas pour tous les prefetchers
+    for param in ("degree", "distance"):
+        value = p[f"{level}_prefetch_{param}"]
+        if value:
+            try:
+                setattr(pf, param, value)
+            except AttributeError:
+                fatal(f"{cls} n'a pas de parametre {param}")
+    return pf
+
+def make_cpu(p):
+    cpu = DerivO3CPU()
+
+    cpu.fetchBufferSize = p["fetch_buffer_size"]
+    cpu.fetchQueueSize = p["fetch_queue_size"]
+
+    cpu.fetchWidth    = p["fetch_width"]
+    cpu.decodeWidth   = p["decode_width"]
+    cpu.renameWidth   = p["rename_width"]
+    cpu.dispatchWidth = p["dispatch_width"]
+    cpu.issueWidth    = p["issue_width"]
+    cpu.wbWidth       = p["wb_width"]
+    cpu.commitWidth   = p["commit_width"]
+
+    cpu.numROBEntries = p["rob_entries"]
+    cpu.LQEntries = p["lq_entries"]
+    cpu.SQEntries = p["sq_entries"]
+
+    cpu.branchPred = make_branch_pred(p)
+
+    cpu.icache = L1ICache()
+    cpu.icache.size = p["l1i_size"]
+    cpu.icache.assoc = p["l1i_assoc"]
+
+    cpu.dcache = L1DCache()
+    cpu.dcache.size = p["l1d_size"]
+    cpu.dcache.assoc = p["l1d_assoc"]
+    pf = make_prefetcher(p, "l1d")
+    if pf is not None:
+        cpu.dcache.prefetcher = pf
+    return cpu
+
+def trace_port(cpu, port, cache, name):
+    """CommMonitor + MemTraceProbe entre un port du CPU et son L1 (requetes seulement)."""
+    mon = CommMonitor()
+    mon.trace = MemTraceProbe(trace_file=f"{name}.trc.gz")
+    setattr(cpu, f"{name}_mon", mon)
+    mon.cpu_side_port = port
+    mon.mem_side_port = cache.cpu_side
+
+def connect_cpu(cpu, l2bus, mem_trace=False):
+    """L1 I/D prives du core -> bus L2 partage."""
+    if mem_trace:
+        trace_port(cpu, cpu.icache_port, cpu.icache, "icache")
+        trace_port(cpu, cpu.dcache_port, cpu.dcache, "dcache")
+    else:
+        cpu.icache.connectCPU(cpu)
+        cpu.dcache.connectCPU(cpu)
+    cpu.icache.connectBus(l2bus)
+    cpu.dcache.connectBus(l2bus)
+    cpu.createInterruptController()
+
+def build_memory(system, p):
+    """L2 partagee + membus + DRAM (apres system.l2bus)."""
+    system.l2cache = L2Cache()
+    system.l2cache.size = p["l2_size"]
+    system.l2cache.assoc = p["l2_assoc"]
+    pf = make_prefetcher(p, "l2")
+    if pf is not None:
+        system.l2cache.prefetcher = pf
+    system.l2cache.connectCPUSideBus(system.l2bus)
+
+    system.membus = SystemXBar()
+    system.l2cache.connectMemSideBus(system.membus)
+    system.system_port = system.membus.cpu_side_ports
+
+    # DRAM
+    system.mem_ctrl = MemCtrl()
+    system.mem_ctrl.dram = globals()[p["mem_type"]]()
+    system.mem_ctrl.dram.range = system.mem_ranges[0]
+    system.mem_ctrl.port = system.membus.mem_side_ports
+
+def core_clock_domain(p):
+    return SrcClockDomain(clock=p["clock"], voltage_domain=VoltageDomain(voltage=f"{p['voltage']}V"))
+
+def read_env(path):
+    """Lignes VAR=valeur du fichier --env (vides et # ignorees)."""
+    with open(path) as fh:
+        lines = [line.strip() for line in fh]
+    return [line for line in lines if line and not line.startswith("#")]
+
+def build_system(args, p):
+    if args.num_cpus < 1:
+        fatal("--num-cpus doit etre >= 1")
+    if args.mem_trace and args.num_cpus > 1:
+        fatal("--mem-trace ne trace qu'un seul coeur (--num-cpus 1)")
+
+    system = System()
+    system.clk_domain = SrcClockDomain(clock=p["uncore_clock"], voltage_domain=VoltageDomain())
+    system.mem_mode = "timing"
+    system.mem_ranges = [AddrRange(args.mem_size)]
+    system.cache_line_size = p["cache_line_size"]
+
+    # Domaine DVFS des coeurs (L1 comprises), L2/DRAM restent a uncore_clock
+    system.cpu_clk_domain = core_clock_domain(p)
+    cpus = []
+    for i in range(args.num_cpus):
+        cpu = make_cpu(p)
+        cpu.cpu_id = i
+        cpu.clk_domain = system.cpu_clk_domain
+        cpus.append(cpu)
+    # Un seul coeur : on garde system.cpu (noms de stats des scripts d'analyse)
+    system.cpu = cpus[0] if args.num_cpus == 1 else cpus
+
+    system.l2bus = L2XBar()
+    for cpu in cpus:
+        connect_cpu(cpu, system.l2bus, mem_trace=args.mem_trace)
+    build_memory(system, p)
+
+    # Workload SE : un seul processus partage par tous les coeurs, les threads
+    # crees par clone() (pthreads / OpenMP) prennent les contextes libres
+    process = Process()
+    process.cmd = [args.cmd] + args.options
+    if args.env:
+        process.env = read_env(args.env)
+    system.workload = SEWorkload.init_compatible(args.cmd)
+    for cpu in cpus:
+        cpu.workload = process
+        cpu.createThreads()
+
+    return system
+
+def simulate(args, system):
+    # Sans --heartbeat : un seul m5.simulate (limite --maxinsts en ticks, comme avant)
+    limit = args.maxinsts if args.maxinsts > 0 else None
+    if args.heartbeat <= 0:
+        return m5.simulate(limit) if limit else m5.simulate()
+
+    # Par tranches de --heartbeat ticks : une ligne de progression par tranche
+    # (lue par l1_sweep.py --progress), flush car stdout est un pipe
+    cpus = list(system.cpu) if isinstance(system.cpu, list) else [system.cpu]
+    while True:
+        step = args.heartbeat if limit is None else min(args.heartbeat, limit - m5.curTick())
+        ev = m5.simulate(step)
+        if ev.getCause() != "simulate() limit reached" or (limit is not None and m5.curTick() >= limit):
+            return ev
+        insts = sum(int(cpu.totalInsts()) for cpu in cpus)
+        print(f"heartbeat @ tick {m5.curTick()} insts {insts}", flush=True)
+
+def main(profile_name):
+    args = parse_args(profile_name)
+    try:
+        p = resolve_profile(args)
+    except ValueError as e:
+        fatal(str(e))
+    system = build_system(args, p)
+    root = Root(full_system=False, system=system)
+    m5.instantiate()
+
+    ev = simulate(args, system)
+    m5.stats.dump()
+    print(f"Exiting @ tick {m5.curTick()} because {ev.getCause()}", flush=True)
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+One-at-a-time sensitivity analysis around a core profile: each parameter is
+moved one step down and one step up from the baseline (se_A7.py / se_A15.py
+values), the simulations run in parallel, and the IPC / energy deltas are
+reported as a table and a tornado chart per benchmark.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from cacti import format_size, size_to_bytes
+from core_profiles import Profile, apply_overrides, get_profile
+from energy_efficiency import POWER_CONSUMPTION
+from l1_sweep import (
+    ROOT,
+    compute_metrics,
+    discover_binaries,
+    parse_bench_list,
+    parse_stats,
+    read_run_params,
+    run_gem5,
+    run_parallel,
+    run_key,
+    write_run_params,
+)
+import lean_m5out
+import profiling
+
+
+# Parametro da analise -> campos do perfil movidos juntos
+PARAM_GROUPS: Dict[str, List[str]] = {
+    "l1_size": ["l1i_size", "l1d_size"],
+    "l1_assoc": ["l1i_assoc", "l1d_assoc"],
+    "rob_entries": ["rob_entries"],
+    "lsq_entries": ["lq_entries", "sq_entries"],
+    "issue_width": ["issue_width"],
+    "btb_entries": ["btb_entries"],
+    "l2_size": ["l2_size"],
+}
+
+BASELINE = "baseline"
+
+Job = Tuple[str, Path, List[str], str, str, Dict[str, str]]
+
+
+def step_value(value: object, direction: int, factor: int = 2) -> Optional[str]:
+    """Baseline value moved one step (x factor or / factor); None if out of range."""
+    if isinstance(value, str):
+        size = size_to_bytes(value)
+        new = size * factor if direction > 0 else size // factor
+        return format_size(new) if new >= 1 else None
+    number = int(value)  # type: ignore[call-overload]
+    new = number * factor if direction > 0 else number // factor
+    return str(new) if new >= 1 else None
+
+
+def build_variants(
+    profile: Profile,
+    groups: Sequence[str],
+    factor: int = 2,
+) -> List[Tuple[str, str, Dict[str, str]]]:
+    """(param, 'low'|'high', overrides) for every parameter group."""
+    variants: List[Tuple[str, str, Dict[str, str]]] = []
+    for group in groups:
+        for side, direction in (("low", -1), ("high", 1)):
+            overrides: Dict[str, str] = {}
+            for field in PARAM_GROUPS[group]:
+                value = step_value(profile[field], direction, factor)
+                if value is None:
+                    break
+                overrides[field] = value
+            else:
+                variants.append((group, side, overrides))
+    return variants
+
+
+def run_analysis(args: argparse.Namespace) -> None:
+    gem5_bin = Path(args.gem5).expanduser().resolve()
+    cfg = Path(args.cfg).expanduser().resolve()
+    out_root = Path(args.out_root).expanduser().resolve()
+
+    try:
+        base = apply_overrides(get_profile(args.cpu), args.set)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    fixed = dict(s.split("=", 1) for s in args.set)
+
+    benches = parse_bench_list(args.bench) if args.bench else discover_binaries(ROOT)
+    if not benches:
+        raise SystemExit("Nenhum binário encontrado (.riscv). Use --bench.")
+
+    variants = [(BASELINE, BASELINE, {})] + build_variants(base, args.param, args.factor)
+
+    jobs: List[Job] = []
+    for bench_name, bench_path, bench_opts in benches:
+        for group, side, overrides in variants:
+            params = dict(fixed, **overrides)
+            key = run_key(params) if params else BASELINE
+            outdir = out_root / args.cpu / bench_name / key
+            if (outdir / "stats.txt").exists() and not args.force:
+                continue
+            write_run_params(outdir, dict(params, sens_param=group, sens_side=side))
+            jobs.append((bench_name, bench_path, bench_opts, group, side, params))
+
+    print(f"{len(jobs)} simulacoes ({len(variants)} variantes x {len(benches)} benchmarks, --jobs {args.jobs})")
+
+    scratch = lean_m5out.scratch_dir(args)
+
+    def launch(job: Job) -> Callable[[], None]:
+        bench_name, bench_path, bench_opts, _, _, params = job
+        key = run_key(params) if params else BASELINE
+        return lambda: run_gem5(
+            gem5_bin=gem5_bin,
+            cfg=cfg,
+            outdir=out_root / args.cpu / bench_name / key,
+            cmd=bench_path,
+            l1i=None,
+            l1d=None,
+            options=bench_opts,
+            extra_args=[f"--set={k}={v}" for k, v in params.items()],
+            scratch=scratch,
+        )
+
+    failed = run_parallel([(f"{job[0]} {job[3]} {job[4]}", launch(job)) for job in jobs], args.jobs)
+    if failed:
+        raise SystemExit(f"{failed} simulacoes falharam")
+
+
+def collect_sensitivity(out_root: Path, cpu: str) -> List[Dict[str, object]]:
+    """One row per (bench, param): baseline, low and high IPC / energy with % deltas."""
+    power_w = POWER_CONSUMPTION[cpu] * 1e-3
+    rows: List[Dict[str, object]] = []
+    for bench_dir in sorted((out_root / cpu).glob("*")):
+        if not bench_dir.is_dir():
+            continue
+        runs: Dict[Tuple[str, str], Dict[str, object]] = {}
+        for run_dir in sorted(bench_dir.glob("*")):
+            params = read_run_params(run_dir)
+            if "sens_param" not in params:
+                continue
+            metrics = compute_metrics(parse_stats(run_dir / "stats.txt"))
+            if metrics["ipc"] is None or metrics["sim_seconds"] is None:
+                continue
+            changed = [params[f] for f in PARAM_GROUPS.get(params["sens_param"], []) if f in params]
+            runs[(params["sens_param"], params["sens_side"])] = {
+                "ipc": metrics["ipc"],
+                "energy": power_w * metrics["sim_seconds"],
+                "value": "/".join(dict.fromkeys(changed)),
+            }
+
+        base = runs.get((BASELINE, BASELINE))
+        if base is None:
+            print(f"{bench_dir.name}: sem baseline, ignorado")
+            continue
+        for group in PARAM_GROUPS:
+            low, high = runs.get((group, "low")), runs.get((group, "high"))
+            if low is None and high is None:
+                continue
+            row: Dict[str, object] = {"bench": bench_dir.name, "param": group}
+            row["low_value"] = low["value"] if low else ""
+            row["high_value"] = high["value"] if high else ""
+            for metric in ("ipc", "energy"):
+                ref = float(base[metric])  # type: ignore[arg-type]
+                row[f"{metric}_base"] = ref
+                swing = 0.0
+                for side, run in (("low", low), ("high", high)):
+                    if run is None:
+                        row[f"{metric}_{side}"] = None
+                        row[f"{metric}_{side}_pct"] = None
+                        continue
+                    pct = (float(run[metric]) - ref) / ref * 100.0  # type: ignore[arg-type]
+                    row[f"{metric}_{side}"] = run[metric]
+                    row[f"{metric}_{side}_pct"] = pct
+                    swing = max(swing, abs(pct))
+                row[f"{metric}_swing_pct"] = swing
+            rows.append(row)
+    return rows
+
+
+FIELDNAMES = [
+    "bench",
+    "param",
+    "low_value",
+    "high_value",
+    "ipc_base",
+    "ipc_low",
+    "ipc_high",
+    "ipc_low_pct",
+    "ipc_high_pct",
+    "ipc_swing_pct",
+    "energy_base",
+    "energy_low",
+    "energy_high",
+    "energy_low_pct",
+    "energy_high_pct",
+    "energy_swing_pct",
+]
+
+
+def write_sensitivity_csv(rows: List[Dict[str, object]], csv_path: Path) -> None:
+    if not rows:
+        return
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    with csv_path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for r in sorted(rows, key=lambda r: (r["bench"], -float(r["ipc_swing_pct"]))):  # type: ignore[arg-type]
+            writer.writerow({k: r.get(k) for k in FIELDNAMES})
+
+
+def plot_tornado(rows: List[Dict[str, object]], cpu: str, out_dir: Path) -> None:
+    """One tornado chart per benchmark: IPC and energy deltas (%) vs baseline."""
+    import matplotlib.pyplot as plt
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for bench in sorted({str(r["bench"]) for r in rows}):
+        bench_rows = sorted(
+            (r for r in rows if r["bench"] == bench),
+            key=lambda r: float(r["ipc_swing_pct"]),  # type: ignore[arg-type]
+        )
+        labels = [
+            f"{r['param']} ({r['low_value'] or '-'} / {r['high_value'] or '-'})" for r in bench_rows
+        ]
+        fig, axes = plt.subplots(1, 2, figsize=(13, 0.6 * len(bench_rows) + 2), sharey=True)
+        for ax, metric, title in ((axes[0], "ipc", "IPC"), (axes[1], "energy", "Energy")):
+            for side, color, offset in (("low", "tab:blue", -0.2), ("high", "tab:red", 0.2)):
+                values = [r[f"{metric}_{side}_pct"] or 0.0 for r in bench_rows]
+                ypos = [i + offset for i in range(len(bench_rows))]
+                ax.barh(ypos, values, height=0.4, color=color, alpha=0.8, label=f"step {side}")
+            ax.axvline(0.0, color="black", linewidth=0.8)
+            ax.set_title(f"{title} delta vs baseline (%)")
+            ax.grid(True, axis="x", alpha=0.3)
+        axes[0].set_yticks(range(len(bench_rows)))
+        axes[0].set_yticklabels(labels)
+        axes[1].legend()
+        fig.suptitle(f"{bench} - Cortex {cpu} sensitivity")
+        fig.tight_layout()
+        fig.savefig(out_dir / f"{bench}_tornado.png", dpi=160)
+        plt.close(fig)
+
+
+# Etapas medidas com --profile
+PROFILE_STAGES = [
+    "run_analysis", "collect_sensitivity", "parse_stats", "compute_metrics", "write_sensitivity_csv",
+    "plot_tornado",
+]
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="One-at-a-time sensitivity (tornado) around A7/A15")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="simula baseline e variantes em paralelo")
+    run.add_argument("--cpu", required=True, choices=["A7", "A15"])
+    run.add_argument("--gem5", required=True, help="caminho do gem5.opt")
+    run.add_argument("--cfg", required=True, help="script se_A7.py ou se_A15.py")
+    run.add_argument("--out-root", default=str(ROOT / "results_sensitivity"))
+    run.add_argument("--bench", action="append", default=[], help="nome:caminho ou caminho do binario")
+    run.add_argument("--param", nargs="+", default=list(PARAM_GROUPS), choices=list(PARAM_GROUPS))
+    run.add_argument("--factor", type=int, default=2, help="passo multiplicativo (default: x2 / /2)")
+    run.add_argument("--set", action="append", default=[], help="campo=valor aplicado ao baseline")
+    run.add_argument("--jobs", type=int, default=4, help="simulacoes gem5 em paralelo")
+    run.add_argument("--force", action="store_true", help="refaz runs que ja tem stats.txt")
+    lean_m5out.add_arguments(run)
+
+    report = sub.add_parser("report", help="gera tabela CSV e graficos tornado")
+    report.add_argument("--cpu", required=True, choices=["A7", "A15"])
+    report.add_argument("--out-root", default=str(ROOT / "results_sensitivity"))
+    report.add_argument("--csv", default=None, help="default: <out-root>/sensitivity_<cpu>.csv")
+    report.add_argument("--out-dir", default=None, help="default: <out-root>/figures_<cpu>")
+    report.add_argument("--no-plot", action="store_true")
+
+    for sp in sub.choices.values():
+        profiling.add_arguments(sp)
+    return p
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    profiling.start(args, f"sensitivity {args.cmd}", globals(), PROFILE_STAGES)
+
+    if args.cmd == "run":
+        run_analysis(args)
+        return
+
+    out_root = Path(args.out_root).expanduser().resolve()
+    rows = collect_sensitivity(out_root, args.cpu)
+    if not rows:
+        raise SystemExit("Nenhum resultado de sensibilidade encontrado")
+    csv_path = Path(args.csv) if args.csv else out_root / f"sensitivity_{args.cpu}.csv"
+    write_sensitivity_csv(rows, csv_path)
+    print(f"Wrote sensitivity CSV to {csv_path}")
+    if not args.no_plot:
+        out_dir = Path(args.out_dir) if args.out_dir else out_root / f"figures_{args.cpu}"
+        plot_tornado(rows, args.cpu, out_dir)
+        print(f"Plots saved to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
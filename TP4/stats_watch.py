@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Polling watcher of gem5 results roots, for the watch commands (l1_sweep.py
+watch, TP5 extract_results.py --watch).
+
+Each poll lists the stats.txt files under the roots (os.scandir, a few ms for
+thousands of runs) and reports the ones that finished since the last report.
+A file is finished when gem5 has closed its last block ("End Simulation
+Statistics") and its size and mtime have not changed for `settle` seconds, so
+a file gem5 is still writing (or dumping another block into) is never read.
+Polling works on NFS and on every OS, where inotify would not.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+END_MARKER = b"End Simulation Statistics"
+
+Signature = Tuple[int, int]  # (mtime_ns, size)
+
+
+def stats_files(root: Path, depth: int) -> Iterator[Path]:
+    """<root>/<depth directory levels>/stats.txt, without following symlinks."""
+    if depth == 0:
+        path = root / "stats.txt"
+        if path.is_file():
+            yield path
+        return
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from stats_files(Path(entry.path), depth - 1)
+
+
+def is_complete(path: Path) -> bool:
+    """True when the file ends with a closed statistics block."""
+    try:
+        with path.open("rb") as fh:
+            fh.seek(0, os.SEEK_END)
+            size = fh.tell()
+            fh.seek(max(0, size - 256))
+            return END_MARKER in fh.read()
+    except OSError:
+        return False
+
+
+class StatsWatcher:
+    """Finished stats.txt files under `roots` (each with its directory depth)."""
+
+    def __init__(self, roots: Sequence[Tuple[Path, int]], settle: float = 2.0,
+                 processed: Optional[Dict[Path, float]] = None) -> None:
+        self.roots = list(roots)
+        self.settle = settle
+        # Arquivos ja na tabela existente -> quando ela foi escrita: so voltam se mudarem depois
+        self.processed = dict(processed or {})
+        self._seen: Dict[Path, Tuple[Signature, float]] = {}
+        self._done: Dict[Path, Signature] = {}
+
+    def poll(self) -> List[Path]:
+        now = time.monotonic()
+        ready: List[Path] = []
+        for root, depth in self.roots:
+            for path in stats_files(root, depth):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                sig = (st.st_mtime_ns, st.st_size)
+                if self._done.get(path) == sig or st.st_size == 0:
+                    continue
+                if path in self.processed and st.st_mtime < self.processed.pop(path):
+                    self._done[path] = sig
+                    continue
+                seen = self._seen.get(path)
+                if seen is None or seen[0] != sig:
+                    self._seen[path] = (sig, now)
+                    continue
+                if now - seen[1] >= self.settle and is_complete(path):
+                    self._done[path] = sig
+                    del self._seen[path]
+                    ready.append(path)
+        return sorted(ready)
+
+
+def watch(watcher: StatsWatcher, on_ready: Callable[[List[Path]], None],
+          interval: float = 2.0, once: bool = False) -> None:
+    """Call on_ready with each batch of finished files until Ctrl-C.
+
+    With once, process what is finished now (waiting `settle` for it) and return.
+    """
+    watcher.poll()
+    try:
+        while True:
+            time.sleep(watcher.settle if once else interval)
+            batch = watcher.poll()
+            if batch:
+                on_ready(batch)
+            if once:
+                return
+    except KeyboardInterrupt:
+        print()
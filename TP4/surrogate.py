@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gaussian-process surrogate of gem5 results (IPC, miss rates) as a function of
+the configuration parameters, with an active-learning 'explore' mode that picks
+the next configurations to simulate.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cacti import format_size, size_to_bytes
+from core_profiles import profile_fields
+from l1_sweep import (
+    collect_results,
+    parse_bench_list,
+    run_gem5,
+    run_key,
+    write_run_params,
+)
+import profiling
+
+DEFAULT_FEATURES = ["l1i_size", "l1d_size"]
+DEFAULT_TARGETS = ["ipc", "i_miss_rate", "d_miss_rate"]
+
+SIZE_FEATURES = {"l1i_size", "l1d_size", "l2_size"}
+
+
+def parse_value(value: object) -> Optional[float]:
+    """Numeric value of a CSV cell; gem5 sizes (4kB) are converted to bytes."""
+    if value is None or value == "" or value == "None":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)  # type: ignore[arg-type]
+    except ValueError:
+        pass
+    try:
+        return float(size_to_bytes(str(value)))
+    except ValueError:
+        return None
+
+
+def load_rows(csv_paths: Sequence[str]) -> List[Dict[str, object]]:
+    rows: List[Dict[str, object]] = []
+    for path in csv_paths:
+        with Path(path).expanduser().open("r", encoding="utf-8") as fh:
+            rows.extend(csv.DictReader(fh))
+    return rows
+
+
+def build_dataset(
+    rows: Sequence[Dict[str, object]],
+    features: Sequence[str],
+    targets: Sequence[str],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Feature matrix X (n, d) and target matrix Y (n, t), skipping incomplete rows."""
+    xs: List[List[float]] = []
+    ys: List[List[float]] = []
+    for row in rows:
+        x = [parse_value(row.get(f)) for f in features]
+        y = [parse_value(row.get(t)) for t in targets]
+        if any(v is None for v in x) or any(v is None for v in y):
+            continue
+        xs.append(x)  # type: ignore[arg-type]
+        ys.append(y)  # type: ignore[arg-type]
+    return np.asarray(xs, dtype=float).reshape(-1, len(features)), np.asarray(ys, dtype=float).reshape(-1, len(targets))
+
+
+def parse_space(specs: Sequence[str]) -> Dict[str, List[float]]:
+    """'name=v1,v2,...' -> {name: [values]} (sizes accepted: 1kB,2kB...)."""
+    space: Dict[str, List[float]] = {}
+    for spec in specs:
+        if "=" not in spec:
+            raise SystemExit(f"--space invalido: {spec} (use nome=v1,v2,...)")
+        name, values = spec.split("=", 1)
+        parsed = [parse_value(v) for v in values.split(",") if v]
+        if any(v is None for v in parsed):
+            raise SystemExit(f"--space invalido: {spec}")
+        space[name] = parsed  # type: ignore[assignment]
+    return space
+
+
+def candidate_grid(space: Dict[str, List[float]], features: Sequence[str]) -> np.ndarray:
+    missing = [f for f in features if f not in space]
+    if missing:
+        raise SystemExit(f"--space sem valores para: {', '.join(missing)}")
+    return np.asarray(list(itertools.product(*(space[f] for f in features))), dtype=float)
+
+
+class InputScaler:
+    """log2 for strictly positive features, then min-max to [0, 1]."""
+
+    def __init__(self, X: np.ndarray) -> None:
+        self.log = np.all(X > 0, axis=0)
+        Z = self._log(X)
+        self.lo = Z.min(axis=0)
+        span = Z.max(axis=0) - self.lo
+        self.span = np.where(span > 0, span, 1.0)
+
+    def _log(self, X: np.ndarray) -> np.ndarray:
+        return np.where(self.log, np.log2(np.where(X > 0, X, 1.0)), X)
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (self._log(X) - self.lo) / self.span
+
+
+class GaussianProcess:
+    """GP regression with a squared-exponential kernel, hyperparameters chosen
+    on a grid by log marginal likelihood."""
+
+    LENGTHSCALES = np.logspace(-1.3, 0.7, 9)
+    NOISES = np.array([1e-6, 1e-4, 1e-3, 1e-2, 1e-1])
+
+    def __init__(self) -> None:
+        self.lengthscale = 0.5
+        self.noise = 1e-4
+
+    @staticmethod
+    def _kernel(A: np.ndarray, B: np.ndarray, lengthscale: float) -> np.ndarray:
+        d2 = np.sum(A ** 2, axis=1)[:, None] + np.sum(B ** 2, axis=1)[None, :] - 2.0 * A @ B.T
+        return np.exp(-0.5 * np.maximum(d2, 0.0) / lengthscale ** 2)
+
+    def _factor(self) -> None:
+        K = self._kernel(self.X, self.X, self.lengthscale) + self.noise * np.eye(len(self.X))
+        self.L = np.linalg.cholesky(K)
+        self.alpha = np.linalg.solve(self.L.T, np.linalg.solve(self.L, self.z))
+
+    def _log_marginal_likelihood(self) -> float:
+        return float(-0.5 * self.z @ self.alpha - np.log(np.diag(self.L)).sum() - 0.5 * len(self.z) * math.log(2 * math.pi))
+
+    def fit(self, X: np.ndarray, y: np.ndarray, optimize: bool = True) -> "GaussianProcess":
+        self.X = X
+        self.mean = float(y.mean())
+        self.scale = float(y.std()) or 1.0
+        self.z = (y - self.mean) / self.scale
+        if optimize and len(X) > 1:
+            best = (-math.inf, self.lengthscale, self.noise)
+            for ls, noise in itertools.product(self.LENGTHSCALES, self.NOISES):
+                self.lengthscale, self.noise = float(ls), float(noise)
+                try:
+                    self._factor()
+                except np.linalg.LinAlgError:
+                    continue
+                lml = self._log_marginal_likelihood()
+                if lml > best[0]:
+                    best = (lml, self.lengthscale, self.noise)
+            _, self.lengthscale, self.noise = best
+        self._factor()
+        return self
+
+    def predict(self, Xs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        Ks = self._kernel(Xs, self.X, self.lengthscale)
+        mean = Ks @ self.alpha
+        v = np.linalg.solve(self.L, Ks.T)
+        var = np.maximum(1.0 - np.sum(v ** 2, axis=0), 0.0)
+        return self.mean + self.scale * mean, self.scale * np.sqrt(var)
+
+    def loo_residuals(self) -> np.ndarray:
+        """Closed-form leave-one-out residuals (Rasmussen & Williams, 5.12)."""
+        Kinv = np.linalg.solve(self.L.T, np.linalg.solve(self.L, np.eye(len(self.X))))
+        return self.scale * self.alpha / np.diag(Kinv)
+
+
+def _norm_cdf(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + np.vectorize(math.erf)(x / math.sqrt(2.0)))
+
+
+def acquisition(
+    mean: np.ndarray,
+    std: np.ndarray,
+    best: float,
+    kind: str,
+    maximize: bool,
+) -> np.ndarray:
+    sign = 1.0 if maximize else -1.0
+    if kind == "std":
+        return std
+    if kind == "ucb":
+        return sign * mean + 2.0 * std
+    # expected improvement
+    improvement = sign * (mean - best)
+    safe = np.where(std > 0, std, 1.0)
+    z = improvement / safe
+    pdf = np.exp(-0.5 * z ** 2) / math.sqrt(2 * math.pi)
+    ei = improvement * _norm_cdf(z) + std * pdf
+    return np.where(std > 0, ei, np.maximum(improvement, 0.0))
+
+
+def select_batch(
+    X: np.ndarray,
+    y: np.ndarray,
+    candidates: np.ndarray,
+    batch: int,
+    kind: str,
+    maximize: bool,
+) -> List[int]:
+    """Pick `batch` candidates; later picks treat earlier ones as observed at
+    their predicted mean (kriging believer)."""
+    scaler = InputScaler(np.vstack([X, candidates]))
+    Xs, Cs = scaler.transform(X), scaler.transform(candidates)
+    gp = GaussianProcess().fit(Xs, y)
+    chosen: List[int] = []
+    seen = {tuple(row) for row in X}
+    for _ in range(batch):
+        mean, std = gp.predict(Cs)
+        best = float(y.max() if maximize else y.min())
+        score = acquisition(mean, std, best, kind, maximize)
+        for i in chosen:
+            score[i] = -np.inf
+        for i, row in enumerate(candidates):
+            if tuple(row) in seen:
+                score[i] = -np.inf
+        if not np.isfinite(score).any():
+            break
+        idx = int(np.argmax(score))
+        chosen.append(idx)
+        Xs = np.vstack([Xs, Cs[idx]])
+        y = np.append(y, mean[idx])
+        gp.fit(Xs, y, optimize=False)
+    return chosen
+
+
+def point_params(features: Sequence[str], values: Sequence[float]) -> Dict[str, str]:
+    params: Dict[str, str] = {}
+    for f, v in zip(features, values):
+        params[f] = format_size(v) if f in SIZE_FEATURES else f"{v:g}"
+    return params
+
+
+def _dataset_rows(args: argparse.Namespace) -> List[Dict[str, object]]:
+    rows: List[Dict[str, object]] = []
+    if args.csv:
+        rows.extend(load_rows(args.csv))
+    if args.out_root and args.cpu:
+        rows.extend(collect_results(Path(args.out_root).expanduser().resolve(), args.cpu))  # type: ignore[arg-type]
+    if args.bench_name:
+        rows = [r for r in rows if r.get("bench") == args.bench_name]
+    return rows
+
+
+def cmd_fit(args: argparse.Namespace) -> None:
+    rows = _dataset_rows(args)
+    X, Y = build_dataset(rows, args.features, args.targets)
+    if len(X) < 2:
+        raise SystemExit("Poucos pontos para treinar o modelo")
+
+    candidates = candidate_grid(parse_space(args.space), args.features) if args.space else X
+    scaler = InputScaler(np.vstack([X, candidates]))
+    Xs, Cs = scaler.transform(X), scaler.transform(candidates)
+
+    out_rows: List[Dict[str, object]] = [point_params(args.features, c) for c in candidates]
+    for t, target in enumerate(args.targets):
+        gp = GaussianProcess().fit(Xs, Y[:, t])
+        rmse = float(np.sqrt(np.mean(gp.loo_residuals() ** 2)))
+        print(f"{target}: n={len(X)} lengthscale={gp.lengthscale:.3g} noise={gp.noise:.1e} LOO-RMSE={rmse:.4g}")
+        mean, std = gp.predict(Cs)
+        for row, m, s in zip(out_rows, mean, std):
+            row[f"{target}_mean"] = f"{m:.6g}"
+            row[f"{target}_std"] = f"{s:.6g}"
+
+    if args.output_csv:
+        out = Path(args.output_csv)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with out.open("w", newline="", encoding="utf-8") as fh:
+            writer = csv.DictWriter(fh, fieldnames=list(out_rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(out_rows)
+        print(f"Wrote predictions to {out}")
+
+
+def cmd_explore(args: argparse.Namespace) -> None:
+    candidates = candidate_grid(parse_space(args.space), args.features)
+    maximize = not args.minimize
+
+    run = bool(args.gem5)
+    if run:
+        if not (args.cfg and args.cpu and args.out_root and args.bench):
+            raise SystemExit("--gem5 requer --cfg, --cpu, --out-root e --bench")
+        # each feature is passed to se_core.py as a profile override
+        unsupported = [f for f in args.features if f not in profile_fields(args.cpu)]
+        if unsupported:
+            raise SystemExit(f"Parametros sem opcao no config gem5: {', '.join(unsupported)}")
+        bench_name, bench_path, bench_opts = parse_bench_list([args.bench])[0]
+        args.bench_name = bench_name
+
+    for round_idx in range(args.rounds if run else 1):
+        X, Y = build_dataset(_dataset_rows(args), args.features, [args.target])
+        if len(X) < 2:
+            raise SystemExit("Poucos pontos para treinar o modelo")
+        picks = select_batch(X, Y[:, 0], candidates, args.batch, args.acquisition, maximize)
+        if not picks:
+            print("Espaco de candidatos esgotado")
+            return
+
+        print(f"== round {round_idx + 1}: {len(X)} pontos, proximos {len(picks)} ==")
+        for i in picks:
+            params = point_params(args.features, candidates[i])
+            print("  " + " ".join(f"{k}={v}" for k, v in params.items()))
+            if not run:
+                continue
+            outdir = Path(args.out_root).expanduser().resolve() / args.cpu / bench_name / run_key(params)
+            write_run_params(outdir, params)
+            run_gem5(
+                gem5_bin=Path(args.gem5).expanduser().resolve(),
+                cfg=Path(args.cfg).expanduser().resolve(),
+                outdir=outdir,
+                cmd=bench_path,
+                l1i=None,
+                l1d=None,
+                options=bench_opts,
+                extra_args=[f"--set={k}={v}" for k, v in params.items()],
+            )
+
+
+# Etapas medidas com --profile
+PROFILE_STAGES = [
+    "load_rows", "collect_results", "build_dataset", "candidate_grid", "select_batch",
+    "cmd_fit", "cmd_explore",
+]
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Surrogate model (Gaussian process) of gem5 results")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    def add_data_args(sp: argparse.ArgumentParser) -> None:
+        sp.add_argument("--csv", action="append", default=[], help="CSV gerado por l1_sweep.py collect")
+        sp.add_argument("--out-root", help="ou ler diretamente os m5out de <out-root>/<cpu>")
+        sp.add_argument("--cpu", choices=["A7", "A15"])
+        sp.add_argument("--bench-name", help="usa apenas as linhas deste benchmark")
+        sp.add_argument("--features", nargs="+", default=DEFAULT_FEATURES)
+        sp.add_argument("--space", nargs="+", default=[], help="nome=v1,v2,... (ex: l1d_size=1kB,2kB,4kB)")
+
+    fit = sub.add_parser("fit", help="treina e prediz com incerteza")
+    add_data_args(fit)
+    fit.add_argument("--targets", nargs="+", default=DEFAULT_TARGETS)
+    fit.add_argument("--output-csv")
+
+    explore = sub.add_parser("explore", help="escolhe as proximas configuracoes a simular")
+    add_data_args(explore)
+    explore.add_argument("--target", default="ipc")
+    explore.add_argument("--minimize", action="store_true", help="para metricas como miss rate")
+    explore.add_argument("--acquisition", choices=["ei", "std", "ucb"], default="ei")
+    explore.add_argument("--batch", type=int, default=4)
+    explore.add_argument("--rounds", type=int, default=1)
+    explore.add_argument("--gem5", help="se definido, simula os pontos escolhidos")
+    explore.add_argument("--cfg", help="script se_A7.py ou se_A15.py")
+    explore.add_argument("--bench", help="nome:caminho::args")
+
+    for sp in sub.choices.values():
+        profiling.add_arguments(sp)
+    return p
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    profiling.start(args, f"surrogate {args.cmd}", globals(), PROFILE_STAGES)
+    if args.cmd == "fit":
+        cmd_fit(args)
+    elif args.cmd == "explore":
+        cmd_explore(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio pipeline of a sweep: simulate -> parse -> table -> figures, overlapped.
+
+The phased flow (all runs, then collect, then plot) leaves the host idle
+while the last long runs finish and shows nothing before the end. Here the
+stages are coroutines linked by asyncio queues:
+
+    simulation workers (--jobs gem5 processes at a time)
+        -> parse queue   one worker, stats.txt parsed in a thread as soon as
+                         its gem5 exits (runs that already exist go first)
+        -> table queue   rows merged into the table, written after each batch
+        -> plot queue    one pending redraw at most: rows that arrive while
+                         the figures are drawn are folded into the next one
+
+so the table and the figures follow the sweep, and after the last gem5 exits
+only its own parse, one table write and one redraw are left. Parsing,
+writing and plotting run in the default thread pool (the figures themselves
+go to plot_pool's process pool); the event loop only moves lines and rows.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+Row = Any
+Parse = Callable[[Path], Optional[Tuple[Hashable, Row]]]
+
+
+class SimJob:
+    """One gem5 run: its command line and its output directory (gem5.log goes there).
+
+    finish(ok), if given, runs in a thread when gem5 exits, before the run is
+    parsed (lean_m5out.finish moves a staged m5out into outdir).
+    """
+
+    def __init__(self, label: str, argv: Sequence[str], outdir: Path, log: Optional[Path] = None,
+                 finish: Optional[Callable[[bool], None]] = None) -> None:
+        self.label = label
+        self.argv = [str(a) for a in argv]
+        self.outdir = outdir
+        self.log = log or outdir / "gem5.log"
+        self.finish = finish
+
+
+class PipelineResult:
+    def __init__(self) -> None:
+        self.failed: List[str] = []
+        self.rows: Dict[Hashable, Row] = {}
+        self.started = time.monotonic()
+        self.sim_done: Optional[float] = None
+        self.done: Optional[float] = None
+        self.table_writes = 0
+        self.plots = 0
+
+    def summary(self) -> str:
+        total = (self.done or time.monotonic()) - self.started
+        sims = (self.sim_done or self.started) - self.started
+        return (f"pipeline: simulacoes {sims:.1f} s, total {total:.1f} s "
+                f"(+{total - sims:.1f} s apos o ultimo gem5), {len(self.rows)} linhas, "
+                f"{self.table_writes} escritas da tabela, {self.plots} redesenhos")
+
+
+async def run_process(job: SimJob, on_line: Optional[Callable[[str], None]] = None) -> int:
+    """Run a gem5 process, output to job.log (and on_line); returns its exit code."""
+    job.outdir.mkdir(parents=True, exist_ok=True)
+    job.log.parent.mkdir(parents=True, exist_ok=True)
+    proc = await asyncio.create_subprocess_exec(
+        *job.argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+    )
+    try:
+        with job.log.open("w", encoding="utf-8") as log:
+            assert proc.stdout is not None
+            async for raw in proc.stdout:
+                line = raw.decode("utf-8", errors="replace")
+                log.write(line)
+                if on_line is not None:
+                    on_line(line)
+        return await proc.wait()
+    except asyncio.CancelledError:
+        # Ctrl-C: nao deixa gem5 orfao
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+
+
+async def run_pipeline(
+    jobs: Sequence[SimJob],
+    concurrency: int,
+    parse: Parse,
+    write_table: Callable[[Dict[Hashable, Row]], None],
+    plot: Optional[Callable[[], Any]] = None,
+    existing: Sequence[Path] = (),
+    progress: Optional[Any] = None,
+) -> PipelineResult:
+    """Simulate `jobs`, `concurrency` at a time, while parsing, tabulating and plotting.
+
+    parse(run_dir) gives the (key, row) of a finished run, or None to leave it
+    out; `existing` run directories (not simulated again) are parsed first.
+    write_table(rows) gets every row so far, and plot() redraws from what it
+    wrote; both run in a thread, never at the same time. progress (a
+    sweep_progress.SweepProgress) gets the gem5 events and the messages.
+    """
+    result = PipelineResult()
+    loop = asyncio.get_running_loop()
+    pending: "asyncio.Queue[Optional[SimJob]]" = asyncio.Queue()
+    to_parse: "asyncio.Queue[Optional[Path]]" = asyncio.Queue()
+    to_table: "asyncio.Queue[Optional[Tuple[Hashable, Row]]]" = asyncio.Queue()
+    to_plot: "asyncio.Queue[Optional[bool]]" = asyncio.Queue(maxsize=1)
+    # escrita da tabela e desenho leem/escrevem os mesmos arquivos
+    files = asyncio.Lock()
+
+    def say(message: str) -> None:
+        if progress is not None:
+            progress.log(message)
+        else:
+            print(message, flush=True)
+
+    async def simulate() -> None:
+        while True:
+            job = await pending.get()
+            if job is None:
+                return
+            if progress is not None:
+                progress.started(job.label)
+            on_line = (lambda text, label=job.label: progress.line(label, text)) if progress is not None else None
+            try:
+                code = await run_process(job, on_line)
+                error = f"gem5 saiu com {code} (ver {job.log})" if code else ""
+            except OSError as e:
+                error = str(e)
+            if job.finish is not None:
+                try:
+                    await loop.run_in_executor(None, job.finish, not error)
+                except OSError as e:
+                    error = error or str(e)
+            if progress is not None:
+                progress.finished(job.label, not error, error)
+            else:
+                say(f"[falhou] {job.label}: {error}" if error else f"[ok] {job.label}")
+            if error:
+                result.failed.append(job.label)
+            else:
+                await to_parse.put(job.outdir)
+
+    def parse_all(run_dirs: Sequence[Path]) -> List[Tuple[Hashable, Row]]:
+        items = []
+        for run_dir in run_dirs:
+            try:
+                item = parse(run_dir)
+            except Exception as e:
+                say(f"[leitura falhou] {run_dir}: {e}")
+                continue
+            if item is not None:
+                items.append(item)
+        return items
+
+    async def parser() -> None:
+        # runs ja existentes: um lote so, a tabela e escrita uma vez para todos
+        run_dirs: List[Path] = list(existing)
+        while True:
+            for item in await loop.run_in_executor(None, parse_all, run_dirs):
+                await to_table.put(item)
+            run_dir = await to_parse.get()
+            if run_dir is None:
+                await to_table.put(None)
+                return
+            run_dirs = [run_dir]
+
+    async def tabulate() -> None:
+        finished = False
+        while not finished:
+            item = await to_table.get()
+            batch = [item]
+            # junta o que chegou enquanto a tabela anterior era escrita
+            while not to_table.empty():
+                batch.append(to_table.get_nowait())
+            for entry in batch:
+                if entry is None:
+                    finished = True
+                else:
+                    result.rows[entry[0]] = entry[1]
+            if len(batch) > int(finished):
+                async with files:
+                    await loop.run_in_executor(None, write_table, dict(result.rows))
+                result.table_writes += 1
+                if plot is not None and not to_plot.full():
+                    to_plot.put_nowait(True)
+        await to_plot.put(None)
+
+    async def plotter() -> None:
+        while await to_plot.get():
+            try:
+                async with files:
+                    drawn = await loop.run_in_executor(None, plot)
+            except (Exception, SystemExit) as e:
+                say(f"[figuras falharam] {e}")
+                continue
+            result.plots += 1
+            if isinstance(drawn, list) and drawn:
+                say(f"{len(result.rows)} linhas, {len(drawn)} figuras redesenhadas")
+
+    async def simulations() -> None:
+        for job in jobs:
+            pending.put_nowait(job)
+        for _ in range(max(1, concurrency)):
+            pending.put_nowait(None)
+        await asyncio.gather(*(simulate() for _ in range(max(1, concurrency))))
+        result.sim_done = time.monotonic()
+        await to_parse.put(None)
+
+    stages = [simulations(), parser(), tabulate()]
+    if plot is not None:
+        stages.append(plotter())
+    await asyncio.gather(*stages)
+    result.done = time.monotonic()
+    return result
+
+
+def pipeline(*args: Any, **kwargs: Any) -> PipelineResult:
+    """Blocking run_pipeline (asyncio.run); Ctrl-C kills the running gem5 processes."""
+    try:
+        return asyncio.run(run_pipeline(*args, **kwargs))
+    except KeyboardInterrupt:
+        raise SystemExit("interrompido: runs em andamento abortados (sem stats.txt completo, refeitos na proxima vez)")
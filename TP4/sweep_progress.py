@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Live progress of a gem5 sweep. run_gem5 streams the output of each gem5
+process here line by line; the heartbeat lines of se_core.py (--heartbeat)
+give the simulated tick and the committed instructions of the run, and the
+table of running / queued / finished runs is redrawn on the terminal, with an
+ETA from the measured simulation speed.
+
+Run labels are "<benchmark> <run key>": the instructions of a finished run are
+the expected instructions of the other runs of the same benchmark (the L1 size
+or the core parameters barely change them), which gives the progress of a
+running run and the work left in the queue.
+"""
+
+from __future__ import annotations
+
+import re
+import statistics
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, TextIO
+
+# se_core.py: "heartbeat @ tick <tick> insts <committed instructions>"
+HEARTBEAT = re.compile(r"^heartbeat @ tick (\d+) insts (\d+)")
+EXITING = re.compile(r"^Exiting @ tick (\d+) because (.*)$")
+
+QUEUED, RUNNING, DONE, FAILED = "fila", "rodando", "ok", "falhou"
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class Run:
+    """State of one simulation, updated from its gem5 output."""
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.bench = label.split()[0]
+        self.state = QUEUED
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+        self.last_signal: Optional[float] = None
+        self.tick = 0
+        self.insts = 0
+
+    def elapsed(self, now: float) -> float:
+        return ((self.end or now) - self.start) if self.start is not None else 0.0
+
+    def rate(self, now: float) -> Optional[float]:
+        """Committed instructions per host second."""
+        elapsed = self.elapsed(now)
+        return self.insts / elapsed if self.insts and elapsed > 0 else None
+
+
+class SweepProgress:
+    """Thread-safe tracker of the runs of a sweep, drawn every `interval` seconds.
+
+    On a terminal the table is redrawn in place (at most `max_rows` running
+    runs); otherwise only the summary line is printed.
+    """
+
+    def __init__(self, labels: List[str], jobs: int, interval: float = 1.0,
+                 max_rows: int = 20, stream: Optional[TextIO] = None) -> None:
+        self.runs: Dict[str, Run] = {label: Run(label) for label in labels}
+        self.jobs = max(1, jobs)
+        self.stream = stream or sys.stdout
+        self.tty = self.stream.isatty()
+        # fora de um terminal (log, nohup), uma linha de resumo a cada 30 s no maximo
+        self.interval = interval if self.tty else max(interval, 30.0)
+        self.max_rows = max_rows
+        self.started_at = time.monotonic()
+        self._expected: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._drawn = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------------- Events (gem5 threads) ----------------
+
+    def started(self, label: str) -> None:
+        with self._lock:
+            run = self.runs[label]
+            run.state = RUNNING
+            run.start = run.last_signal = time.monotonic()
+
+    def line(self, label: str, text: str) -> None:
+        m = HEARTBEAT.match(text) or EXITING.match(text)
+        if not m:
+            return
+        with self._lock:
+            run = self.runs[label]
+            run.tick = int(m.group(1))
+            if m.re is HEARTBEAT:
+                run.insts = int(m.group(2))
+            run.last_signal = time.monotonic()
+
+    def finished(self, label: str, ok: bool, message: str = "") -> None:
+        with self._lock:
+            run = self.runs[label]
+            run.state = DONE if ok else FAILED
+            run.end = time.monotonic()
+            if ok and run.insts:
+                self._expected.setdefault(run.bench, run.insts)
+        self.log(f"[ok] {label}" if ok else f"[falhou] {label}: {message}")
+
+    def log(self, message: str) -> None:
+        """Print a line above the table."""
+        with self._lock:
+            self._clear()
+            self.stream.write(message + "\n")
+            if self.tty:
+                self._draw()
+            self.stream.flush()
+
+    # ---------------- ETA ----------------
+
+    def expected_insts(self, bench: str) -> Optional[int]:
+        if bench in self._expected:
+            return self._expected[bench]
+        return int(statistics.mean(self._expected.values())) if self._expected else None
+
+    def fraction(self, run: Run) -> Optional[float]:
+        expected = self.expected_insts(run.bench)
+        if run.state == DONE:
+            return 1.0
+        return min(0.99, run.insts / expected) if expected and run.insts else None
+
+    def eta(self, now: float) -> Optional[float]:
+        """Seconds left: work of the running and queued runs over `jobs` slots.
+
+        The work is in instructions at the measured speed; before any run of
+        the sweep has finished with a heartbeat, the mean wall time of the
+        finished runs is used instead.
+        """
+        runs = list(self.runs.values())
+        rates = [r for r in (run.rate(now) for run in runs if run.state in (RUNNING, DONE)) if r]
+        left = 0.0
+        if self._expected and rates:
+            rate = statistics.median(rates)
+            for run in runs:
+                if run.state in (RUNNING, QUEUED):
+                    remaining = max(0, (self.expected_insts(run.bench) or 0) - run.insts)
+                    left += remaining / (run.rate(now) or rate)
+            return left / self.jobs
+        durations = [run.elapsed(now) for run in runs if run.state == DONE]
+        if not durations:
+            return None
+        mean = statistics.mean(durations)
+        for run in runs:
+            if run.state == QUEUED:
+                left += mean
+            elif run.state == RUNNING:
+                left += max(0.0, mean - run.elapsed(now))
+        return left / self.jobs
+
+    # ---------------- Drawing ----------------
+
+    def summary(self, now: float) -> str:
+        counts = {state: 0 for state in (RUNNING, QUEUED, DONE, FAILED)}
+        for run in self.runs.values():
+            counts[run.state] += 1
+        parts = [f"{state} {n}" for state, n in counts.items()]
+        elapsed = format_duration(now - self.started_at)
+        return f"{' | '.join(parts)} | decorrido {elapsed} | ETA {format_duration(self.eta(now))}"
+
+    def table(self, now: float) -> List[str]:
+        running = [run for run in self.runs.values() if run.state == RUNNING]
+        width = max([len(run.label) for run in running] + [3])
+        lines = [self.summary(now)]
+        if running:
+            lines.append(f"{'run':<{width}}  {'tick':>14}  {'Minsts':>9}  {'%':>4}  {'Minst/s':>7}  {'tempo':>7}  sinal")
+        for run in sorted(running, key=lambda r: r.start or 0)[: self.max_rows]:
+            frac = self.fraction(run)
+            rate = run.rate(now)
+            lines.append(
+                f"{run.label:<{width}}  {run.tick:>14}  {run.insts / 1e6:>9.2f}  "
+                f"{'?' if frac is None else f'{100 * frac:.0f}':>4}  "
+                f"{'?' if rate is None else f'{rate / 1e6:.2f}':>7}  "
+                f"{format_duration(run.elapsed(now)):>7}  ha {format_duration(now - (run.last_signal or now))}"
+            )
+        if len(running) > self.max_rows:
+            lines.append(f"... +{len(running) - self.max_rows} rodando")
+        return lines
+
+    def _clear(self) -> None:
+        if self.tty and self._drawn:
+            # volta ao inicio da tabela e apaga ate o fim da tela
+            self.stream.write(f"\x1b[{self._drawn}F\x1b[J")
+            self._drawn = 0
+
+    def _draw(self) -> None:
+        lines = self.table(time.monotonic())
+        self.stream.write("\n".join(lines) + "\n")
+        self._drawn = len(lines)
+
+    def refresh(self) -> None:
+        with self._lock:
+            if self.tty:
+                self._clear()
+                self._draw()
+            else:
+                self.stream.write(self.summary(time.monotonic()) + "\n")
+            self.stream.flush()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def __enter__(self) -> "SweepProgress":
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        with self._lock:
+            self._clear()
+            self.stream.write(self.summary(time.monotonic()) + "\n")
+            self.stream.flush()
@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic gem5 output trees for measuring the tooling (see bench_tooling.py).
+
+A real m5out (stats.txt, config.ini, config.json) is used as template: every
+file keeps its size, line format and the ~1600 stats gem5 writes, and only
+the stats the scripts read (time, cycles, IPC, cache and branch counts) and
+the swept parameters are rewritten from a simple model of the run. Two layouts:
+
+- tp4: <out>/<cpu>/<bench>/l1_<size>/, as written by l1_sweep.py run;
+- tp5: <out>/results/s{size}_w{width}_t{threads}/ with one system.cpuN block
+  per thread, state.tsv as written by script_bench.sh and <out>/results.txt
+  as written by script_collect.sh.
+
+--dumps K writes K statistics blocks per file (m5_dumpstats with reset): the
+counts are split over the intervals, simSeconds/simInsts are cumulative.
+
+Templates are compiled once into literal chunks and named slots, so writing
+100k runs costs little more than the file system writes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import profiling
+
+ROOT = Path(__file__).resolve().parent
+TEMPLATE_DIRS = {
+    "A7": ROOT / "Projet" / "results_l1" / "A7" / "dijkstra" / "l1_16kB",
+    "A15": ROOT / "Projet" / "results_l1" / "A15" / "dijkstra" / "l1_16kB",
+}
+TP4_SIZES = ["1kB", "2kB", "4kB", "8kB", "16kB", "32kB", "64kB", "128kB", "256kB"]
+TP5_WIDTHS = [2, 4, 8]
+TP5_THREADS = [1, 2, 4, 8, 16]
+
+ICACHE = "system.cpu.icache"
+DCACHE = "system.cpu.dcache"
+L2 = "system.l2cache"
+BPRED = "system.cpu.branchPred"
+
+# Stats rewritten per run (the others keep the template value)
+MODEL_STATS = [
+    "simSeconds", "simTicks", "finalTick", "simInsts", "simOps", "hostSeconds",
+    "system.cpu.numCycles", "system.cpu.ipc", "system.cpu.cpi", "system.cpu.commitStats0.numInsts",
+    *(f"{c}.{k}Accesses::total" for c in (ICACHE, DCACHE, L2) for k in ("overall", "demand")),
+    *(f"{c}.{k}Misses::total" for c in (ICACHE, DCACHE, L2) for k in ("overall", "demand")),
+    *(f"{c}.{k}MissRate::total" for c in (ICACHE, DCACHE, L2) for k in ("overall", "demand")),
+    f"{DCACHE}.ReadReq.accesses::total", f"{DCACHE}.WriteReq.accesses::total",
+    f"{BPRED}.condPredicted", f"{BPRED}.condIncorrect",
+    f"{BPRED}.BTBLookups", f"{BPRED}.BTBHits", f"{BPRED}.BTBHitRatio",
+]
+# Cumulative over the dumps of a run (the other counts are per interval)
+CUMULATIVE_STATS = {"simSeconds", "simTicks", "finalTick", "simInsts", "simOps", "hostSeconds"}
+CUMULATIVE_STATS |= {"sim_seconds", "sim_ticks", "final_tick", "sim_insts", "sim_ops", "host_seconds"}
+RATE_SUFFIXES = ("MissRate::total", "ipc", "cpi", "HitRatio")
+
+# gem5-stable (TP5) still uses the old names of the headline stats
+TP5_RENAMES = {
+    "simSeconds": "sim_seconds",
+    "simTicks": "sim_ticks",
+    "finalTick": "final_tick",
+    "simFreq": "sim_freq",
+    "simInsts": "sim_insts",
+    "simOps": "sim_ops",
+    "hostSeconds": "host_seconds",
+    "commitStats0.numInsts": "committedInsts",
+}
+TP5_CPU_STATS = ["system.cpu.numCycles", "system.cpu.ipc", "system.cpu.cpi", "system.cpu.commitStats0.numInsts"]
+TP5_WIDTH_PARAMS = ["fetchWidth", "decodeWidth", "renameWidth", "dispatchWidth", "issueWidth", "wbWidth", "commitWidth"]
+
+_STAT_LINE = re.compile(r"^(\S+)(\s+)(\S+)(.*)$", re.S)
+_SLOT = re.compile(r'"@@([^@]+)@@"')
+
+
+# ---------------- Templates ----------------
+
+class Template:
+    """Text split into literal chunks and named slots; render() is a join."""
+
+    def __init__(self, parts: List[str], defaults: Optional[Dict[str, str]] = None) -> None:
+        self.literals = parts[0::2]
+        self.slots = parts[1::2]
+        self.defaults = defaults or {}
+
+    @classmethod
+    def build(cls, pieces: Iterator[Tuple[str, Optional[str]]], defaults: Optional[Dict[str, str]] = None) -> "Template":
+        """From (text, None) literals and (slot, "slot") markers."""
+        parts: List[str] = []
+        buf: List[str] = []
+        for text, kind in pieces:
+            if kind is None:
+                buf.append(text)
+            else:
+                parts.extend(["".join(buf), text])
+                buf = []
+        parts.append("".join(buf))
+        return cls(parts, defaults)
+
+    def render(self, values: Dict[str, object]) -> str:
+        out = [self.literals[0]]
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            value = values.get(slot)
+            out.append(self.defaults.get(slot, "") if value is None else format_value(value))
+            out.append(literal)
+        return "".join(out)
+
+
+def format_value(value: object) -> str:
+    """gem5 style: integers without decimals, other numbers with 6."""
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() and abs(value) < 1e18 else f"{value:.6f}"
+    return str(value)
+
+
+def _rename(name: str, renames: Dict[str, str]) -> str:
+    for old, new in renames.items():
+        if name == old or name.endswith("." + old):
+            return name[: len(name) - len(old)] + new
+    return name
+
+
+def stats_template(
+    text: str,
+    slots: Sequence[str],
+    num_cpus: Optional[int] = None,
+    renames: Optional[Dict[str, str]] = None,
+) -> Tuple[Template, Dict[str, float]]:
+    """Template of one statistics block, and the template values of `slots`.
+
+    With num_cpus, the system.cpu.* lines become one system.cpuN.* block per
+    core (as in a multi-core gem5 run) and so do the slot names: the slot of
+    "system.cpu.ipc" on core 3 is "system.cpu3.ipc". Stat names are then
+    renamed with `renames`.
+    """
+    wanted = set(slots)
+    renames = renames or {}
+    base: Dict[str, float] = {}
+    lines = text.splitlines(keepends=True)
+    cpu_block = [ln for ln in lines if ln.startswith("system.cpu.")]
+    defaults: Dict[str, str] = {}
+    pieces: List[Tuple[str, Optional[str]]] = []
+
+    cpu_done = False
+    for line in lines:
+        m = _STAT_LINE.match(line)
+        if m and m.group(1) in wanted:
+            try:
+                base[m.group(1)] = float(m.group(3))
+            except ValueError:
+                pass
+        if num_cpus is not None and line.startswith("system.cpu."):
+            if cpu_done:
+                continue
+            # Every core gets the whole system.cpu block, core after core
+            cpu_done = True
+            copies = [(f"system.cpu{i}.", ln) for i in range(num_cpus) for ln in cpu_block]
+        else:
+            copies = [("", line)]
+
+        for prefix, ln in copies:
+            m = _STAT_LINE.match(ln)
+            if not m:
+                pieces.append((ln, None))
+                continue
+            name = prefix + m.group(1)[len("system.cpu."):] if prefix else m.group(1)
+            name = _rename(name, renames)
+            if m.group(1) not in wanted:
+                pieces.append((name + m.group(2) + m.group(3) + m.group(4), None))
+                continue
+            pieces.extend([(name + m.group(2), None), (name, "slot"), (m.group(4), None)])
+            defaults[name] = m.group(3)
+    return Template.build(iter(pieces), defaults), base
+
+
+def ini_template(text: str, params: Dict[Tuple[str, str], str]) -> Template:
+    """config.ini with the (section, key) values of `params` as slots named after the params values."""
+    pieces: List[Tuple[str, Optional[str]]] = []
+    section = ""
+    for line in text.splitlines(keepends=True):
+        if line.startswith("["):
+            section = line.strip()[1:-1]
+        key = line.split("=", 1)[0]
+        slot = params.get((section, key))
+        if slot is None or "=" not in line:
+            pieces.append((line, None))
+            continue
+        pieces.extend([(key + "=", None), (slot, "slot"), ("\n", None)])
+    return Template.build(iter(pieces))
+
+
+def json_template(text: str, params: Dict[Tuple[str, ...], str]) -> Template:
+    """config.json with the values at the key paths of `params` as slots."""
+    tree = json.loads(text)
+    for path, slot in params.items():
+        node = tree
+        for key in path[:-1]:
+            node = node.get(key) if isinstance(node, dict) else None
+            if isinstance(node, list):
+                node = node[0]
+        if isinstance(node, dict) and path[-1] in node:
+            node[path[-1]] = f"@@{slot}@@"
+    rendered = json.dumps(tree, indent=4)
+    parts: List[str] = []
+    pos = 0
+    for m in _SLOT.finditer(rendered):
+        parts.extend([rendered[pos:m.start()], m.group(1)])
+        pos = m.end()
+    parts.append(rendered[pos:])
+    return Template(parts)
+
+
+# ---------------- Run models ----------------
+
+def _ratio(a: float, b: float) -> float:
+    return a / b if b else 0.0
+
+
+def tp4_values(base: Dict[str, float], l1_bytes: int, ref_bytes: int, scale: float,
+               rng: random.Random) -> Dict[str, float]:
+    """Stats of one single-core run: miss rates fall with the L1 size, CPI follows."""
+    def jitter() -> float:
+        return rng.uniform(0.95, 1.05)
+
+    r = l1_bytes / ref_bytes
+    v: Dict[str, float] = {}
+    rates = {}
+    for cache, exponent in ((ICACHE, 0.6), (DCACHE, 0.5)):
+        base_rate = _ratio(base.get(f"{cache}.overallMisses::total", 0), base.get(f"{cache}.overallAccesses::total", 0))
+        rates[cache] = (base_rate, min(0.5, base_rate * r ** -exponent * jitter()))
+    insts = round(base.get("simInsts", 1e7) * scale)
+    l2_accesses = 0
+    for cache, (_, rate) in rates.items():
+        accesses = round(base.get(f"{cache}.overallAccesses::total", 0) * scale)
+        misses = round(accesses * rate)
+        l2_accesses += misses
+        for kind in ("overall", "demand"):
+            v[f"{cache}.{kind}Accesses::total"] = accesses
+            v[f"{cache}.{kind}Misses::total"] = misses
+            v[f"{cache}.{kind}MissRate::total"] = _ratio(misses, accesses)
+    l2_rate = min(1.0, _ratio(base.get(f"{L2}.overallMisses::total", 0), base.get(f"{L2}.overallAccesses::total", 0)) * jitter())
+    for kind in ("overall", "demand"):
+        v[f"{L2}.{kind}Accesses::total"] = l2_accesses
+        v[f"{L2}.{kind}Misses::total"] = round(l2_accesses * l2_rate)
+        v[f"{L2}.{kind}MissRate::total"] = l2_rate if l2_accesses else 0.0
+    d_accesses = v[f"{DCACHE}.overallAccesses::total"]
+    reads = base.get(f"{DCACHE}.ReadReq.accesses::total", 0)
+    read_share = _ratio(reads, reads + base.get(f"{DCACHE}.WriteReq.accesses::total", 0))
+    v[f"{DCACHE}.ReadReq.accesses::total"] = round(d_accesses * read_share)
+    v[f"{DCACHE}.WriteReq.accesses::total"] = d_accesses - v[f"{DCACHE}.ReadReq.accesses::total"]
+
+    penalty = sum(4.0 * (rate - base_rate) for base_rate, rate in rates.values())
+    cpi = max(0.2, base.get("system.cpu.cpi", 1.0) * (1.0 + penalty) * jitter())
+    cycles = round(insts * cpi)
+    period = _ratio(base.get("simTicks", 0), base.get("system.cpu.numCycles", 0)) or 500.0
+    ticks = round(cycles * period)
+    v.update({
+        "simInsts": insts,
+        "simOps": round(insts * _ratio(base.get("simOps", 1), base.get("simInsts", 1))),
+        "system.cpu.commitStats0.numInsts": insts,
+        "system.cpu.numCycles": cycles,
+        "system.cpu.cpi": cycles / insts,
+        "system.cpu.ipc": insts / cycles,
+        "simTicks": ticks,
+        "finalTick": ticks,
+        "simSeconds": ticks / 1e12,
+        "hostSeconds": round(base.get("hostSeconds", 60.0) * scale * jitter(), 2),
+    })
+
+    predicted = round(base.get(f"{BPRED}.condPredicted", 0) * scale)
+    lookups = round(base.get(f"{BPRED}.BTBLookups", 0) * scale)
+    hit_ratio = min(1.0, _ratio(base.get(f"{BPRED}.BTBHits", 0), base.get(f"{BPRED}.BTBLookups", 0)) * jitter())
+    v.update({
+        f"{BPRED}.condPredicted": predicted,
+        f"{BPRED}.condIncorrect": round(predicted * _ratio(base.get(f"{BPRED}.condIncorrect", 0),
+                                                           base.get(f"{BPRED}.condPredicted", 0)) * jitter()),
+        f"{BPRED}.BTBLookups": lookups,
+        f"{BPRED}.BTBHits": round(lookups * hit_ratio),
+        f"{BPRED}.BTBHitRatio": hit_ratio,
+    })
+    return v
+
+
+def tp5_values(base: Dict[str, float], matrix: int, width: int, threads: int,
+               rng: random.Random) -> Tuple[Dict[str, float], List[Dict[str, float]]]:
+    """Global stats and per-core stats of one OpenMP matrix product run."""
+    work = base.get("simInsts", 1e7) * (matrix / 64) ** 3
+    ipc = base.get("system.cpu.ipc", 1.0) * (width / 4) ** 0.35 * (1 - 0.03 * math.log2(threads))
+    per_thread = work / threads * (1 + 0.02 * (threads - 1))
+    cores = []
+    for _ in range(threads):
+        insts = round(per_thread * rng.uniform(0.98, 1.02))
+        cycles = round(insts / (ipc * rng.uniform(0.95, 1.05)))
+        cores.append({"numCycles": cycles, "ipc": insts / cycles, "cpi": cycles / insts, "committedInsts": insts})
+    period = _ratio(base.get("simTicks", 0), base.get("system.cpu.numCycles", 0)) or 500.0
+    ticks = round(max(c["numCycles"] for c in cores) * period)
+    insts = sum(c["committedInsts"] for c in cores)
+    return {
+        "sim_seconds": ticks / 1e12,
+        "sim_ticks": ticks,
+        "final_tick": ticks,
+        "sim_insts": insts,
+        "sim_ops": insts,
+        "host_seconds": round(base.get("hostSeconds", 60.0) * work / base.get("simInsts", work) * rng.uniform(0.9, 1.1), 2),
+    }, cores
+
+
+def split_dumps(values: Dict[str, float], dumps: int) -> Iterator[Dict[str, float]]:
+    """Values of each of `dumps` intervals: counts split, cumulative stats growing, rates unchanged."""
+    for j in range(1, dumps + 1):
+        out = {}
+        for name, value in values.items():
+            if name.endswith(RATE_SUFFIXES):
+                out[name] = value
+            elif name in CUMULATIVE_STATS:
+                out[name] = value * j / dumps if name.lower().endswith("seconds") else round(value * j / dumps)
+            else:
+                out[name] = round(value / dumps)
+        yield out
+
+
+def _bench_scale(bench: str) -> float:
+    """Stable work factor per benchmark name (0.3x to 3x the template)."""
+    return 0.3 * 10 ** (random.Random(bench).random())
+
+
+def _read(template_dir: Path, name: str) -> str:
+    path = template_dir / name
+    if not path.exists():
+        raise SystemExit(f"template sem {name}: {template_dir}")
+    return path.read_text(encoding="utf-8", errors="ignore")
+
+
+# ---------------- Layouts ----------------
+
+def generate_tp4(
+    out_root: Path,
+    runs: int,
+    cpu: str = "A15",
+    dumps: int = 1,
+    seed: int = 0,
+    template_dir: Optional[Path] = None,
+) -> List[Path]:
+    """`runs` runs in <out_root>/<cpu>/bench<NNNN>/l1_<size>; returns the run directories."""
+    from cacti import size_to_bytes
+
+    template_dir = template_dir or TEMPLATE_DIRS[cpu]
+    stats, base = stats_template(_read(template_dir, "stats.txt"), MODEL_STATS)
+    ini = ini_template(_read(template_dir, "config.ini"), {
+        (ICACHE, "size"): "l1i_size",
+        (DCACHE, "size"): "l1d_size",
+    })
+    cfg_json = json_template(_read(template_dir, "config.json"), {
+        ("system", "cpu", "icache", "size"): "l1i_size",
+        ("system", "cpu", "dcache", "size"): "l1d_size",
+    })
+    ref_bytes = size_to_bytes(template_dir.name.replace("l1_", "")) if template_dir.name.startswith("l1_") else 16384
+
+    rng = random.Random(seed)
+    run_dirs: List[Path] = []
+    n_benches = math.ceil(runs / len(TP4_SIZES))
+    for b in range(n_benches):
+        bench = f"bench{b:0{max(4, len(str(n_benches)))}d}"
+        scale = _bench_scale(f"{seed}:{bench}")
+        for size in TP4_SIZES:
+            if len(run_dirs) == runs:
+                return run_dirs
+            l1_bytes = size_to_bytes(size)
+            values = tp4_values(base, l1_bytes, ref_bytes, scale, rng)
+            run_dir = out_root / cpu / bench / f"l1_{size}"
+            run_dir.mkdir(parents=True, exist_ok=True)
+            text = "".join(stats.render(v) for v in split_dumps(values, dumps))
+            (run_dir / "stats.txt").write_text(text, encoding="utf-8")
+            sizes = {"l1i_size": l1_bytes, "l1d_size": l1_bytes}
+            (run_dir / "config.ini").write_text(ini.render(sizes), encoding="utf-8")
+            (run_dir / "config.json").write_text(cfg_json.render(sizes), encoding="utf-8")
+            run_dirs.append(run_dir)
+    return run_dirs
+
+
+def tp5_points(runs: int, widths: Sequence[int], threads: Sequence[int]) -> List[Tuple[int, int, int]]:
+    """(matrix, width, threads) of `runs` runs: the width x threads grid for matrix 16, 32, 48..."""
+    points: List[Tuple[int, int, int]] = []
+    matrix = 16
+    while len(points) < runs:
+        for w in widths:
+            for t in threads:
+                if len(points) < runs:
+                    points.append((matrix, w, t))
+        matrix += 16
+    return points
+
+
+_HEADLINE = re.compile(r"^(sim_seconds|sim_ticks)\s.*$", re.M)
+
+
+def _collected_block(matrix: int, width: int, threads: int, stats_file: Path,
+                     first_dump: str, cores: List[Dict[str, float]]) -> str:
+    """Block of results.txt for one run, as script_collect.sh prints it."""
+    headline = {m.group(1): m.group(0) for m in _HEADLINE.finditer(first_dump)}
+    return (
+        f"=== size={matrix} width={width} threads={threads} ===\n"
+        f"file: {stats_file}\n"
+        f"{headline['sim_seconds']}\n"
+        f"{headline['sim_ticks']}\n"
+        f"ipc_max {format_value(max(c['ipc'] for c in cores))}\n"
+        f"cycles_max {format_value(max(c['numCycles'] for c in cores))}\n"
+        f"insts_max {format_value(max(c['committedInsts'] for c in cores))}\n"
+        "\n"
+    )
+
+
+def generate_tp5(
+    out_root: Path,
+    runs: int,
+    widths: Sequence[int] = TP5_WIDTHS,
+    threads: Sequence[int] = TP5_THREADS,
+    dumps: int = 1,
+    seed: int = 0,
+    template_dir: Optional[Path] = None,
+) -> List[Path]:
+    """`runs` runs in <out_root>/results/s{m}_w{w}_t{t} plus state.tsv and results.txt; returns the run directories."""
+    template_dir = template_dir or TEMPLATE_DIRS["A15"]
+    stats_text = _read(template_dir, "stats.txt")
+    slots = ["simSeconds", "simTicks", "finalTick", "simInsts", "simOps", "hostSeconds", *TP5_CPU_STATS]
+    ini = ini_template(_read(template_dir, "config.ini"), {("system.cpu", k): "width" for k in TP5_WIDTH_PARAMS})
+    cfg_json = json_template(_read(template_dir, "config.json"),
+                             {("system", "cpu", k): "width" for k in TP5_WIDTH_PARAMS})
+    templates: Dict[int, Template] = {}
+    _, base = stats_template(stats_text, MODEL_STATS)
+
+    results = out_root / "results"
+    results.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    run_dirs: List[Path] = []
+    state = ["size\twidth\tthreads\tstatus\toutdir\tlog\n"]
+    collected = ["=== Gem5 Q9 Results Summary ===\n", "Generated: synth_stats.py\n", "\n"]
+    for matrix, width, n in tp5_points(runs, widths, threads):
+        if n not in templates:
+            templates[n] = stats_template(stats_text, slots, num_cpus=n, renames=TP5_RENAMES)[0]
+        glob, cores = tp5_values(base, matrix, width, n, rng)
+        core_dumps = [list(split_dumps(c, dumps)) for c in cores]
+        chunks = []
+        for j, g in enumerate(split_dumps(glob, dumps)):
+            cs = [cd[j] for cd in core_dumps]
+            values: Dict[str, object] = dict(g)
+            for i, c in enumerate(cs):
+                values.update({f"system.cpu{i}.{k}": v for k, v in c.items()})
+            chunks.append(templates[n].render(values))
+
+        name = f"s{matrix}_w{width}_t{n}"
+        run_dir = results / name
+        run_dir.mkdir(parents=True, exist_ok=True)
+        (run_dir / "stats.txt").write_text("".join(chunks), encoding="utf-8")
+        (run_dir / "config.ini").write_text(ini.render({"width": width}), encoding="utf-8")
+        (run_dir / "config.json").write_text(cfg_json.render({"width": width}), encoding="utf-8")
+        state.append(f"{matrix}\t{width}\t{n}\tDONE\t{run_dir}\t{results / 'logs' / (name + '.log')}\n")
+        collected.append(_collected_block(matrix, width, n, run_dir / "stats.txt", chunks[0],
+                                          [c for cd in core_dumps for c in cd]))
+        run_dirs.append(run_dir)
+
+    (results / "state.tsv").write_text("".join(state), encoding="utf-8")
+    (out_root / "results.txt").write_text("".join(collected), encoding="utf-8")
+    return run_dirs
+
+
+def tree_size(run_dirs: Sequence[Path]) -> Tuple[int, int]:
+    """(files, bytes) under the run directories."""
+    files = size = 0
+    for run_dir in run_dirs:
+        for path in run_dir.iterdir():
+            files += 1
+            size += path.stat().st_size
+    return files, size
+
+
+# Etapas medidas com --profile
+PROFILE_STAGES = [
+    "generate_tp4", "generate_tp5", "stats_template", "tp4_values", "tp5_values",
+    "tree_size",
+]
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Gera arvores m5out sinteticas (stats.txt, config.ini, config.json)")
+    sub = p.add_subparsers(dest="layout", required=True)
+    for name, help_text in (("tp4", "<cpu>/<bench>/l1_<size> (l1_sweep)"), ("tp5", "s{size}_w{width}_t{threads} (script_bench.sh)")):
+        sp = sub.add_parser(name, help=help_text)
+        sp.add_argument("--out", required=True, help="diretorio de saida")
+        sp.add_argument("--runs", type=int, required=True, help="numero de simulacoes (ex: 10 a 100000)")
+        sp.add_argument("--dumps", type=int, default=1, help="blocos de estatisticas por stats.txt")
+        sp.add_argument("--seed", type=int, default=0)
+        sp.add_argument("--template", default=None, help="m5out usado como modelo (default: Projet/results_l1/<cpu>/dijkstra/l1_16kB)")
+        if name == "tp4":
+            sp.add_argument("--cpu", choices=["A7", "A15"], default="A15")
+        else:
+            sp.add_argument("--widths", type=int, nargs="+", default=TP5_WIDTHS)
+            sp.add_argument("--threads", type=int, nargs="+", default=TP5_THREADS)
+    for sp in sub.choices.values():
+        profiling.add_arguments(sp)
+    return p
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_arg_parser().parse_args(argv)
+    profiling.start(args, f"synth_stats {args.layout}", globals(), PROFILE_STAGES)
+    if args.runs < 1 or args.dumps < 1:
+        raise SystemExit("--runs e --dumps devem ser >= 1")
+    out = Path(args.out).expanduser().resolve()
+    template = Path(args.template).expanduser().resolve() if args.template else None
+    if args.layout == "tp4":
+        run_dirs = generate_tp4(out, args.runs, cpu=args.cpu, dumps=args.dumps, seed=args.seed, template_dir=template)
+    else:
+        run_dirs = generate_tp5(out, args.runs, widths=args.widths, threads=args.threads,
+                                dumps=args.dumps, seed=args.seed, template_dir=template)
+    files, size = tree_size(run_dirs)
+    print(f"{len(run_dirs)} simulacoes, {files} arquivos, {size / 1e6:.1f} MB em {out}")
+
+
+if __name__ == "__main__":
+    main()
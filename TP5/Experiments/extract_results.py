@@ -9,15 +9,20 @@ Supported block headers:
 
 import argparse
 import csv
+import hashlib
+import inspect
+import json
+import os
 import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-try:
-    import matplotlib.pyplot as plt
-    from matplotlib import cm
-except Exception:
-    plt = None
-    cm = None
+# matplotlib n'est importe que pour tracer (voir _load_matplotlib) : l'extraction
+# seule reste rapide
+plt = None
+cm = None
 
 HEADER_OLD_RE = re.compile(
     r"^===\s*(?P<run_dir>.+/stats_o3_w(?P<width>\d+)_t(?P<threads>\d+)_m(?P<matrix>\d+)\.txt)\s*===\s*$"
@@ -27,6 +32,14 @@ HEADER_NEW_RE = re.compile(
 )
 FILE_RE = re.compile(r"^file:\s*(?P<run_dir>.+?)\s*$")
 STAT_RE = re.compile(r"^(?P<key>\S+)\s+(?P<value>[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)")
+# Repertoires de run de script_bench.sh
+RUN_DIR_RE = re.compile(r"^s(?P<matrix>\d+)_w(?P<width>\d+)_t(?P<threads>\d+)$")
+# Lignes lues par script_collect.sh (max sur les coeurs)
+COLLECT_MAX = [
+    ("ipc_max", re.compile(r"^system\.cpu[0-9]*\.ipc\s")),
+    ("cycles_max", re.compile(r"^system\.cpu[0-9]*\.numCycles\s")),
+    ("insts_max", re.compile(r"^system\.cpu[0-9]*\.(numInsts|committedInsts)\s")),
+]
 
 
 def _safe_float(value):
@@ -146,6 +159,82 @@ def extract_results(input_file, output_file):
     return results
 
 
+def collect_block(stats_file, matrix, width, threads):
+    """results.txt block of one run, as written by script_collect.sh."""
+    with open(stats_file, "r", encoding="utf-8", errors="ignore") as stream:
+        lines = stream.read().splitlines()
+
+    out = [f"=== size={matrix} width={width} threads={threads} ===", f"file: {stats_file}"]
+    for key in ("sim_seconds", "sim_ticks"):
+        first = next((line for line in lines if line.startswith(key)), None)
+        out.append(first if first is not None else f"{key} N/A")
+    for name, pattern in COLLECT_MAX:
+        values = [line.split()[1] for line in lines if pattern.match(line)]
+        # sort -n | tail -1 : la valeur est recopiee telle quelle
+        values = [v for v in values if STAT_RE.match(f"x {v}")]
+        out.append(f"{name} {max(values, key=float)}" if values else f"{name} N/A")
+    return "\n".join(out) + "\n\n"
+
+
+def split_blocks(text):
+    """(matrix, width, threads) -> block text of a results.txt."""
+    blocks = {}
+    key = None
+    for line in text.splitlines(keepends=True):
+        match = HEADER_NEW_RE.match(line.strip()) or HEADER_OLD_RE.match(line.strip())
+        if match:
+            key = (int(match.group("matrix")), int(match.group("width")), int(match.group("threads")))
+            blocks[key] = ""
+        if key is not None:
+            blocks[key] += line
+    return blocks
+
+
+def write_results_txt(path, blocks):
+    """results.txt of script_collect.sh from (matrix, width, threads) -> block."""
+    header = f"=== Gem5 Q9 Results Summary ===\nGenerated: {time.strftime('%a %b %d %H:%M:%S %Z %Y')}\n\n"
+    path.write_text(header + "".join(blocks[k] for k in sorted(blocks)), encoding="utf-8")
+
+
+def watch_results(args):
+    """--watch: keep results.txt, the CSV and the figures up to date while script_bench.sh runs.
+
+    Each run that finishes is read once (the script_collect.sh block of its
+    stats.txt); results.txt and the CSV are rewritten, and only the figures
+    whose data changed are redrawn.
+    """
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "TP4"))
+    from stats_watch import StatsWatcher, watch
+
+    results_root = args.watch.expanduser().resolve()
+    blocks = {}
+    processed = {}
+    # results.txt existant : ses runs ne sont relus que si leur stats.txt a change depuis
+    if args.input.exists():
+        written = args.input.stat().st_mtime
+        blocks = split_blocks(args.input.read_text(encoding="utf-8"))
+        for matrix, width, threads in blocks:
+            processed[results_root / f"s{matrix}_w{width}_t{threads}" / "stats.txt"] = written
+
+    def update(batch):
+        for stats_file in batch:
+            match = RUN_DIR_RE.match(stats_file.parent.name)
+            if not match:
+                continue
+            key = (int(match.group("matrix")), int(match.group("width")), int(match.group("threads")))
+            blocks[key] = collect_block(stats_file, *key)
+        write_results_txt(args.input, blocks)
+        extract_results(str(args.input), str(args.output))
+        if args.plot:
+            generated = plot_results_from_csv(args.output, args.plots_dir, jobs=args.plot_jobs)
+            print(f"✓ {len(generated)} plot(s) redrawn in {args.plots_dir}")
+
+    watcher = StatsWatcher([(results_root, 1)], settle=args.settle, processed=processed)
+    if not args.once:
+        print(f"Watching {results_root} every {args.interval:g} s (Ctrl-C to stop)", flush=True)
+    watch(watcher, update, interval=args.interval, once=args.once)
+
+
 def _to_float(value):
     if value in ("", None):
         return None
@@ -208,116 +297,84 @@ def _x_offset_for_curve(curve_index, total_curves):
     return (curve_index - center) * spread
 
 
-def _plot_2d(rows, plots_dir, matrix):
-    matrix_rows = [r for r in rows if r["matrix"] == matrix]
-    widths = sorted({r["width"] for r in matrix_rows})
+def _draw_2d(out, curves, metric_name, title, ylabel, thread_values):
+    """One 2D figure: curves = [(width, x_plot, y)], colored by curve index."""
     colors = plt.get_cmap("tab10")
-
-    # Q9 (support): sim_seconds x threads por width
     plt.figure(figsize=(10, 6))
-    for idx, width in enumerate(widths):
-        wr = sorted([r for r in matrix_rows if r["width"] == width], key=lambda x: x["threads"])
-        x = [r["threads"] for r in wr if r["sim_seconds"] is not None]
-        y = [r["sim_seconds"] for r in wr if r["sim_seconds"] is not None]
-        x_plot = [v + _x_offset_for_curve(idx, len(widths)) for v in x]
+    for idx, (width, x_plot, y) in enumerate(curves):
         color = colors(idx % 10)
-        if x and y:
+        if x_plot and y:
             plt.plot(x_plot, y, marker="o", linewidth=2.2, markersize=7, color=color, label=f"Largeur O3 = {width}")
-            _annotate_2d_points(x_plot, y, "sim_seconds", color)
+            _annotate_2d_points(x_plot, y, metric_name, color)
 
-    plt.title(f"Temps simulé en fonction du nombre de threads (matrice={matrix})", fontsize=12, fontweight="bold")
+    plt.title(title, fontsize=12, fontweight="bold")
     plt.xlabel("Nombre de threads", fontsize=10)
-    plt.ylabel("Temps simulé (sim_seconds, s)", fontsize=10)
-    thread_values = sorted({r["threads"] for r in matrix_rows})
+    plt.ylabel(ylabel, fontsize=10)
     plt.xticks(thread_values, [str(v) for v in thread_values])
     plt.grid(True, linestyle="--", alpha=0.35)
     plt.legend(title="Légende", frameon=True)
-    out1 = plots_dir / f"q9_m{matrix}_sim_seconds_2d.png"
     plt.tight_layout()
-    plt.savefig(out1, dpi=150)
+    plt.savefig(out, dpi=150)
     plt.close()
+    return out
 
-    # Q9: cycles_max_cpu x threads por width
-    plt.figure(figsize=(10, 6))
-    for idx, width in enumerate(widths):
-        wr = sorted([r for r in matrix_rows if r["width"] == width], key=lambda x: x["threads"])
-        x = [r["threads"] for r in wr if r["cycles_max_cpu"] is not None]
-        y = [r["cycles_max_cpu"] for r in wr if r["cycles_max_cpu"] is not None]
-        x_plot = [v + _x_offset_for_curve(idx, len(widths)) for v in x]
-        color = colors(idx % 10)
-        if x and y:
-            plt.plot(x_plot, y, marker="o", linewidth=2.2, markersize=7, color=color, label=f"Largeur O3 = {width}")
-            _annotate_2d_points(x_plot, y, "cycles_max_cpu", color)
 
-    plt.title(f"Nombre maximal de cycles selon le nombre de threads (matrice={matrix})", fontsize=12, fontweight="bold")
-    plt.xlabel("Nombre de threads", fontsize=10)
-    plt.ylabel("Nombre maximal de cycles (cycles_max_cpu)", fontsize=10)
-    thread_values = sorted({r["threads"] for r in matrix_rows})
-    plt.xticks(thread_values, [str(v) for v in thread_values])
-    plt.grid(True, linestyle="--", alpha=0.35)
-    plt.legend(title="Légende", frameon=True)
-    out2 = plots_dir / f"q9_m{matrix}_cycles_2d.png"
-    plt.tight_layout()
-    plt.savefig(out2, dpi=150)
-    plt.close()
+def _plot_2d(by_width, plots_dir, matrix):
+    """Figure jobs of one matrix; by_width = {width: rows sorted by threads}."""
+    widths = sorted(by_width)
+    thread_values = sorted({r["threads"] for wr in by_width.values() for r in wr})
 
-    # Q10: speedup x threads por width (base thread=1)
-    plt.figure(figsize=(10, 6))
+    def curves(key):
+        out = []
+        for idx, width in enumerate(widths):
+            wr = [r for r in by_width[width] if r[key] is not None]
+            x = [r["threads"] for r in wr]
+            out.append((width, [v + _x_offset_for_curve(idx, len(widths)) for v in x], [r[key] for r in wr]))
+        return out
+
+    # Q10: speedup (base thread=1); les largeurs sans base gardent leur couleur mais pas de courbe
+    speedup = []
     for idx, width in enumerate(widths):
-        wr = sorted([r for r in matrix_rows if r["width"] == width and r["sim_seconds"] is not None], key=lambda x: x["threads"])
-        if not wr:
-            continue
+        wr = [r for r in by_width[width] if r["sim_seconds"] is not None]
         base = next((r["sim_seconds"] for r in wr if r["threads"] == 1), None)
-        if base is None or base == 0:
+        if not wr or base is None or base == 0:
+            speedup.append((width, [], []))
             continue
-        x = [r["threads"] for r in wr]
-        y = [base / r["sim_seconds"] for r in wr]
-        x_plot = [v + _x_offset_for_curve(idx, len(widths)) for v in x]
-        color = colors(idx % 10)
-        plt.plot(x_plot, y, marker="o", linewidth=2.2, markersize=7, color=color, label=f"Largeur O3 = {width}")
-        _annotate_2d_points(x_plot, y, "speedup", color)
-
-    plt.title(f"Accélération en fonction du nombre de threads (matrice={matrix})", fontsize=12, fontweight="bold")
-    plt.xlabel("Nombre de threads", fontsize=10)
-    plt.ylabel("Accélération (T1 / Tn)", fontsize=10)
-    thread_values = sorted({r["threads"] for r in matrix_rows})
-    plt.xticks(thread_values, [str(v) for v in thread_values])
-    plt.grid(True, linestyle="--", alpha=0.35)
-    plt.legend(title="Légende", frameon=True)
-    out3 = plots_dir / f"q10_m{matrix}_speedup_2d.png"
-    plt.tight_layout()
-    plt.savefig(out3, dpi=150)
-    plt.close()
-
-    # Q11 (support): IPC x threads por width
-    plt.figure(figsize=(10, 6))
-    for idx, width in enumerate(widths):
-        wr = sorted([r for r in matrix_rows if r["width"] == width], key=lambda x: x["threads"])
-        x = [r["threads"] for r in wr if r["ipc_max_cpu"] is not None]
-        y = [r["ipc_max_cpu"] for r in wr if r["ipc_max_cpu"] is not None]
-        x_plot = [v + _x_offset_for_curve(idx, len(widths)) for v in x]
-        color = colors(idx % 10)
-        if x and y:
-            plt.plot(x_plot, y, marker="o", linewidth=2.2, markersize=7, color=color, label=f"Largeur O3 = {width}")
-            _annotate_2d_points(x_plot, y, "ipc_max_cpu", color)
-
-    plt.title(f"IPC maximal en fonction du nombre de threads (matrice={matrix})", fontsize=12, fontweight="bold")
-    plt.xlabel("Nombre de threads", fontsize=10)
-    plt.ylabel("IPC maximal (instructions par cycle)", fontsize=10)
-    thread_values = sorted({r["threads"] for r in matrix_rows})
-    plt.xticks(thread_values, [str(v) for v in thread_values])
-    plt.grid(True, linestyle="--", alpha=0.35)
-    plt.legend(title="Légende", frameon=True)
-    out4 = plots_dir / f"q11_m{matrix}_ipc_2d.png"
-    plt.tight_layout()
-    plt.savefig(out4, dpi=150)
-    plt.close()
-
-    return [out1, out2, out3, out4]
+        x_plot = [r["threads"] + _x_offset_for_curve(idx, len(widths)) for r in wr]
+        speedup.append((width, x_plot, [base / r["sim_seconds"] for r in wr]))
+
+    figures = [
+        # Q9 (support): sim_seconds x threads por width
+        ("sim_seconds", curves("sim_seconds"), f"q9_m{matrix}_sim_seconds_2d.png",
+         f"Temps simulé en fonction du nombre de threads (matrice={matrix})",
+         "Temps simulé (sim_seconds, s)"),
+        # Q9: cycles_max_cpu x threads por width
+        ("cycles_max_cpu", curves("cycles_max_cpu"), f"q9_m{matrix}_cycles_2d.png",
+         f"Nombre maximal de cycles selon le nombre de threads (matrice={matrix})",
+         "Nombre maximal de cycles (cycles_max_cpu)"),
+        ("speedup", speedup, f"q10_m{matrix}_speedup_2d.png",
+         f"Accélération en fonction du nombre de threads (matrice={matrix})",
+         "Accélération (T1 / Tn)"),
+        # Q11 (support): IPC x threads por width
+        ("ipc_max_cpu", curves("ipc_max_cpu"), f"q11_m{matrix}_ipc_2d.png",
+         f"IPC maximal en fonction du nombre de threads (matrice={matrix})",
+         "IPC maximal (instructions par cycle)"),
+    ]
+    return [
+        (_draw_2d, {
+            "out": plots_dir / name,
+            "curves": data,
+            "metric_name": metric,
+            "title": title,
+            "ylabel": ylabel,
+            "thread_values": thread_values,
+        })
+        for metric, data, name, title, ylabel in figures
+    ]
 
 
-def _build_grid(rows, key, matrix):
-    matrix_rows = [r for r in rows if r["matrix"] == matrix and r.get(key) is not None]
+def _build_grid(matrix_rows, key):
+    matrix_rows = [r for r in matrix_rows if r.get(key) is not None]
     widths = sorted({r["width"] for r in matrix_rows})
     threads = sorted({r["threads"] for r in matrix_rows})
     if not widths or not threads:
@@ -338,8 +395,42 @@ def _build_grid(rows, key, matrix):
     return w_vals, t_vals, z_vals
 
 
-def _plot_3d(rows, plots_dir, matrix):
-    outputs = []
+def _draw_3d(out, key, zlabel, matrix, w_vals, t_vals, z_vals):
+    fig = plt.figure(figsize=(10, 7))
+    ax = fig.add_subplot(111, projection="3d")
+    scat = ax.scatter(w_vals, t_vals, z_vals, c=z_vals, cmap=cm.viridis, s=70, edgecolors="black", linewidths=0.4)
+    ax.set_title(f"{zlabel} (matrix={matrix})", fontsize=12, fontweight="bold")
+    ax.set_xlabel("Largeur O3 (largeur d'émission)", fontsize=10)
+    ax.set_ylabel("Nombre de threads", fontsize=10)
+    if key == "cycles_max_cpu":
+        z_title = "Nombre maximal de cycles (cycles_max_cpu)"
+    elif key == "sim_seconds":
+        z_title = "Temps simulé (sim_seconds, s)"
+    else:
+        z_title = "IPC maximal (instructions par cycle)"
+    ax.set_zlabel(z_title, fontsize=10)
+    fig.colorbar(scat, ax=ax, shrink=0.7, pad=0.1, label=z_title)
+
+    for w_val, t_val, z_val in zip(w_vals, t_vals, z_vals):
+        ax.text(
+            w_val,
+            t_val,
+            z_val,
+            _format_metric_value(key, z_val),
+            fontsize=7,
+            ha="left",
+            va="bottom",
+            bbox={"boxstyle": "round,pad=0.15", "fc": "white", "ec": "gray", "alpha": 0.6},
+        )
+
+    fig.tight_layout()
+    fig.savefig(out, dpi=150)
+    plt.close(fig)
+    return out
+
+
+def _plot_3d(matrix_rows, plots_dir, matrix):
+    jobs = []
     metrics = [
         ("cycles_max_cpu", "cycles_max_cpu", "q9_m{matrix}_cycles_3d.png"),
         ("sim_seconds", "sim_seconds", "q9_m{matrix}_sim_seconds_3d.png"),
@@ -347,48 +438,102 @@ def _plot_3d(rows, plots_dir, matrix):
     ]
 
     for key, zlabel, pattern in metrics:
-        w_vals, t_vals, z_vals = _build_grid(rows, key, matrix)
+        w_vals, t_vals, z_vals = _build_grid(matrix_rows, key)
         if not w_vals:
             continue
+        jobs.append((_draw_3d, {
+            "out": plots_dir / pattern.format(matrix=matrix),
+            "key": key,
+            "zlabel": zlabel,
+            "matrix": matrix,
+            "w_vals": w_vals,
+            "t_vals": t_vals,
+            "z_vals": z_vals,
+        }))
+
+    return jobs
+
+
+def _load_matplotlib():
+    """Import pyplot on first use; False when matplotlib is not installed."""
+    global plt, cm
+    if plt is None:
+        try:
+            import matplotlib.pyplot as pyplot
+            from matplotlib import cm as colormaps
+        except Exception:
+            return False
+        plt, cm = pyplot, colormaps
+    return True
 
-        fig = plt.figure(figsize=(10, 7))
-        ax = fig.add_subplot(111, projection="3d")
-        scat = ax.scatter(w_vals, t_vals, z_vals, c=z_vals, cmap=cm.viridis, s=70, edgecolors="black", linewidths=0.4)
-        ax.set_title(f"{zlabel} (matrix={matrix})", fontsize=12, fontweight="bold")
-        ax.set_xlabel("Largeur O3 (largeur d'émission)", fontsize=10)
-        ax.set_ylabel("Nombre de threads", fontsize=10)
-        if key == "cycles_max_cpu":
-            z_title = "Nombre maximal de cycles (cycles_max_cpu)"
-        elif key == "sim_seconds":
-            z_title = "Temps simulé (sim_seconds, s)"
-        else:
-            z_title = "IPC maximal (instructions par cycle)"
-        ax.set_zlabel(z_title, fontsize=10)
-        fig.colorbar(scat, ax=ax, shrink=0.7, pad=0.1, label=z_title)
-
-        for w_val, t_val, z_val in zip(w_vals, t_vals, z_vals):
-            ax.text(
-                w_val,
-                t_val,
-                z_val,
-                _format_metric_value(key, z_val),
-                fontsize=7,
-                ha="left",
-                va="bottom",
-                bbox={"boxstyle": "round,pad=0.15", "fc": "white", "ec": "gray", "alpha": 0.6},
-            )
 
-        out = plots_dir / pattern.format(matrix=matrix)
-        fig.tight_layout()
-        fig.savefig(out, dpi=150)
-        plt.close(fig)
-        outputs.append(out)
+def _use_agg():
+    import matplotlib
 
-    return outputs
+    matplotlib.use("Agg")
+    _load_matplotlib()
 
 
-def plot_results_from_csv(csv_path, plots_dir):
-    if plt is None:
+def _render(job):
+    fn, kwargs = job
+    return fn(**kwargs)
+
+
+def _render_jobs(jobs, workers=None):
+    """Each figure is an independent job: process pool with the Agg backend."""
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        _use_agg()
+        return [_render(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_use_agg) as pool:
+        return list(pool.map(_render, jobs))
+
+
+MANIFEST_NAME = ".figures.json"
+
+
+def _job_hash(job):
+    """Hash of a figure: draw function source + data + style arguments."""
+    fn, kwargs = job
+    h = hashlib.sha256(inspect.getsource(fn).encode())
+    h.update(json.dumps(kwargs, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def _render_changed(jobs, plots_dir, workers=None, force=False):
+    """Draw only the figures whose hash changed (or whose file is missing).
+
+    The hashes live in plots_dir/.figures.json; figures listed there that the
+    jobs no longer produce (removed matrix or width) are deleted.
+    """
+    manifest_path = plots_dir / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+
+    current = {}
+    todo = []
+    for job in jobs:
+        out = job[1]["out"]
+        current[out.name] = _job_hash(job)
+        if force or manifest.get(out.name) != current[out.name] or not out.exists():
+            todo.append(job)
+
+    for name in set(manifest) - set(current):
+        (plots_dir / name).unlink(missing_ok=True)
+
+    done = {name: digest for name, digest in current.items() if manifest.get(name) == digest}
+    try:
+        generated = _render_jobs(todo, workers)
+        done = current
+    finally:
+        manifest_path.write_text(json.dumps(done, indent=1, sort_keys=True), encoding="utf-8")
+    return generated
+
+
+def plot_results_from_csv(csv_path, plots_dir, jobs=None, force=False):
+    if not _load_matplotlib():
         print("⚠ matplotlib não disponível. Instale com: pip install matplotlib")
         return []
 
@@ -398,17 +543,29 @@ def plot_results_from_csv(csv_path, plots_dir):
         return []
 
     plots_dir.mkdir(parents=True, exist_ok=True)
-    matrices = sorted({r["matrix"] for r in rows})
 
-    generated = []
-    for matrix in matrices:
-        generated.extend(_plot_2d(rows, plots_dir, matrix))
-        generated.extend(_plot_3d(rows, plots_dir, matrix))
+    # Groupement unique : matrice -> largeur -> lignes triees par threads
+    by_matrix = {}
+    for row in sorted(rows, key=lambda r: r["threads"]):
+        by_matrix.setdefault(row["matrix"], {}).setdefault(row["width"], []).append(row)
 
-    return generated
+    figure_jobs = []
+    for matrix in sorted(by_matrix):
+        by_width = by_matrix[matrix]
+        matrix_rows = [r for wr in by_width.values() for r in wr]
+        figure_jobs.extend(_plot_2d(by_width, plots_dir, matrix))
+        figure_jobs.extend(_plot_3d(matrix_rows, plots_dir, matrix))
 
+    return _render_changed(figure_jobs, plots_dir, jobs, force)
 
-if __name__ == "__main__":
+
+# Etapes mesurees par --profile
+PROFILE_STAGES = [
+    "extract_results", "parse_blocks", "summarize_block", "collect_block", "plot_results_from_csv", "_render_changed",
+]
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Extract gem5 results summary from results.txt")
     parser.add_argument(
         "--input",
@@ -433,7 +590,56 @@ if __name__ == "__main__":
         default=Path(__file__).parent / "plots",
         help="Directory to save generated plots",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--plot-jobs",
+        type=int,
+        default=None,
+        help="Parallel figure processes (default: one per core)",
+    )
+    parser.add_argument(
+        "--force-plot",
+        action="store_true",
+        help="Redraw every figure, even when its data did not change",
+    )
+    parser.add_argument(
+        "--watch",
+        type=Path,
+        default=None,
+        metavar="RESULTS_ROOT",
+        help="Watch the script_bench.sh results root and update results.txt / CSV / plots as runs finish",
+    )
+    parser.add_argument("--interval", type=float, default=2.0, help="With --watch, seconds between two scans")
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="With --watch, seconds a stats.txt must stay unchanged before it is read",
+    )
+    parser.add_argument("--once", action="store_true", help="With --watch, process the finished runs and exit")
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="JSON",
+        help="Per-stage wall/CPU time report (default: profile_<command>.json next to the outputs)",
+    )
+    parser.add_argument(
+        "--profile-pstats",
+        action="store_true",
+        help="With --profile, also dump a cProfile .pstats next to the JSON",
+    )
+    args = parser.parse_args(argv)
+    if args.profile is not None:
+        # meme rapport que les scripts du TP4 (TP4/profiling.py)
+        sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "TP4"))
+        import profiling
+
+        profiling.start(args, "tp5 extract", globals(), PROFILE_STAGES)
+
+    if args.watch is not None:
+        watch_results(args)
+        return
 
     input_file = args.input
     output_file = args.output
@@ -445,8 +651,14 @@ if __name__ == "__main__":
     extract_results(str(input_file), str(output_file))
 
     if args.plot:
-        generated = plot_results_from_csv(output_file, args.plots_dir)
+        generated = plot_results_from_csv(output_file, args.plots_dir, jobs=args.plot_jobs, force=args.force_plot)
         if generated:
             print(f"✓ Generated {len(generated)} plot(s) in {args.plots_dir}")
             for plot_path in generated:
                 print(f"  - {plot_path}")
+        else:
+            print(f"✓ Plots up to date in {args.plots_dir}")
+
+
+if __name__ == "__main__":
+    main()
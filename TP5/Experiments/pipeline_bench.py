@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Run the script_bench.sh sweep with the results pipeline of TP4/sweep_pipeline.py.
+
+Same runs as script_bench.sh (results/s{size}_w{width}_t{threads}, logs in
+results/logs, state.tsv kept up to date), but --jobs gem5 processes at a time,
+and every run is collected as soon as its gem5 exits: results.txt (same blocks
+as script_collect.sh), results.csv and, with --plot, the figures are rewritten
+during the sweep instead of after it. A failed run does not stop the others;
+the script exits with 1 at the end if any failed.
+"""
+
+import argparse
+import functools
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from extract_results import RUN_DIR_RE, collect_block, extract_results, plot_results_from_csv, write_results_txt
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+MAX_THREADS = 16
+STATE_HEADER = "size\twidth\tthreads\tstatus\toutdir\tlog\n"
+
+
+def read_list(raw):
+    return [int(v) for v in raw.replace(",", " ").split()]
+
+
+def run_key(run_dir):
+    match = RUN_DIR_RE.match(run_dir.name)
+    return int(match.group("matrix")), int(match.group("width")), int(match.group("threads"))
+
+
+def read_state(state_file):
+    """(size, width, threads) -> status of an existing state.tsv."""
+    if not state_file.exists():
+        return {}
+    state = {}
+    for line in state_file.read_text(encoding="utf-8").splitlines()[1:]:
+        fields = line.split("\t")
+        if len(fields) >= 4:
+            state[(int(fields[0]), int(fields[1]), int(fields[2]))] = fields[3]
+    return state
+
+
+def write_state(state_file, state, results_root, logs_dir):
+    # Comme script_bench.sh : seulement les runs du balayage courant, remplacement atomique
+    lines = [STATE_HEADER]
+    for (size, width, threads), status in state.items():
+        name = f"s{size}_w{width}_t{threads}"
+        lines.append(f"{size}\t{width}\t{threads}\t{status}\t{results_root / name}\t{logs_dir / name}.log\n")
+    tmp = state_file.with_suffix(".tmp")
+    tmp.write_text("".join(lines), encoding="utf-8")
+    os.replace(tmp, state_file)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="script_bench.sh sweep with results collected while it runs")
+    parser.add_argument("--gem5", default="/home/g/gbusnot/ES201/tools/TP5/gem5-stable", help="Path to gem5-stable")
+    parser.add_argument("--binary", type=Path, default=SCRIPT_DIR / "test_omp", help="Path to benchmark binary")
+    parser.add_argument("--size", type=int, default=64, help="Matrix size")
+    parser.add_argument("--widths", default="2 4 8", help="O3 widths list, space/comma separated")
+    parser.add_argument("--threads", default="", help="Thread list (default: powers of 2 up to min(SIZE, 16))")
+    parser.add_argument("--results-root", type=Path, default=SCRIPT_DIR / "results", help="Output root directory")
+    parser.add_argument("--env-file", type=Path, help="Environment file passed to se_a15.py (--env)")
+    parser.add_argument("--omp-active-wait", action="store_true",
+                        help="Append OMP_WAIT_POLICY=ACTIVE and GOMP_SPINCOUNT=1000000000")
+    parser.add_argument("--no-caches", action="store_true", help="Disable --caches --l2cache")
+    parser.add_argument("--jobs", type=int, default=1, help="gem5 simulations in parallel")
+    parser.add_argument(
+        "--lean",
+        action="store_true",
+        help="Lean m5out: no config.dot/pdf/svg, gzipped configs, gem5 writes to --scratch",
+    )
+    parser.add_argument(
+        "--scratch",
+        type=Path,
+        default=None,
+        help="With --lean, local directory gem5 writes to (default: /dev/shm, else $TMPDIR)",
+    )
+    parser.add_argument("--input", type=Path, default=SCRIPT_DIR / "results.txt", help="results.txt to write")
+    parser.add_argument("--output", type=Path, default=SCRIPT_DIR / "results.csv", help="CSV to write")
+    parser.add_argument("--plot", action="store_true", help="Redraw the 2D/3D plots as runs finish")
+    parser.add_argument("--plots-dir", type=Path, default=SCRIPT_DIR / "plots", help="Directory of the plots")
+    parser.add_argument("--plot-jobs", type=int, default=1,
+                        help="Parallel figure processes (default: 1, the cores are left to gem5)")
+    args = parser.parse_args(argv)
+
+    try:
+        args.widths = read_list(args.widths)
+        args.threads = read_list(args.threads) if args.threads else [
+            t for t in (2 ** i for i in range(8)) if t <= min(args.size, MAX_THREADS)
+        ]
+    except ValueError as e:
+        parser.error(f"invalid list value: {e}")
+    if args.size <= 0 or not args.widths or not args.threads or min(args.widths + args.threads) <= 0:
+        parser.error("--size, --widths and --threads must be positive integers")
+    for threads in args.threads:
+        if threads > MAX_THREADS or threads > args.size:
+            parser.error(f"thread value {threads} exceeds max supported {MAX_THREADS} or size {args.size}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, str(SCRIPT_DIR.parents[1] / "TP4"))
+    import lean_m5out
+    from sweep_pipeline import SimJob, pipeline
+
+    gem5_bin = Path(args.gem5).expanduser() / "build" / "ARM" / "gem5.fast"
+    se_script = SCRIPT_DIR / "se_a15.py"
+    for path, what in ((gem5_bin, "gem5 binary"), (se_script, "script"), (args.binary, "binary")):
+        if not path.is_file():
+            raise SystemExit(f"Error: {what} not found: {path}")
+    if args.env_file is not None and not args.env_file.is_file():
+        raise SystemExit(f"Error: --env-file not found: {args.env_file}")
+
+    env_file = args.env_file
+    if args.omp_active_wait:
+        # fichier temporaire : --env-file eventuel + attente active OpenMP
+        text = args.env_file.read_text(encoding="utf-8") + "\n" if args.env_file else ""
+        with tempfile.NamedTemporaryFile("w", suffix=".env", delete=False) as tmp:
+            tmp.write(text + "OMP_WAIT_POLICY=ACTIVE\nGOMP_SPINCOUNT=1000000000\n")
+        env_file = Path(tmp.name)
+
+    results_root = args.results_root.expanduser().resolve()
+    logs_dir = results_root / "logs"
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    state_file = results_root / "state.tsv"
+    old_state = read_state(state_file)
+    state = {
+        (args.size, w, t): old_state.get((args.size, w, t), "PENDING") for w in args.widths for t in args.threads
+    }
+    write_state(state_file, state, results_root, logs_dir)
+
+    scratch = None
+    if args.lean:
+        scratch = args.scratch.expanduser().resolve() if args.scratch else lean_m5out.default_scratch()
+        print(f"✓ Lean m5out, gem5 writes to {scratch}")
+
+    jobs = []
+    existing = []
+    for (size, width, threads), status in state.items():
+        name = f"s{size}_w{width}_t{threads}"
+        outdir = results_root / name
+        if status == "DONE":
+            existing.append(outdir)
+            continue
+        # --lean : gem5 ecrit dans un repertoire local, seuls les fichiers gardes vont dans outdir
+        gem5_dir = outdir if scratch is None else lean_m5out.stage_dir(scratch, outdir)
+        gem5_opts = [] if scratch is None else lean_m5out.LEAN_GEM5_ARGS
+        cmd = [
+            gem5_bin, f"--outdir={gem5_dir}", *gem5_opts, se_script, "--cpu-type=detailed", f"--o3-width={width}",
+            f"--num-cpus={threads}", "-c", args.binary.resolve(), "-o", f"{threads} {size}",
+        ]
+        if env_file is not None:
+            cmd += ["--env", env_file]
+        if not args.no_caches:
+            cmd += ["--caches", "--l2cache"]
+        finish = None if scratch is None else functools.partial(lean_m5out.finish, gem5_dir, outdir)
+        jobs.append(SimJob(f"size={size} width={width} threads={threads}", cmd, outdir, logs_dir / f"{name}.log",
+                           finish=finish))
+
+    def parse(run_dir):
+        key = run_key(run_dir)
+        if state[key] != "DONE":
+            state[key] = "DONE"
+            write_state(state_file, state, results_root, logs_dir)
+        return key, collect_block(run_dir / "stats.txt", *key)
+
+    def table(blocks):
+        write_results_txt(args.input, blocks)
+        extract_results(str(args.input), str(args.output))
+
+    def plot():
+        return plot_results_from_csv(args.output, args.plots_dir, jobs=args.plot_jobs)
+
+    print(f"{len(jobs)} runs to simulate, {len(existing)} already DONE (--jobs {args.jobs})")
+    try:
+        result = pipeline(jobs, args.jobs, parse, table, plot if args.plot else None, existing=existing)
+    finally:
+        if args.omp_active_wait:
+            env_file.unlink()
+    for job in jobs:
+        if job.label in result.failed:
+            state[run_key(job.outdir)] = "FAILED"
+    write_state(state_file, state, results_root, logs_dir)
+    print(result.summary())
+    print(f"✓ State file: {state_file}")
+    if result.failed:
+        print(f"{len(result.failed)} run(s) failed, see {logs_dir}", file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Fit parallel-scaling models on the TP5 thread sweeps (results.csv).
+
+For every (matrix, width) series, speedup S(n) = T1 / Tn is fitted with:
+- Amdahl:     1/S = s + (1 - s)/n           (serial fraction s)
+- Gustafson:  S = n - a (n - 1)              (serial fraction a, scaled workload)
+- Karp-Flatt: e(n) = (1/S - 1/n) / (1 - 1/n) (experimentally measured serial fraction)
+
+All series are fitted at once on a (series x threads) array, the closed-form
+least-squares solutions are evaluated with masked sums. The models then
+predict speedup at untested thread counts, and points where even the
+optimistic prediction barely beats the best speedup with fewer threads are flagged
+as not worth simulating.
+"""
+
+import argparse
+import csv
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from extract_results import _load_csv_rows
+
+
+def build_time_matrix(rows):
+    """Return (series, threads, T) with T[i, j] = sim_seconds of series i at threads[j] (NaN if missing)."""
+    series = sorted({(r["matrix"], r["width"]) for r in rows})
+    threads = np.array(sorted({r["threads"] for r in rows}), dtype=float)
+    s_index = {key: i for i, key in enumerate(series)}
+    t_index = {int(t): j for j, t in enumerate(threads)}
+
+    times = np.full((len(series), len(threads)), np.nan)
+    for r in rows:
+        if r["sim_seconds"]:
+            times[s_index[(r["matrix"], r["width"])], t_index[r["threads"]]] = r["sim_seconds"]
+    return series, threads, times
+
+
+def speedup_matrix(threads, times):
+    """S = T1 / Tn per series; rows without a 1-thread run are all NaN."""
+    if 1.0 not in threads:
+        return np.full_like(times, np.nan)
+    base = times[:, [int(np.flatnonzero(threads == 1.0)[0])]]
+    return base / times
+
+
+def _masked_ratio(num, den, mask):
+    num_sum = np.where(mask, num, 0.0).sum(axis=1)
+    den_sum = np.where(mask, den, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den_sum > 0, num_sum / den_sum, np.nan)
+
+
+def _rmse(pred, speedup, mask):
+    err = np.where(mask, pred - speedup, 0.0)
+    count = mask.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, np.sqrt((err ** 2).sum(axis=1) / count), np.nan)
+
+
+def amdahl_speedup(serial, n):
+    return 1.0 / (serial + (1.0 - serial) / n)
+
+
+def gustafson_speedup(serial, n):
+    return n - serial * (n - 1.0)
+
+
+def karp_flatt(speedup, n):
+    """Experimentally determined serial fraction e(n); NaN for n = 1."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 1, (1.0 / speedup - 1.0 / n) / (1.0 - 1.0 / n), np.nan)
+
+
+def fit_models(threads, speedup):
+    """Vectorized fits over all series. Returns a dict of 1-D arrays (one value per series)."""
+    n = np.broadcast_to(threads, speedup.shape)
+    mask = np.isfinite(speedup) & (n > 1)
+
+    # Amdahl: y = s x with x = 1 - 1/n, y = 1/S - 1/n
+    x = 1.0 - 1.0 / n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        y = 1.0 / speedup - 1.0 / n
+    amdahl = np.clip(_masked_ratio(x * y, x * x, mask), 0.0, 1.0)
+
+    # Gustafson: n - S = a (n - 1)
+    gustafson = np.clip(_masked_ratio((n - 1.0) * (n - speedup), (n - 1.0) ** 2, mask), 0.0, 1.0)
+
+    # Karp-Flatt: e(n) = e0 + slope * n. A growing e means parallel overhead, not just serial code.
+    kf = karp_flatt(speedup, n)
+    count = mask.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n_mean = np.where(mask, n, 0.0).sum(axis=1) / count
+        e_mean = np.where(mask, kf, 0.0).sum(axis=1) / count
+    dn = n - n_mean[:, None]
+    de = kf - e_mean[:, None]
+    slope = np.nan_to_num(_masked_ratio(dn * de, dn * dn, mask & (count[:, None] > 1)))
+    intercept = e_mean - slope * n_mean
+
+    return {
+        "points": count,
+        "max_speedup": np.nanmax(np.where(mask | (n == 1), speedup, np.nan), axis=1),
+        "amdahl_serial": amdahl,
+        "amdahl_rmse": _rmse(amdahl_speedup(amdahl[:, None], n), speedup, mask),
+        "gustafson_serial": gustafson,
+        "gustafson_rmse": _rmse(gustafson_speedup(gustafson[:, None], n), speedup, mask),
+        "karp_flatt_mean": e_mean,
+        "karp_flatt_slope": slope,
+        "karp_flatt_intercept": intercept,
+        "karp_flatt_rmse": _rmse(predict_karp_flatt(intercept[:, None], slope[:, None], n), speedup, mask),
+    }
+
+
+def predict_karp_flatt(intercept, slope, n):
+    """Speedup from the extrapolated serial fraction e(n) = intercept + slope * n."""
+    e = np.clip(intercept + slope * n, 0.0, 1.0)
+    return amdahl_speedup(e, n)
+
+
+def predict(fits, threads):
+    """Predicted speedup arrays (series x len(threads)) for each model."""
+    n = np.asarray(threads, dtype=float)[None, :]
+    return {
+        "amdahl": amdahl_speedup(fits["amdahl_serial"][:, None], n),
+        "gustafson": gustafson_speedup(fits["gustafson_serial"][:, None], n),
+        "karp_flatt": predict_karp_flatt(fits["karp_flatt_intercept"][:, None], fits["karp_flatt_slope"][:, None], n),
+    }
+
+
+def write_fits_csv(series, fits, output_file):
+    fieldnames = ["matrix", "width"] + list(fits)
+    with open(output_file, "w", newline="", encoding="utf-8") as stream:
+        writer = csv.DictWriter(stream, fieldnames=fieldnames)
+        writer.writeheader()
+        for i, (matrix, width) in enumerate(series):
+            row = {"matrix": matrix, "width": width}
+            for key, values in fits.items():
+                row[key] = f"{values[i]:.6g}"
+            writer.writerow(row)
+
+
+def write_predictions_csv(series, threads, speedup, fits, predict_threads, min_gain, output_file):
+    """Measured and predicted speedups; untested points gaining < min_gain over fewer threads are marked 'skip'."""
+    all_threads = sorted(set(int(t) for t in threads) | set(predict_threads))
+    preds = predict(fits, all_threads)
+    # Amdahl is the optimistic bound for a fixed-size problem, Karp-Flatt adds the measured overhead
+    optimistic = np.fmax(preds["amdahl"], preds["karp_flatt"])
+    measured = {int(t): j for j, t in enumerate(threads)}
+
+    fieldnames = ["matrix", "width", "threads", "measured", "amdahl", "gustafson", "karp_flatt", "gain_vs_best", "decision"]
+    rows = []
+    for i, (matrix, width) in enumerate(series):
+        best = 0.0
+        for k, t in enumerate(all_threads):
+            value = speedup[i, measured[t]] if t in measured else np.nan
+            # compared to the best speedup reachable with fewer threads (measured, or predicted if untested)
+            gain = optimistic[i, k] / best if best > 0 else np.nan
+            best = max(best, value if np.isfinite(value) else optimistic[i, k])
+            if np.isfinite(value):
+                decision = "measured"
+            elif gain < 1.0 + min_gain:
+                decision = "skip"
+            else:
+                decision = "simulate"
+            rows.append({
+                "matrix": matrix,
+                "width": width,
+                "threads": t,
+                "measured": f"{value:.4f}" if np.isfinite(value) else "",
+                "amdahl": f"{preds['amdahl'][i, k]:.4f}",
+                "gustafson": f"{preds['gustafson'][i, k]:.4f}",
+                "karp_flatt": f"{preds['karp_flatt'][i, k]:.4f}",
+                "gain_vs_best": f"{gain:.4f}",
+                "decision": decision,
+            })
+
+    with open(output_file, "w", newline="", encoding="utf-8") as stream:
+        writer = csv.DictWriter(stream, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+
+def plot_models(series, threads, speedup, fits, predict_threads, plots_dir):
+    try:
+        import matplotlib.pyplot as plt
+    except Exception:
+        print("⚠ matplotlib não disponível. Instale com: pip install matplotlib")
+        return []
+
+    plots_dir.mkdir(parents=True, exist_ok=True)
+    n_max = max([int(threads.max())] + list(predict_threads))
+    n_curve = np.unique(np.geomspace(1, n_max, 200))
+    curves = predict(fits, n_curve)
+    kf = karp_flatt(speedup, np.broadcast_to(threads, speedup.shape))
+    colors = plt.get_cmap("tab10")
+
+    outputs = []
+    for matrix in sorted({m for m, _ in series}):
+        fig, (ax_s, ax_e) = plt.subplots(1, 2, figsize=(14, 6))
+        for idx, (i, (_, width)) in enumerate((i, s) for i, s in enumerate(series) if s[0] == matrix):
+            color = colors(idx % 10)
+            ok = np.isfinite(speedup[i])
+            ax_s.plot(threads[ok], speedup[i, ok], "o", color=color, markersize=7, label=f"Largeur O3 = {width}")
+            ax_s.plot(n_curve, curves["amdahl"][i], "-", color=color, linewidth=1.5,
+                      label=f"Amdahl s={fits['amdahl_serial'][i]:.3f}")
+            ax_s.plot(n_curve, curves["karp_flatt"][i], "--", color=color, linewidth=1.5,
+                      label=f"Karp-Flatt e(n)={fits['karp_flatt_intercept'][i]:.3f}+{fits['karp_flatt_slope'][i]:.4f}n")
+            ok_e = np.isfinite(kf[i])
+            ax_e.plot(threads[ok_e], kf[i, ok_e], marker="o", color=color, linewidth=2, label=f"Largeur O3 = {width}")
+
+        for t in predict_threads:
+            ax_s.axvline(t, color="gray", linestyle=":", linewidth=1)
+        ax_s.set_xscale("log", base=2)
+        ax_s.set_title(f"Accélération mesurée et modèles (matrice={matrix})", fontsize=12, fontweight="bold")
+        ax_s.set_xlabel("Nombre de threads", fontsize=10)
+        ax_s.set_ylabel("Accélération (T1 / Tn)", fontsize=10)
+        ax_s.grid(True, linestyle="--", alpha=0.35)
+        ax_s.legend(fontsize=7)
+
+        ax_e.set_xscale("log", base=2)
+        ax_e.set_title(f"Fraction séquentielle de Karp-Flatt (matrice={matrix})", fontsize=12, fontweight="bold")
+        ax_e.set_xlabel("Nombre de threads", fontsize=10)
+        ax_e.set_ylabel("e(n)", fontsize=10)
+        ax_e.grid(True, linestyle="--", alpha=0.35)
+        ax_e.legend(title="Légende", frameon=True)
+
+        out = plots_dir / f"q10_m{matrix}_scaling_models.png"
+        fig.tight_layout()
+        fig.savefig(out, dpi=150)
+        plt.close(fig)
+        outputs.append(out)
+    return outputs
+
+
+# Etapes mesurees par --profile
+PROFILE_STAGES = ["_load_csv_rows", "build_time_matrix", "fit_models", "write_fits_csv", "write_predictions_csv", "plot_models"]
+
+
+def main(argv=None):
+    here = Path(__file__).parent
+    parser = argparse.ArgumentParser(description="Fit Amdahl / Gustafson / Karp-Flatt on TP5 thread sweeps")
+    parser.add_argument("--input", type=Path, default=here / "results.csv", help="CSV from extract_results.py")
+    parser.add_argument("--fits-output", type=Path, default=here / "scaling_fits.csv")
+    parser.add_argument("--predictions-output", type=Path, default=here / "scaling_predictions.csv")
+    parser.add_argument(
+        "--predict-threads",
+        type=int,
+        nargs="+",
+        default=[32, 64],
+        help="Untested thread counts to predict",
+    )
+    parser.add_argument(
+        "--min-gain",
+        type=float,
+        default=0.05,
+        help="Skip an untested point if its optimistic predicted speedup is below (1 + min-gain) x the best one with fewer threads",
+    )
+    parser.add_argument("--plot", action="store_true", help="Generate speedup / Karp-Flatt plots")
+    parser.add_argument("--plots-dir", type=Path, default=here / "plots")
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="JSON",
+        help="Per-stage wall/CPU time report (default: profile_<command>.json next to the outputs)",
+    )
+    parser.add_argument(
+        "--profile-pstats",
+        action="store_true",
+        help="With --profile, also dump a cProfile .pstats next to the JSON",
+    )
+    args = parser.parse_args(argv)
+    if args.profile is not None:
+        # meme rapport que les scripts du TP4 (TP4/profiling.py)
+        sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "TP4"))
+        import profiling
+
+        profiling.start(args, "tp5 scaling", globals(), PROFILE_STAGES, out_dir=args.fits_output.parent)
+
+    if not args.input.exists():
+        print(f"Error: {args.input} not found")
+        raise SystemExit(1)
+
+    rows = _load_csv_rows(args.input)
+    series, threads, times = build_time_matrix(rows)
+    speedup = speedup_matrix(threads, times)
+    fits = fit_models(threads, speedup)
+
+    write_fits_csv(series, fits, args.fits_output)
+    predictions = write_predictions_csv(series, threads, speedup, fits, args.predict_threads, args.min_gain, args.predictions_output)
+    print(f"✓ Fitted {len(series)} series to {args.fits_output}")
+    print(f"✓ Predictions written to {args.predictions_output}")
+    for row in predictions:
+        if row["decision"] != "measured":
+            print(f"  m={row['matrix']} w={row['width']} t={row['threads']}: "
+                  f"amdahl={row['amdahl']} karp_flatt={row['karp_flatt']} -> {row['decision']}")
+
+    if args.plot:
+        generated = plot_models(series, threads, speedup, fits, args.predict_threads, args.plots_dir)
+        if generated:
+            print(f"✓ Generated {len(generated)} plot(s) in {args.plots_dir}")
+
+
+if __name__ == "__main__":
+    main()
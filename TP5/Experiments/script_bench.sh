@@ -17,6 +17,9 @@ Options:
   --env-file <path>      Environment file passed to se_a15.py (--env)
   --omp-active-wait      Append OMP_WAIT_POLICY=ACTIVE and GOMP_SPINCOUNT=1000000000
   --no-caches            Disable --caches --l2cache
+  --lean                 Lean m5out: no config.dot/pdf/svg, gzipped configs, gem5 writes to --scratch
+                         and only the retained files are moved to the results root
+  --scratch <path>       Local staging directory for --lean (default: /dev/shm, else ${TMPDIR:-/tmp})
   -h, --help             Show help
 EOF
 }
@@ -35,6 +38,9 @@ ENV_FILE=""
 OMP_ACTIVE_WAIT=0
 EFFECTIVE_ENV_FILE=""
 TEMP_ENV_FILE=""
+LEAN=0
+SCRATCH=""
+CURRENT_STAGE=""
 
 while [[ $# -gt 0 ]]; do
   case "$1" in
@@ -74,6 +80,14 @@ while [[ $# -gt 0 ]]; do
       USE_CACHES=0
       shift
       ;;
+    --lean)
+      LEAN=1
+      shift
+      ;;
+    --scratch)
+      SCRATCH="${2:-}"
+      shift 2
+      ;;
     -h|--help)
       usage
       exit 0
@@ -172,9 +186,54 @@ cleanup_temp_env() {
   if [[ -n "${TEMP_ENV_FILE}" && -f "${TEMP_ENV_FILE}" ]]; then
     rm -f "${TEMP_ENV_FILE}"
   fi
+  if [[ -n "${CURRENT_STAGE}" ]]; then
+    rm -rf "${CURRENT_STAGE}"
+  fi
 }
 trap cleanup_temp_env EXIT
 
+if (( LEAN )); then
+  if [[ -z "${SCRATCH}" ]]; then
+    if [[ -d /dev/shm && -w /dev/shm ]]; then
+      SCRATCH="/dev/shm"
+    else
+      SCRATCH="${TMPDIR:-/tmp}"
+    fi
+  fi
+  SCRATCH="${SCRATCH}/es201_m5out_$(id -u)"
+  mkdir -p "${SCRATCH}"
+fi
+
+# Move the retained files of a staged m5out to the run directory:
+# configs gzipped, dot files and citations.bib dropped, stats.txt last.
+retain_m5out() {
+  local stage="$1"
+  local dest="$2"
+  local path name
+  mkdir -p "${dest}"
+  for path in "${stage}"/*; do
+    [[ -e "${path}" ]] || continue
+    name="$(basename "${path}")"
+    case "${name}" in
+      stats.txt|citations.bib|config.dot|config.dot.pdf|config.dot.svg)
+        ;;
+      config.ini|config.json)
+        gzip -6 -c "${path}" > "${dest}/.${name}.gz.tmp"
+        mv -f "${dest}/.${name}.gz.tmp" "${dest}/${name}.gz"
+        rm -f "${dest}/${name}"
+        ;;
+      *)
+        rm -rf "${dest:?}/${name}"
+        mv "${path}" "${dest}/${name}"
+        ;;
+    esac
+  done
+  if [[ -f "${stage}/stats.txt" ]]; then
+    cp "${stage}/stats.txt" "${dest}/.stats.txt.tmp"
+    mv -f "${dest}/.stats.txt.tmp" "${dest}/stats.txt"
+  fi
+}
+
 if (( OMP_ACTIVE_WAIT )); then
   TEMP_ENV_FILE="$(mktemp)"
   if [[ -n "${ENV_FILE}" ]]; then
@@ -299,6 +358,9 @@ if (( USE_CACHES )); then
 else
   echo "- CACHES: disabled"
 fi
+if (( LEAN )); then
+  echo "- LEAN: enabled (staging in ${SCRATCH})"
+fi
 if (( OMP_ACTIVE_WAIT )); then
   echo "- OMP_ACTIVE_WAIT: enabled (OMP_WAIT_POLICY=ACTIVE, GOMP_SPINCOUNT=1000000000)"
 fi
@@ -315,9 +377,18 @@ for width in "${WIDTHS_LIST[@]}"; do
     fi
 
     mkdir -p "${outdir}"
+    gem5_dir="${outdir}"
+    gem5_opts=()
+    if (( LEAN )); then
+      gem5_dir="${SCRATCH}/s${SIZE}_w${width}_t${threads}_$$"
+      rm -rf "${gem5_dir}"
+      CURRENT_STAGE="${gem5_dir}"
+      gem5_opts=("--dot-config=")
+    fi
     cmd=(
       "${GEM5_BIN}"
-      "--outdir=${outdir}"
+      "--outdir=${gem5_dir}"
+      ${gem5_opts[@]+"${gem5_opts[@]}"}
       "${SE_SCRIPT}"
       "--cpu-type=detailed"
       "--o3-width=${width}"
@@ -342,6 +413,14 @@ for width in "${WIDTHS_LIST[@]}"; do
     cmd_status=${PIPESTATUS[0]}
     set -e
 
+    if (( LEAN )); then
+      if (( cmd_status == 0 )); then
+        retain_m5out "${gem5_dir}" "${outdir}"
+      fi
+      rm -rf "${gem5_dir}"
+      CURRENT_STAGE=""
+    fi
+
     if (( cmd_status != 0 )); then
       update_state_status "${SIZE}" "${width}" "${threads}" "FAILED" "${outdir}" "${log_path}"
       echo "FAILED at size=${SIZE} width=${width} threads=${threads} (exit=${cmd_status})" >&2
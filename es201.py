@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+One entry point for the ES201 scripts:
+
+    es201 sweep run|grid|sample|collect|plot ...   TP4/l1_sweep.py
+    es201 efficiency ...                           TP4/energy_efficiency.py
+    es201 inst-mix [APP=STATS ...]                 TP4/extract_inst_class_percentages.py
+    es201 synth tp4|tp5 ...                        TP4/synth_stats.py
+    es201 bench ...                                TP4/bench_tooling.py
+    es201 tp5 extract|scaling ...                  TP5/Experiments/extract_results.py, scaling_models.py
+    es201 tp5 bench ...                            TP5/Experiments/pipeline_bench.py
+    es201 startup-check                            start-up time of a collect-only run
+
+Only the module of the chosen subcommand is imported, and the modules import
+matplotlib / NumPy only where they draw or fit, so `es201 sweep collect`
+costs the interpreter start plus the stats parsing. `startup-check` keeps it
+that way: it times collect-only invocations and fails above a budget.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent
+
+# name -> (directory, module, help); the module must have main(argv)
+COMMANDS: Dict[str, Tuple[Path, str, str]] = {
+    "sweep": (ROOT / "TP4", "l1_sweep", "gem5 sweeps of the TP4 configs: run, grid, sample, collect, plot"),
+    "efficiency": (ROOT / "TP4", "energy_efficiency", "energy efficiency CSV and figures"),
+    "inst-mix": (ROOT / "TP4", "extract_inst_class_percentages", "committed instruction mix of gem5 runs"),
+    "synth": (ROOT / "TP4", "synth_stats", "synthetic m5out trees (TP4 or TP5 layout)"),
+    "bench": (ROOT / "TP4", "bench_tooling", "throughput benchmark of the parsers and plots"),
+}
+TP5_COMMANDS: Dict[str, Tuple[Path, str, str]] = {
+    "extract": (ROOT / "TP5" / "Experiments", "extract_results", "results.txt -> results.csv (+ --plot)"),
+    "scaling": (ROOT / "TP5" / "Experiments", "scaling_models", "Amdahl / Gustafson / Karp-Flatt fits"),
+    "bench": (ROOT / "TP5" / "Experiments", "pipeline_bench", "script_bench.sh sweep, collected while it runs"),
+}
+
+# Heavy packages a collect-only run must not load
+HEAVY_MODULES = ("matplotlib", "numpy")
+
+
+def _usage() -> str:
+    lines = ["usage: es201 <command> [args...]", "", "commands:"]
+    for name, (_, _, help_text) in COMMANDS.items():
+        lines.append(f"  {name:<16}{help_text}")
+    for name, (_, _, help_text) in TP5_COMMANDS.items():
+        lines.append(f"  {'tp5 ' + name:<16}{help_text}")
+    lines.append(f"  {'startup-check':<16}time collect-only invocations against a budget")
+    lines.append("")
+    lines.append("es201 <command> -h shows the options of a command.")
+    return "\n".join(lines)
+
+
+def _dispatch(prog: str, target: Tuple[Path, str, str], argv: List[str]) -> None:
+    directory, module_name, _ = target
+    # The scripts import their siblings as top-level modules
+    sys.path.insert(0, str(directory))
+    sys.argv[0] = prog
+    import importlib
+
+    importlib.import_module(module_name).main(argv)
+
+
+def _heavy_imports(cmd: List[str]) -> List[str]:
+    """Heavy top-level packages imported by one run of cmd (from -X importtime)."""
+    import subprocess
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *cmd],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    found = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        name = line.rsplit("|", 1)[-1].strip().split(".")[0]
+        if name in HEAVY_MODULES:
+            found.add(name)
+    return sorted(found)
+
+
+def startup_check(argv: Optional[List[str]] = None) -> None:
+    """Median wall time of `es201 sweep collect` on an empty tree, against --budget-ms.
+
+    Also fails when a collect-only run (sweep collect, tp5 extract) imports
+    one of HEAVY_MODULES.
+    """
+    import argparse
+    import os
+    import statistics
+    import subprocess
+    import tempfile
+    import time
+
+    parser = argparse.ArgumentParser(
+        prog="es201 startup-check",
+        description="Time collect-only invocations (interpreter start included) against a budget",
+    )
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="maximum median wall time (default: 100)")
+    parser.add_argument("--repeat", type=int, default=10, help="number of timed runs (default: 10)")
+    args = parser.parse_args(argv)
+
+    # Time what a user gets: bytecode cached in __pycache__, not recompiled per run
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+
+    with tempfile.TemporaryDirectory(prefix="es201_startup_") as tmp:
+        cmd = [str(Path(__file__).resolve()), "sweep", "collect", "--cpu", "A7",
+               "--out-root", tmp, "--csv", str(Path(tmp) / "results.csv")]
+
+        def wall_ms(argv_: List[str]) -> float:
+            start = time.perf_counter()
+            subprocess.run([sys.executable, *argv_], stdout=subprocess.DEVNULL, env=env, check=True)
+            return (time.perf_counter() - start) * 1e3
+
+        wall_ms(cmd)  # warm the page cache and write the .pyc files
+        interpreter = statistics.median(wall_ms(["-c", "pass"]) for _ in range(args.repeat))
+        samples = [wall_ms(cmd) for _ in range(args.repeat)]
+        # tp5 extract without --plot is the other collect-only path
+        tp5 = [str(Path(__file__).resolve()), "tp5", "extract", "--output", str(Path(tmp) / "tp5.csv")]
+        heavy = {"sweep collect": _heavy_imports(cmd), "tp5 extract": _heavy_imports(tp5)}
+
+    median = statistics.median(samples)
+    print(f"interpreter alone : {interpreter:7.1f} ms (median of {args.repeat})")
+    print(f"sweep collect     : {median:7.1f} ms (median, min {min(samples):.1f} ms, budget {args.budget_ms:.0f} ms)")
+    failures = []
+    failures.extend(f"{name} imports {', '.join(mods)}" for name, mods in heavy.items() if mods)
+    if median > args.budget_ms:
+        failures.append(f"median {median:.1f} ms > {args.budget_ms:.0f} ms")
+    if failures:
+        raise SystemExit("startup-check FAILED: " + "; ".join(failures))
+    print("startup-check ok")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(_usage())
+        return
+    name, rest = argv[0], argv[1:]
+    if name in COMMANDS:
+        _dispatch(f"es201 {name}", COMMANDS[name], rest)
+    elif name == "tp5":
+        if not rest or rest[0] not in TP5_COMMANDS:
+            raise SystemExit(f"usage: es201 tp5 {{{','.join(TP5_COMMANDS)}}} [args...]")
+        _dispatch(f"es201 tp5 {rest[0]}", TP5_COMMANDS[rest[0]], rest[1:])
+    elif name == "startup-check":
+        startup_check(rest)
+    else:
+        raise SystemExit(f"es201: unknown command {name!r}\n\n{_usage()}")
+
+
+if __name__ == "__main__":
+    main()